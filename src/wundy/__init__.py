@@ -1 +1,65 @@
-from . import ui
+"""A one dimensional finite element solver.
+
+Submodules are imported on first attribute access (``wundy.ui``, ``wundy.first``, ...) so that
+``import wundy`` and the ``wundy`` command start quickly.
+
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+from typing import Any
+
+__all__ = [
+    "adapt",
+    "assembly",
+    "batch",
+    "bench",
+    "cache",
+    "cli",
+    "compact",
+    "dynamics",
+    "elements",
+    "first",
+    "instrument",
+    "linalg",
+    "materials",
+    "modal",
+    "model",
+    "nonlinear",
+    "ordering",
+    "output",
+    "post",
+    "schemas",
+    "sweep",
+    "ui",
+]
+
+if TYPE_CHECKING:
+    from . import adapt
+    from . import assembly
+    from . import batch
+    from . import bench
+    from . import cache
+    from . import cli
+    from . import compact
+    from . import dynamics
+    from . import elements
+    from . import first
+    from . import instrument
+    from . import linalg
+    from . import materials
+    from . import modal
+    from . import model
+    from . import nonlinear
+    from . import ordering
+    from . import output
+    from . import post
+    from . import schemas
+    from . import sweep
+    from . import ui
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,188 @@
+"""Adaptive mesh refinement of bars of t1d1 elements.
+
+``adapt`` alternates solving, estimating the error of each element, marking the elements with
+the largest errors and bisecting them, until the estimated relative error in the energy norm is
+below a tolerance or the DOF budget is spent::
+
+    inp = wundy.ui.preprocess(wundy.ui.load(file))
+    result = adapt(inp, tol=1e-3, max_dof=10_000)
+    result["soln"]["displ"], result["inp"]["coords"]
+
+The error indicator recovers the axial force in each element from the element's equilibrium:
+its end forces ``K_e u_e - f_e`` vary linearly along the element under a uniform distributed
+load, while the finite element force ``EA du/dx`` is constant.  The energy of the difference is
+the indicator.  Because the nodal displacements of a bar are exact, this recovery is exact, and
+unlike averaging stresses at nodes it is not polluted by point loads and material interfaces.
+
+Refinement appends the new midside nodes and the new second halves of bisected elements to the
+mesh, so node and element numbers of the input remain valid; element blocks, element sets,
+distributed loads and DOF tags are extended to match.
+
+"""
+
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .assembly import block_element_arrays
+from .assembly import element_lengths
+from .first import first_fe_code
+from .instrument import Recorder
+from .instrument import null_recorder
+
+
+def error_indicator(inp: dict[str, Any], soln: dict[str, Any]) -> tuple[NDArray[float], float]:
+    """Per-element error indicators and the energy ``u.K.u`` of the solution.
+
+    Returns
+    -------
+    eta : (nelem,) float array
+        Energy norm of the difference between the recovered and the finite element axial force
+        of each element.
+    energy : float
+        Sum over the elements of ``N**2 L / EA``, the squared energy norm of the solution.
+
+    """
+    coords, connect = inp["coords"], inp["connect"]
+    elements, ea = block_element_arrays(inp["materials"], inp["element blocks"])
+    Le = element_lengths(coords, connect, elements)
+    u = np.asarray(soln["displ"], dtype=float).ravel()
+    dofs = connect[elements] * coords.shape[1]
+    N = ea * (u[dofs[:, 1]] - u[dofs[:, 0]]) / Le
+    q = np.asarray(inp["dload"], dtype=float).reshape(len(connect), -1)[elements, 0]
+
+    # Element equilibrium: end forces K_e u_e - f_e = [-N - qL/2, N - qL/2], so the recovered
+    # force falls linearly from N + qL/2 to N - qL/2.  Its difference d(x) from N integrates to
+    # int d^2 / EA dx = (qL/2)^2 L / (3 EA)
+    d = q * Le / 2
+    eta = np.zeros(len(connect))
+    eta[elements] = np.sqrt(d**2 * np.abs(Le) / (3 * ea))
+    energy = float(np.sum(N**2 * np.abs(Le) / ea))
+    return eta, energy
+
+
+def mark(eta: NDArray[float], theta: float = 0.5, budget: int | None = None) -> NDArray[int]:
+    """Elements with ``eta >= theta * max(eta)``, largest first, at most ``budget`` of them.
+
+    A ``budget`` of zero or less marks no element.
+
+    """
+    if eta.size == 0 or eta.max() <= 0.0:
+        return np.zeros(0, dtype=int)
+    marked = np.flatnonzero(eta >= theta * eta.max())
+    marked = marked[np.argsort(-eta[marked], kind="stable")]
+    return marked if budget is None else marked[: max(budget, 0)]
+
+
+def refine(inp: dict[str, Any], elements: NDArray[int]) -> dict[str, Any]:
+    """Bisect ``elements`` of the preprocessed input ``inp``; returns a new preprocessed input.
+
+    Element ``e = [a, b]`` becomes ``[a, m]`` and the new element ``[m, b]`` is appended, with
+    the new node ``m`` appended at the midpoint.  New elements belong to the blocks and element
+    sets of their parent and carry its distributed load; new nodes are free and unloaded.
+
+    """
+    coords, connect = inp["coords"], inp["connect"]
+    if connect.shape[1] != 2:
+        raise ValueError("Refinement supports t1d1 (2-node) elements only")
+    elements = np.unique(np.asarray(elements, dtype=int))
+    nnode, nelem, m = len(coords), len(connect), len(elements)
+
+    # parent[i] is the element the i-th element of the refined mesh descends from
+    parent = np.concatenate([np.arange(nelem), elements])
+    new_nodes = np.arange(nnode, nnode + m)
+    a, b = connect[elements, 0], connect[elements, 1]
+    refined = dict(inp)
+    refined["coords"] = np.concatenate([coords, (coords[a] + coords[b]) / 2])
+    connect = np.concatenate([connect, np.column_stack([new_nodes, b])])
+    connect[elements, 1] = new_nodes
+    refined["connect"] = connect
+
+    def extend(members: Any) -> NDArray[int]:
+        """Members of an element list and the children of its refined members"""
+        members = np.asarray(members, dtype=int)
+        in_set = np.zeros(nelem, dtype=bool)
+        in_set[members] = True
+        return np.concatenate([members, nelem + np.flatnonzero(in_set[elements])])
+
+    refined["element blocks"] = {
+        name: {**block, "elements": extend(block["elements"])}
+        for name, block in inp["element blocks"].items()
+    }
+    elsets: dict[str, Any] = {name: extend(s) for name, s in inp["element sets"].items()}
+    # The "all" sets are lists, as built by ``wundy.ui.preprocess``
+    elsets["all"] = list(range(nelem + m))
+    refined["element sets"] = elsets
+    refined["nodesets"] = {**inp["nodesets"], "all": list(range(nnode + m))}
+    refined["dload"] = np.asarray(inp["dload"])[parent]
+    zeros = np.zeros((m, coords.shape[1]))
+    refined["doftags"] = np.concatenate([inp["doftags"], zeros.astype(int)])
+    refined["dofvals"] = np.concatenate([inp["dofvals"], zeros])
+    return refined
+
+
+def adapt(
+    inp: dict[str, Any],
+    tol: float = 1e-3,
+    max_dof: int = 100_000,
+    theta: float = 0.5,
+    max_iter: int = 100,
+    engine: str = "sparse",
+    recorder: Recorder | None = None,
+) -> dict[str, Any]:
+    """Solve and refine ``inp`` until the relative energy error estimate is below ``tol``.
+
+    Parameters
+    ----------
+    inp : dict
+        Output of ``wundy.ui.preprocess``; it is not modified.
+    tol : float
+        Target of the estimated relative error ``sqrt(sum eta**2 / (energy + sum eta**2))``.
+    max_dof : int
+        DOF budget; refinement stops when no further element can be bisected within it.
+    theta : float
+        Elements with indicators of at least ``theta`` times the largest are bisected.
+    max_iter : int
+        Largest number of refinement steps.
+    engine : {"sparse", "dense"}
+        Passed to ``wundy.first.first_fe_code``.
+    recorder : Recorder, optional
+        Records the ``assemble``, ``solve`` and ``refine`` stages of every step.
+
+    Returns
+    -------
+    dict with the refined input ``inp``, its solution ``soln``, the final indicators ``eta``,
+    ``converged`` and a ``history`` of ``ndof``, ``error`` and ``refined`` per step
+
+    """
+    recorder = recorder or null_recorder
+    history: list[dict[str, Any]] = []
+    for _ in range(max_iter + 1):
+        soln = first_fe_code(
+            inp["coords"],
+            inp["connect"],
+            inp["doftags"],
+            inp["dofvals"],
+            inp["dload"],
+            inp["materials"],
+            inp["element blocks"],
+            engine=engine,
+            recorder=recorder,
+        )
+        eta, energy = error_indicator(inp, soln)
+        total = float(np.sum(eta**2))
+        error = float(np.sqrt(total / (energy + total))) if energy + total > 0 else 0.0
+        ndof = inp["coords"].size
+        history.append({"ndof": ndof, "error": error, "refined": 0})
+        if error <= tol:
+            return {"inp": inp, "soln": soln, "eta": eta, "converged": True, "history": history}
+        # Each bisection adds a node; none is added once the mesh has max_dof DOFs or more
+        budget = max(max_dof - ndof, 0) // inp["coords"].shape[1]
+        elements = mark(eta, theta, budget=budget)
+        if len(elements) == 0 or len(history) > max_iter:
+            break
+        with recorder.stage("refine", elements=len(elements)):
+            inp = refine(inp, elements)
+        history[-1]["refined"] = len(elements)
+    return {"inp": inp, "soln": soln, "eta": eta, "converged": False, "history": history}
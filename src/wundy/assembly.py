@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Literal
+from typing import overload
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .linalg import issparse
+from .schemas import DIRICHLET
+
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+    from .compact import CompactModel
+
+# Unit 2-node bar stiffness, flattened row-major: [[1, -1], [-1, 1]]
+BAR_STIFFNESS = np.array([1.0, -1.0, -1.0, 1.0])
+
+
+def block_element_arrays(
+    materials: dict[str, Any], blocks: dict[str, Any]
+) -> tuple[NDArray[int], NDArray[float]]:
+    """Gather the elements of all blocks, in block order, and the A*E product of each element"""
+    elements: list[NDArray[int]] = []
+    ea: list[NDArray[float]] = []
+    for block in blocks.values():
+        A = float(block["element_properties"]["area"])
+        mat = materials[block["material"]]
+        E = float(mat["parameters"]["E"])
+        elems = np.asarray(block["elements"], dtype=int).ravel()
+        elements.append(elems)
+        ea.append(np.full(len(elems), A * E))
+    if not elements:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=float)
+    return np.concatenate(elements), np.concatenate(ea)
+
+
+def element_densities(materials: dict[str, Any], blocks: dict[str, Any]) -> NDArray[float]:
+    """Mass density of the elements of all blocks, in block order.  Every material needs one"""
+    density: list[NDArray[float]] = []
+    for name, block in blocks.items():
+        parameters = materials[block["material"]]["parameters"]
+        if "density" not in parameters:
+            raise ValueError(
+                f"Material {block['material']!r} of element block {name} needs a density"
+            )
+        elems = np.asarray(block["elements"], dtype=int).ravel()
+        density.append(np.full(len(elems), float(parameters["density"])))
+    return np.concatenate(density) if density else np.zeros(0, dtype=float)
+
+
+def block_material_models(
+    materials: dict[str, Any], blocks: dict[str, Any]
+) -> tuple[NDArray[int], NDArray[float], list[tuple[Any, NDArray[int]]]]:
+    """Gather the elements of all blocks, in block order, their areas and material models.
+
+    Returns the elements, the area of each and a list of ``(model, positions)`` pairs, one per
+    block, with ``model`` a ``wundy.materials.Material`` and ``positions`` the indices of the
+    block's elements in the returned ``elements``.
+
+    """
+    from .materials import MATERIALS
+
+    elements: list[NDArray[int]] = []
+    area: list[NDArray[float]] = []
+    groups: list[tuple[Any, NDArray[int]]] = []
+    start = 0
+    for block in blocks.values():
+        mat = materials[block["material"]]
+        if mat["type"] not in MATERIALS:
+            raise ValueError(f"Unknown material {mat['type']!r}")
+        elems = np.asarray(block["elements"], dtype=int).ravel()
+        groups.append((MATERIALS[mat["type"]](mat["parameters"]), start + np.arange(len(elems))))
+        elements.append(elems)
+        area.append(np.full(len(elems), float(block["element_properties"]["area"])))
+        start += len(elems)
+    if not elements:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=float), groups
+    return np.concatenate(elements), np.concatenate(area), groups
+
+
+def element_lengths(
+    coords: NDArray[float], connect: NDArray[int], elements: NDArray[int]
+) -> NDArray[float]:
+    """Signed lengths x[j] - x[i] of ``elements``.  All zero-length elements are reported at once"""
+    if coords.shape[1] != 1:
+        raise ValueError("Only 1-D meshes (one coordinate per node) are supported here")
+    nodes = connect[elements]
+    Le = coords[nodes[:, 1], 0] - coords[nodes[:, 0], 0]
+    _check_lengths(Le, nodes, elements)
+    return Le
+
+
+def element_geometry(
+    coords: NDArray[float], connect: NDArray[int], elements: NDArray[int]
+) -> tuple[NDArray[float], NDArray[float]]:
+    """Lengths and unit axis vectors (nelem, ndim), from first to second end, of ``elements``"""
+    nodes = connect[elements]
+    d = coords[nodes[:, 1]] - coords[nodes[:, 0]]
+    L = np.sqrt(np.einsum("ij,ij->i", d, d))
+    _check_lengths(L, nodes, elements)
+    return L, d / L[:, np.newaxis]
+
+
+def _check_lengths(L: NDArray[float], nodes: NDArray[int], elements: NDArray[int]) -> None:
+    if np.any(bad := np.isclose(L, 0.0)):
+        s = ", ".join(f"{list(n[:2])}" for n in nodes[bad].tolist())
+        raise ValueError(f"Zero-length element(s) {elements[bad].tolist()} between nodes {s}")
+
+
+def node_dofs(nodes: NDArray[int], dof_per_node: int) -> NDArray[int]:
+    """Global DOFs (..., nodes * dof_per_node) of ``nodes`` (..., nodes), node by node"""
+    dofs = nodes[..., np.newaxis] * dof_per_node + np.arange(dof_per_node)
+    return dofs.reshape(*nodes.shape[:-1], -1)
+
+
+def truss_stiffness(
+    k: NDArray[float], axes: NDArray[float], dofs: NDArray[int]
+) -> tuple[NDArray[int], NDArray[int], NDArray[float]]:
+    """COO triplets of 2-node truss elements of axial stiffness ``k = EA/L``.
+
+    ``axes`` (nelem, ndim) are the unit element axes and ``dofs`` (nelem, 2 ndim) the element
+    DOFs.  The element stiffness ``k [[a, -a], [-a, a]]``, ``a`` the outer product of the axis
+    with itself, is the axial bar stiffness rotated to the global components.
+
+    """
+    nelem, ndim = axes.shape
+    a = axes[:, :, np.newaxis] * axes[:, np.newaxis, :]
+    sign = BAR_STIFFNESS.reshape(2, 2)
+    # ke[e, I, i, J, j] = k[e] sign[I, J] a[e, i, j]
+    ke = k[:, None, None, None, None] * sign[:, None, :, None] * a[:, None, :, None, :]
+    n = 2 * ndim
+    rows = np.repeat(dofs, n, axis=1).ravel()
+    cols = np.tile(dofs, (1, n)).ravel()
+    return rows, cols, ke.ravel()
+
+
+def assemble(
+    coords: NDArray[float],
+    connect: NDArray[int],
+    dload: NDArray[float] | None,
+    materials: dict[str, Any],
+    blocks: dict[str, Any],
+    F: NDArray[float],
+) -> tuple[NDArray[int], NDArray[int], NDArray[float]]:
+    """Batched assembly of element stiffness and consistent distributed loads.
+
+    Element lengths, ``A*E/Le`` factors and nodal loads are computed for all elements in single
+    array operations.  The consistent loads are scattered into ``F`` in place; the stiffness is
+    returned as COO triplets ``(rows, cols, vals)`` with duplicates to be summed.  The element
+    type follows from the number of nodes per element, see ``wundy.elements``; elements of order
+    higher than 1 are integrated by Gauss quadrature.
+
+    """
+    elements, ea = block_element_arrays(materials, blocks)
+    return assemble_elements(coords, connect, dload, elements, ea, F)
+
+
+def assemble_compact(
+    model: CompactModel, F: NDArray[float], dload: bool = True
+) -> tuple[NDArray[int], NDArray[int], NDArray[float]]:
+    """``assemble`` for a ``wundy.compact.CompactModel``, from its per-element rigidities.
+
+    The distributed loads of the model are scattered into ``F`` unless ``dload`` is False.
+
+    """
+    elements = np.arange(len(model.connect))
+    q = model.dload if dload else None
+    return assemble_elements(model.coords, model.connect, q, elements, model.ea, F)
+
+
+def assemble_elements(
+    coords: NDArray[float],
+    connect: NDArray[int],
+    dload: NDArray[float] | None,
+    elements: NDArray[int],
+    ea: NDArray[float],
+    F: NDArray[float],
+) -> tuple[NDArray[int], NDArray[int], NDArray[float]]:
+    """``assemble`` for ``elements`` of axial rigidities ``ea``"""
+    dof_per_node = coords.shape[1]
+    if dof_per_node > 1:
+        if connect.shape[1] != 2:
+            raise ValueError("2-D and 3-D (truss) meshes support t1d1 (2-node) elements only")
+        L, axes = element_geometry(coords, connect, elements)
+        rows, cols, vals = truss_stiffness(ea / L, axes, node_dofs(connect[elements], dof_per_node))
+        if dload is not None and len(dload) > 0:
+            distributed_loads(F, coords, connect, elements, dload, Le=L)
+        return rows, cols, vals
+
+    Le = element_lengths(coords, connect, elements)
+    dofs = connect[elements] * dof_per_node
+
+    if connect.shape[1] == 2:
+        k = ea / Le
+        rows = np.repeat(dofs, 2, axis=1).ravel()
+        cols = np.tile(dofs, (1, 2)).ravel()
+        vals = (k[:, np.newaxis] * BAR_STIFFNESS).ravel()
+    else:
+        from .elements import element_type
+
+        nodes = connect.shape[1]
+        ke = element_type(nodes).stiffness(coords[connect[elements], 0], ea)
+        rows = np.repeat(dofs, nodes, axis=1).ravel()
+        cols = np.tile(dofs, (1, nodes)).ravel()
+        vals = ke.ravel()
+
+    if dload is not None and len(dload) > 0:
+        distributed_loads(F, coords, connect, elements, dload, Le=Le)
+
+    return rows, cols, vals
+
+
+def distributed_loads(
+    F: NDArray[float],
+    coords: NDArray[float],
+    connect: NDArray[int],
+    elements: NDArray[int],
+    dload: NDArray[float],
+    Le: NDArray[float] | None = None,
+) -> None:
+    """Scatter the consistent nodal loads of uniform distributed loads on ``elements`` into ``F``.
+
+    ``dload`` has a row per element of force per length components; on truss meshes each
+    component is split equally between the element ends.
+
+    """
+    dof_per_node = coords.shape[1]
+    if dof_per_node > 1:
+        L = element_geometry(coords, connect, elements)[0] if Le is None else np.abs(Le)
+        q = np.asarray(dload, dtype=float).reshape(len(dload), -1)[elements, :dof_per_node]
+        fe = np.repeat(q * L[:, np.newaxis] / 2, 2, axis=0)
+        dofs = node_dofs(connect[elements].reshape(-1, 1), dof_per_node)
+        F += np.bincount(dofs.ravel(), weights=fe.ravel(), minlength=len(F))
+        return
+    dofs = connect[elements] * dof_per_node
+    if connect.shape[1] == 2:
+        Le = element_lengths(coords, connect, elements) if Le is None else Le
+        consistent_loads(F, dofs, elements, Le, dload)
+        return
+    from .elements import element_type
+
+    q = np.asarray(dload, dtype=float).reshape(len(dload), -1)[elements, 0]
+    fe = element_type(connect.shape[1]).loads(coords[connect[elements], 0], q)
+    np.add.at(F, dofs.ravel(), fe.ravel())
+
+
+def consistent_loads(
+    F: NDArray[float],
+    dofs: NDArray[int],
+    elements: NDArray[int],
+    Le: NDArray[float],
+    dload: NDArray[float],
+) -> None:
+    """Scatter the consistent nodal loads ``q*Le/2`` of uniform distributed loads into ``F``"""
+    q = np.asarray(dload, dtype=float).reshape(len(dload), -1)[elements, 0]
+    qe = q * Le / 2.0
+    np.add.at(F, dofs.ravel(), np.repeat(qe, 2))
+
+
+@overload
+def global_stiffness(
+    rows: NDArray[int],
+    cols: NDArray[int],
+    vals: NDArray[float],
+    ndof: int,
+    engine: Literal["dense"] = "dense",
+) -> NDArray[float]: ...
+
+
+@overload
+def global_stiffness(
+    rows: NDArray[int],
+    cols: NDArray[int],
+    vals: NDArray[float],
+    ndof: int,
+    engine: Literal["sparse"],
+) -> sp.csr_matrix: ...
+
+
+@overload
+def global_stiffness(
+    rows: NDArray[int], cols: NDArray[int], vals: NDArray[float], ndof: int, engine: str = "dense"
+) -> NDArray[float] | sp.csr_matrix: ...
+
+
+def global_stiffness(
+    rows: NDArray[int], cols: NDArray[int], vals: NDArray[float], ndof: int, engine: str = "dense"
+) -> NDArray[float] | sp.csr_matrix:
+    """Sum COO triplets into a dense array or a CSR matrix"""
+    if engine == "sparse":
+        import scipy.sparse as sp
+
+        return sp.coo_matrix((vals, (rows, cols)), shape=(ndof, ndof)).tocsr()
+    K = np.zeros((ndof, ndof), dtype=float)
+    np.add.at(K, (rows, cols), vals)
+    return K
+
+
+def nodal_loads(doftags: NDArray[int], dofvals: NDArray[float]) -> NDArray[float]:
+    """Global load vector of the concentrated loads in ``dofvals`` on non-Dirichlet DOFs"""
+    prescribed = (np.asarray(doftags) == DIRICHLET).ravel()
+    return np.where(prescribed, 0.0, np.asarray(dofvals, dtype=float).ravel())
+
+
+def prescribed_dofs(
+    doftags: NDArray[int], dofvals: NDArray[float]
+) -> tuple[NDArray[bool], NDArray[float]]:
+    """Flat mask of Dirichlet DOFs and the vector of prescribed values (zero on free DOFs)"""
+    prescribed = (np.asarray(doftags) == DIRICHLET).ravel()
+    ubc = np.where(prescribed, np.asarray(dofvals, dtype=float).ravel(), 0.0)
+    return prescribed, ubc
+
+
+def constrain_stiffness(
+    K: NDArray[float] | sp.csr_matrix, prescribed: NDArray[bool]
+) -> NDArray[float] | sp.csr_matrix:
+    """Zero the prescribed rows and columns of ``K`` and put 1 on their diagonal (symmetric)"""
+    if issparse(K):
+        import scipy.sparse as sp
+
+        free = sp.diags((~prescribed).astype(float))
+        return (free @ K @ free + sp.diags(prescribed.astype(float))).tocsr()
+    Kbc = np.array(K, dtype=float)
+    Kbc[prescribed, :] = 0.0
+    Kbc[:, prescribed] = 0.0
+    Kbc[prescribed, prescribed] = 1.0
+    return Kbc
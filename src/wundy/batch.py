@@ -0,0 +1,225 @@
+"""Solve many wundy input files in parallel.
+
+Each input is run through load → preprocess → ``first_fe_code`` → ``postprocess`` in a worker
+process and its displacements, reactions, load vector and element strains, stresses and forces
+are written to ``<output>/<stem>.npz`` as soon as it finishes.  Inputs whose file names share a
+stem (``a/deck.yaml`` and ``b/deck.yaml``) are named by their path instead, ``a-deck`` and
+``b-deck``.  A line per input is appended to ``<output>/summary.jsonl`` as results arrive.  A
+failing input is recorded as an error (including the messages logged while preprocessing it)
+and does not stop the run, not even when it kills its worker process.
+
+Run with ``python -m wundy.batch 'decks/*.yaml' -o results``.
+
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+from typing import Iterator
+
+import numpy as np
+
+from . import ui
+from .first import first_fe_code
+from .post import postprocess
+
+logger = logging.getLogger(__name__)
+
+
+def find_inputs(patterns: list[str] | str) -> list[str]:
+    """Expand directories (to their ``*.yaml``/``*.yml`` files), glob patterns and file names"""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    files: list[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for ext in ("*.yaml", "*.yml"):
+                files.extend(glob.glob(os.path.join(pattern, ext)))
+        elif glob.has_magic(pattern):
+            files.extend(glob.glob(pattern))
+        else:
+            files.append(pattern)
+    return sorted(dict.fromkeys(files))
+
+
+def output_stems(files: list[str]) -> dict[str, str]:
+    """Output name of each input file: its stem, or its path if another file has that stem"""
+    stems = {file: os.path.splitext(os.path.basename(file))[0] for file in files}
+    clashing = [file for file in files if list(stems.values()).count(stems[file]) > 1]
+    if not clashing:
+        return stems
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(file)) for file in clashing])
+    relative = {file: os.path.relpath(os.path.abspath(file), root) for file in clashing}
+    names = {file: os.path.splitext(path)[0] for file, path in relative.items()}
+    for file in clashing:
+        # The extension is kept only where it tells deck.yaml from deck.yml
+        name = names[file] if list(names.values()).count(names[file]) == 1 else relative[file]
+        stems[file] = name.replace(os.sep, "-")
+    return stems
+
+
+class _Messages(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(level=logging.WARNING)
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+def run_file(
+    file: str,
+    output_dir: str,
+    engine: str = "sparse",
+    fast: bool = True,
+    stem: str | None = None,
+) -> dict[str, Any]:
+    """Analyze one input file and write its results.  Never raises; errors are returned.
+
+    The results are written to ``<output_dir>/<stem>.npz``, by default with the stem of
+    ``file``.
+
+    """
+    stem = stem or os.path.splitext(os.path.basename(file))[0]
+    result: dict[str, Any] = {"input": file}
+    handler = _Messages()
+    ui.logger.addHandler(handler)
+    t0 = time.perf_counter()
+    try:
+        with open(file) as fh:
+            data = ui.load(fh, fast=fast)
+        inp = ui.preprocess(data)
+        soln = first_fe_code(
+            inp["coords"],
+            inp["connect"],
+            inp["doftags"],
+            inp["dofvals"],
+            inp["dload"],
+            inp["materials"],
+            inp["element blocks"],
+            engine=engine,
+            dirichlet="condense",
+        )
+        post = postprocess(inp, soln)
+        output = os.path.join(output_dir, f"{stem}.npz")
+        np.savez(
+            output,
+            displ=soln["displ"],
+            reactions=soln["R"],
+            F=soln["F"],
+            strain=post["strain"],
+            stress=post["stress"],
+            force=post["force"],
+        )
+        result.update(status="ok", output=output)
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}", messages=handler.messages)
+        with open(os.path.join(output_dir, f"{stem}.error.txt"), "w") as fh:
+            fh.write("".join(f"{m}\n" for m in handler.messages))
+            fh.write(traceback.format_exc())
+    finally:
+        ui.logger.removeHandler(handler)
+    result["wall"] = time.perf_counter() - t0
+    return result
+
+
+def iter_batch(
+    inputs: list[str] | str,
+    output_dir: str,
+    processes: int | None = None,
+    engine: str = "sparse",
+    fast: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """Run all ``inputs`` over a process pool, yielding each result as it completes.
+
+    ``processes`` defaults to the number of CPUs; with ``processes=1`` inputs are run in order
+    in the calling process.
+
+    """
+    files = find_inputs(inputs)
+    stems = output_stems(files)
+    os.makedirs(output_dir, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(files) <= 1:
+        for file in files:
+            yield run_file(file, output_dir, engine, fast, stems[file])
+        return
+    broken: list[str] = []
+    with ProcessPoolExecutor(max_workers=min(processes, len(files))) as pool:
+        futures = {
+            pool.submit(run_file, file, output_dir, engine, fast, stems[file]): file
+            for file in files
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                broken.append(futures[future])
+            except Exception as e:
+                yield _failed(futures[future], e)
+    # A worker died and took the inputs in flight with it: rerun each of them in a fresh
+    # process of its own, so that only the input that kills its worker is reported
+    for file in sorted(broken):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            try:
+                yield pool.submit(run_file, file, output_dir, engine, fast, stems[file]).result()
+            except Exception as e:
+                yield _failed(file, e)
+
+
+def _failed(file: str, error: Exception) -> dict[str, Any]:
+    """Result of an input whose worker failed outside of ``run_file``"""
+    return {"input": file, "status": "error", "error": f"{type(error).__name__}: {error}"}
+
+
+def run_batch(
+    inputs: list[str] | str,
+    output_dir: str,
+    processes: int | None = None,
+    engine: str = "sparse",
+    fast: bool = True,
+) -> list[dict[str, Any]]:
+    """Run all ``inputs``, streaming one line per result to ``<output_dir>/summary.jsonl``"""
+    results: list[dict[str, Any]] = []
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "summary.jsonl"), "w") as summary:
+        for result in iter_batch(inputs, output_dir, processes, engine, fast):
+            summary.write(json.dumps(result) + "\n")
+            summary.flush()
+            if result["status"] == "error":
+                logger.error(f"{result['input']}: {result['error']}")
+            results.append(result)
+    return results
+
+
+def make_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="wundy-batch", description=__doc__)
+    parser.add_argument("inputs", nargs="+", help="Input files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="wundy-results", help="Output directory")
+    parser.add_argument("-j", "--processes", type=int, help="Worker processes [number of CPUs]")
+    parser.add_argument("--engine", choices=("dense", "sparse"), default="sparse")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = make_parser().parse_args(argv)
+    return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    results = run_batch(args.inputs, args.output, processes=args.processes, engine=args.engine)
+    failed = sum(1 for r in results if r["status"] == "error")
+    print(f"{len(results) - failed} of {len(results)} inputs solved, results in {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
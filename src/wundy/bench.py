@@ -0,0 +1,314 @@
+"""Benchmarks of the wundy pipeline stages on synthetic bars.
+
+``wundy.first.first_fe_code`` is run on bars of increasing size with a ``Recorder``, whose
+stages are grouped into ``load``, ``preprocess``, ``assemble`` (including the node reordering)
+and ``solve`` (including the boundary conditions).  The peak traced memory of each stage is
+recorded in a separate pass, and a power law ``t ~ n**p`` is fitted per stage so that changes
+in scaling show up as changes in ``p``.
+
+``convergence`` compares the element types instead: the error of a bar under a smoothly varying
+distributed load against the number of DOFs of linear, quadratic and cubic elements.
+
+Run with ``python -m wundy.bench --sizes 100 10000 1000000 -o bench.json`` or
+``python -m wundy.bench --convergence``.
+
+"""
+
+import argparse
+import io
+import json
+import platform
+from typing import IO
+from typing import Any
+
+import numpy as np
+
+from . import ui
+from .assembly import assemble
+from .assembly import global_stiffness
+from .elements import ELEMENT_TYPES
+from .elements import lagrange_bar
+from .first import first_fe_code
+from .instrument import Recorder
+from .linalg import solve_sparse
+
+STAGES = ("load", "preprocess", "assemble", "solve")
+
+
+def synthetic_bar(nnode: int, nblock: int = 4) -> str:
+    """YAML input for a bar of ``nnode`` equally spaced nodes split into ``nblock`` blocks.
+
+    The left end is fixed, the right end carries a point load and the first block a distributed
+    load.  Blocks alternate between two materials and are defined through element sets.
+
+    """
+    nelem = nnode - 1
+    nblock = max(1, min(nblock, nelem))
+    coords = ", ".join(repr(x) for x in np.linspace(0.0, 1.0, nnode).tolist())
+    connect = ", ".join(f"[{i}, {i + 1}]" for i in range(nelem))
+    bounds = np.linspace(0, nelem, nblock + 1).astype(int)
+    elsets: list[str] = []
+    blocks: list[str] = []
+    for i in range(nblock):
+        elements = ", ".join(str(e) for e in range(bounds[i], bounds[i + 1]))
+        elsets.append(f"  - name: set-{i + 1}\n    elements: [{elements}]\n")
+        blocks.append(
+            f"  - name: block-{i + 1}\n    material: mat-{i % 2 + 1}\n"
+            f"    elements: set-{i + 1}\n    element_type: t1d1\n"
+            f"    element_properties: {{area: {1.0 + 0.5 * i}}}\n"
+        )
+    return (
+        "wundy:\n"
+        f"  coords: [{coords}]\n"
+        f"  connect: [{connect}]\n"
+        "  nset:\n"
+        "  - name: left\n    nodes: [0]\n"
+        f"  - name: right\n    nodes: [{nnode - 1}]\n"
+        "  elset:\n" + "".join(elsets) + "  boundary:\n"
+        "  - nset: left\n"
+        "  cload:\n"
+        "  - nset: right\n    amplitude: 1.0\n"
+        "  dload:\n"
+        "  - elset: set-1\n    amplitude: 2.0\n"
+        "  material:\n"
+        "  - type: elastic\n    name: mat-1\n    parameters: {E: 10.0, nu: 0.3}\n"
+        "  - type: elastic\n    name: mat-2\n    parameters: {E: 20.0, nu: 0.3}\n"
+        "  element block:\n" + "".join(blocks)
+    )
+
+
+# Stages recorded by ``Recorder`` and the benchmark stage each is counted in
+STAGE_OF = {
+    "parse": "load",
+    "validate": "load",
+    "preprocess": "preprocess",
+    "reorder": "assemble",
+    "assemble": "assemble",
+    "dirichlet": "solve",
+    "solve": "solve",
+}
+
+
+def run_pipeline(text: str, engine: str, fast: bool, memory: bool = False) -> dict[str, Any]:
+    """Run load → preprocess → ``first_fe_code`` on ``text``, recording each stage.
+
+    The stages are those recorded by a ``Recorder``, grouped by ``STAGE_OF``: their wall times
+    are summed, or with ``memory=True`` the largest of their peak traced memories is kept.
+
+    """
+    with Recorder(memory=memory) as recorder:
+        data = ui.load(io.StringIO(text), fast=fast, recorder=recorder)
+        inp = ui.preprocess(data, recorder=recorder)
+        first_fe_code(
+            inp["coords"],
+            inp["connect"],
+            inp["doftags"],
+            inp["dofvals"],
+            inp["dload"],
+            inp["materials"],
+            inp["element blocks"],
+            engine=engine,
+            recorder=recorder,
+        )
+    record: dict[str, dict[str, float]] = {}
+    for r in recorder.records:
+        entry = record.setdefault(STAGE_OF.get(r["stage"], r["stage"]), {})
+        if memory:
+            entry["peak_bytes"] = max(entry.get("peak_bytes", 0), r["peak"])
+        else:
+            entry["wall"] = entry.get("wall", 0.0) + r["wall"]
+    return record
+
+
+def scaling_exponents(results: list[dict[str, Any]]) -> dict[str, float]:
+    """Least-squares fit of ``log(wall) = p log(n) + c`` per stage, returns ``p``"""
+    if len(results) < 2:
+        return {}
+    n = np.log([r["nnode"] for r in results])
+    exponents: dict[str, float] = {}
+    for stage in STAGES:
+        t = np.log([max(r["stages"][stage]["wall"], 1e-9) for r in results])
+        exponents[stage] = float(np.polyfit(n, t, 1)[0])
+    return exponents
+
+
+def benchmark(
+    sizes: list[int],
+    repeat: int = 3,
+    engine: str = "sparse",
+    fast: bool = True,
+    memory: bool = True,
+    nblock: int = 4,
+) -> dict[str, Any]:
+    """Benchmark the pipeline for each bar size.
+
+    Wall times are the best of ``repeat`` runs.  With ``memory=True`` one extra run is made with
+    ``tracemalloc`` enabled to record the peak memory allocated by each stage; it is kept
+    separate so that tracing does not distort the timings.
+
+    """
+    results: list[dict[str, Any]] = []
+    for nnode in sizes:
+        text = synthetic_bar(nnode, nblock=nblock)
+        stages: dict[str, dict[str, float]] = {s: {"wall": np.inf} for s in STAGES}
+        for _ in range(max(repeat, 1)):
+            for stage, entry in run_pipeline(text, engine, fast).items():
+                stages[stage]["wall"] = min(stages[stage]["wall"], entry["wall"])
+        if memory:
+            for stage, entry in run_pipeline(text, engine, fast, memory=True).items():
+                stages[stage].update(entry)
+        results.append({"nnode": nnode, "nelem": nnode - 1, "stages": stages})
+    return {
+        "meta": {
+            "engine": engine,
+            "fast": fast,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+        "exponents": scaling_exponents(results),
+    }
+
+
+def report(bench: dict[str, Any], file: IO[str] | None = None) -> None:
+    """Print a table of wall times (s) and peak memory (MB) per stage"""
+    header = f"{'nnode':>10}" + "".join(f"{s:>22}" for s in STAGES)
+    print(header, file=file)
+    for r in bench["results"]:
+        cells = []
+        for s in STAGES:
+            entry = r["stages"][s]
+            mem = entry.get("peak_bytes")
+            cells.append(f"{entry['wall']:>10.4f}s" + (f"{mem / 1e6:>10.1f}MB" if mem else ""))
+        print(f"{r['nnode']:>10}" + "".join(f"{c:>22}" for c in cells), file=file)
+    if bench["exponents"]:
+        exps = "".join(f"{bench['exponents'][s]:>22.2f}" for s in STAGES)
+        print(f"{'exponent':>10}" + exps, file=file)
+
+
+def convergence(
+    nelems: tuple[int, ...] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+    element_types: tuple[str, ...] = ("t1d1", "t1d2", "t1d3"),
+    target: float = 1e-6,
+) -> dict[str, Any]:
+    """Errors of each element type on a fixed-free unit bar with EA = 1 and load q(x).
+
+    The load ``q = (pi/2)**2 sin(pi x/2)`` has the exact solution ``u = sin(pi x/2)``.  For each
+    element type and number of elements the relative L2 errors of displacement and strain are
+    recorded, and the fewest DOFs reaching a displacement error of ``target``.  (Nodal
+    displacements of 1-D bars are exact for any order, so the errors are measured over the
+    whole bar.)
+
+    """
+    k = np.pi / 2
+    results: dict[str, Any] = {}
+    for name in element_types:
+        etype = ELEMENT_TYPES[name]
+        rows_out: list[dict[str, Any]] = []
+        for nelem in nelems:
+            coords, connect = lagrange_bar(np.linspace(0.0, 1.0, nelem + 1), etype.order)
+            ndof = len(coords)
+            materials = {"mat": {"type": "elastic", "parameters": {"E": 1.0}}}
+            block = {"material": "mat", "element_properties": {"area": 1.0}}
+            blocks = {"bar": {**block, "elements": np.arange(nelem), "element_type": name}}
+            F = np.zeros(ndof)
+            rows, cols, vals = assemble(coords, connect, None, materials, blocks, F)
+            K = global_stiffness(rows, cols, vals, ndof, engine="sparse")
+            X = coords[connect, 0]
+            fe = etype.loads(X, lambda x: k**2 * np.sin(k * x))
+            np.add.at(F, connect.ravel(), fe.ravel())
+            u = np.zeros(ndof)
+            u[1:] = solve_sparse(K[1:, 1:], F[1:])
+
+            # Errors by a Gauss rule exact for the FE fields and accurate for the exact ones
+            xi, w = np.polynomial.legendre.leggauss(etype.order + 6)
+            N, dN = etype.shape(xi), etype.dshape(xi)
+            x, J = X @ N.T, X @ dN.T
+            ue = u[connect]
+            e_u = np.sin(k * x) - ue @ N.T
+            e_s = k * np.cos(k * x) - (ue @ dN.T) / J
+            norm_u = np.sqrt(np.sum(w * J * np.sin(k * x) ** 2))
+            norm_s = np.sqrt(np.sum(w * J * (k * np.cos(k * x)) ** 2))
+            rows_out.append(
+                {
+                    "nelem": nelem,
+                    "ndof": ndof,
+                    "displ_error": float(np.sqrt(np.sum(w * J * e_u**2)) / norm_u),
+                    "strain_error": float(np.sqrt(np.sum(w * J * e_s**2)) / norm_s),
+                }
+            )
+        reached = [r["ndof"] for r in rows_out if r["displ_error"] <= target]
+        results[name] = {"results": rows_out, "ndof_to_target": min(reached, default=None)}
+    return {"target": target, "element_types": results}
+
+
+def report_convergence(conv: dict[str, Any], file: IO[str] | None = None) -> None:
+    """Print displacement and strain errors against DOFs per element type"""
+    header = f"{'type':>6}{'nelem':>8}{'ndof':>8}{'displ error':>14}{'strain error':>14}"
+    print(header, file=file)
+    for name, entry in conv["element_types"].items():
+        for r in entry["results"]:
+            print(
+                f"{name:>6}{r['nelem']:>8}{r['ndof']:>8}"
+                f"{r['displ_error']:>14.3e}{r['strain_error']:>14.3e}",
+                file=file,
+            )
+    for name, entry in conv["element_types"].items():
+        ndof = entry["ndof_to_target"]
+        reached = f"{ndof} DOFs" if ndof else "not reached"
+        print(f"{name}: displacement error {conv['target']:.0e} {reached}", file=file)
+
+
+def make_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="wundy-bench", description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000], help="Nodes per bar"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size [3]")
+    parser.add_argument("--engine", choices=("dense", "sparse"), default="sparse")
+    parser.add_argument("--blocks", type=int, default=4, help="Element blocks per bar [4]")
+    parser.add_argument(
+        "--slow-load", action="store_true", help="Use the default (pure Python) YAML loader"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory pass")
+    parser.add_argument(
+        "--convergence",
+        action="store_true",
+        help="Compare the accuracy per DOF of the element types instead of timing the pipeline",
+    )
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = make_parser().parse_args(argv)
+    return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.convergence:
+        conv = convergence()
+        report_convergence(conv)
+        if args.output:
+            with open(args.output, "w") as fh:
+                json.dump(conv, fh, indent=2)
+        return 0
+    bench = benchmark(
+        args.sizes,
+        repeat=args.repeat,
+        engine=args.engine,
+        fast=not args.slow_load,
+        memory=not args.no_memory,
+        nblock=args.blocks,
+    )
+    report(bench)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(bench, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
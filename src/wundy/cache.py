@@ -0,0 +1,284 @@
+"""Caching of analysis results.
+
+``ResultCache`` is an on-disk cache of the results of ``first_fe_code`` keyed by a hash of the
+validated input (as returned by ``wundy.ui.load``), the analysis options and the wundy version.  Its total size is bounded; least recently used entries are evicted.
+
+``StiffnessMemo`` is an in-memory cache of the stiffness contribution of each element block.
+When only loads change between analyses of the same mesh, assembly reuses the memoized blocks
+and only computes the load vector.
+
+"""
+
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from . import ui
+from .assembly import assemble
+from .assembly import block_element_arrays
+from .assembly import distributed_loads
+from .first import first_fe_code
+from .first import linear_analysis
+from .instrument import Recorder
+from .instrument import null_recorder
+from .linalg import issparse
+
+
+@functools.lru_cache
+def wundy_version() -> str:
+    from importlib.metadata import PackageNotFoundError
+    from importlib.metadata import version
+
+    try:
+        return version("wundy")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def content_hash(obj: Any) -> str:
+    """Hash of nested dicts, lists and arrays that depends only on their content"""
+    h = hashlib.blake2b(digest_size=20)
+    _update(h, obj)
+    return h.hexdigest()
+
+
+def _update(h: Any, obj: Any) -> None:
+    if isinstance(obj, np.ndarray):
+        h.update(f"ndarray:{obj.dtype.str}:{obj.shape}:".encode())
+        h.update(np.ascontiguousarray(obj).data)
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for key in sorted(obj, key=str):
+            _update(h, key)
+            _update(h, obj[key])
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _update(h, item)
+        h.update(b"]")
+    else:
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+
+
+class ResultCache:
+    """On-disk, size bounded LRU cache of analysis results.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Cache directory.  Defaults to ``$WUNDY_CACHE_DIR`` or ``~/.cache/wundy``.
+    max_bytes : int
+        Total size of the cached files above which least recently used entries are evicted.
+
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = 1 << 30) -> None:
+        default = os.path.join(os.path.expanduser("~"), ".cache", "wundy")
+        self.directory = directory or os.getenv("WUNDY_CACHE_DIR", default)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, data: dict[str, Any], **options: Any) -> str:
+        return content_hash({"version": wundy_version(), "input": data, "options": options})
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self.path(key)
+        try:
+            with np.load(path) as f:
+                arrays = {name: f[name] for name in f.files}
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            # Missing, partially written or evicted by another process meanwhile
+            return None
+        soln = {name: arrays[name] for name in ("displ", "F", "R") if name in arrays}
+        soln["K"] = _unpack_matrix(arrays)
+        if "info" in arrays:
+            soln.update(json.loads(str(arrays["info"])))
+        return soln
+
+    def put(self, key: str, soln: dict[str, Any]) -> None:
+        arrays = {name: soln[name] for name in ("displ", "F", "R") if name in soln}
+        arrays.update(_pack_matrix(soln["K"]))
+        # The ordering and solver statistics are small dicts of scalars
+        info = {name: soln[name] for name in ("ordering", "solver") if name in soln}
+        arrays["info"] = np.array(json.dumps(info))
+        # Write to a temporary file first so that readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh, **arrays)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def entries(self) -> list[os.DirEntry]:
+        """Cache files, least recently used first"""
+        files = [e for e in os.scandir(self.directory) if e.name.endswith(".npz")]
+        return sorted(files, key=lambda e: e.stat().st_mtime_ns)
+
+    def evict(self) -> None:
+        entries = self.entries()
+        total = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def clear(self) -> None:
+        for entry in self.entries():
+            os.remove(entry.path)
+
+
+def _pack_matrix(K: Any) -> dict[str, NDArray]:
+    """Store K by its nonzeros: the stiffness of a bar is banded, so this is far smaller"""
+    if issparse(K):
+        coo = K.tocoo()
+        row, col, val = coo.row, coo.col, coo.data
+    else:
+        row, col = np.nonzero(K)
+        val = K[row, col]
+    return {
+        "K_row": row,
+        "K_col": col,
+        "K_val": val,
+        "K_shape": np.array(K.shape),
+        "K_sparse": np.array(issparse(K)),
+    }
+
+
+def _unpack_matrix(arrays: dict[str, NDArray]) -> Any:
+    shape = tuple(int(n) for n in arrays["K_shape"])
+    if arrays["K_sparse"]:
+        import scipy.sparse as sp
+
+        ijv = (arrays["K_val"], (arrays["K_row"], arrays["K_col"]))
+        return sp.coo_matrix(ijv, shape=shape).tocsr()
+    K = np.zeros(shape, dtype=float)
+    K[arrays["K_row"], arrays["K_col"]] = arrays["K_val"]
+    return K
+
+
+class StiffnessMemo:
+    """In-memory LRU memo of the stiffness triplets of element blocks.
+
+    ``assemble`` has the signature and result of ``wundy.assembly.assemble``; blocks whose mesh,
+    elements, area and modulus are unchanged are taken from the memo and only the load vector is
+    computed anew.  The mesh is identified by ``mesh_key(coords, connect)``: pass it as ``mesh``
+    to hash a mesh only once when assembling it repeatedly.
+
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self.blocks: OrderedDict[str, tuple[NDArray, NDArray, NDArray]] = OrderedDict()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def mesh_key(coords: NDArray[float], connect: NDArray[int]) -> str:
+        return content_hash([coords, connect])
+
+    def assemble(
+        self,
+        coords: NDArray[float],
+        connect: NDArray[int],
+        dload: NDArray[float] | None,
+        materials: dict[str, Any],
+        blocks: dict[str, Any],
+        F: NDArray[float],
+        mesh: str | None = None,
+    ) -> tuple[NDArray[int], NDArray[int], NDArray[float]]:
+        mesh = mesh or self.mesh_key(coords, connect)
+        triplets: list[tuple[NDArray, NDArray, NDArray]] = []
+        for name, block in blocks.items():
+            A = float(block["element_properties"]["area"])
+            E = float(materials[block["material"]]["parameters"]["E"])
+            elements = np.asarray(block["elements"], dtype=int)
+            key = content_hash([mesh, elements, A, E])
+            if key in self.blocks:
+                self.hits += 1
+                self.blocks.move_to_end(key)
+                triplets.append(self.blocks[key])
+                continue
+            self.misses += 1
+            single = {name: block}
+            triplets.append(assemble(coords, connect, None, materials, single, F))
+            self.blocks[key] = triplets[-1]
+            if len(self.blocks) > self.maxsize:
+                self.blocks.popitem(last=False)
+
+        if dload is not None and len(dload) > 0:
+            elements, _ = block_element_arrays(materials, blocks)
+            distributed_loads(F, coords, connect, elements, dload)
+
+        if not triplets:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=float)
+        rows, cols, vals = (np.concatenate(x) for x in zip(*triplets))
+        return rows, cols, vals
+
+
+def cached_analysis(
+    data: dict[str, Any],
+    cache: ResultCache | None = None,
+    memo: StiffnessMemo | None = None,
+    engine: str = "dense",
+    dirichlet: str = "symmetric",
+    recorder: Recorder | None = None,
+    solver: str = "direct",
+    solver_options: dict[str, Any] | None = None,
+    reorder: str = "auto",
+) -> dict[str, Any]:
+    """Preprocess and solve validated input ``data``, reusing cached results.
+
+    On a ``cache`` hit preprocessing, assembly and solve are skipped entirely.  On a miss the
+    system is solved by ``wundy.first.first_fe_code`` with the stiffness assembled through
+    ``memo`` (if given) and the result stored.  The options are those of ``first_fe_code``.
+
+    """
+    if engine not in ("dense", "sparse"):
+        raise ValueError(f"Unknown engine {engine!r}")
+    if dirichlet not in ("symmetric", "condense"):
+        raise ValueError(f"Unknown Dirichlet BC method {dirichlet!r}")
+
+    recorder = recorder or null_recorder
+    options: dict[str, Any] = {
+        "engine": engine,
+        "dirichlet": dirichlet,
+        "solver": solver,
+        "solver_options": solver_options,
+        "reorder": reorder,
+    }
+    key = None
+    if cache is not None:
+        key = cache.key(data, **options)
+        with recorder.stage("cache"):
+            soln = cache.get(key)
+        if soln is not None:
+            return soln
+
+    inp = ui.preprocess(data, recorder=recorder)
+    args = (inp["coords"], inp["connect"], inp["doftags"], inp["dofvals"], inp["dload"])
+    materials, blocks = inp["materials"], inp["element blocks"]
+    if memo is None:
+        soln = first_fe_code(*args, materials, blocks, recorder=recorder, **options)
+    else:
+        # Called in the node numbering chosen by ``reorder``, which the memo is keyed by
+        def assemble(
+            coords: NDArray[float], connect: NDArray[int], dload: NDArray[float], F: NDArray[float]
+        ) -> tuple[NDArray[int], NDArray[int], NDArray[float]]:
+            return memo.assemble(coords, connect, dload, materials, blocks, F)
+
+        soln = linear_analysis(*args, assemble, recorder=recorder, **options)
+
+    if cache is not None and key is not None:
+        cache.put(key, soln)
+    return soln
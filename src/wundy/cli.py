@@ -0,0 +1,138 @@
+"""The ``wundy`` command.
+
+Subcommands live in their own modules, each providing ``make_parser(parser)`` and ``run(args)``.
+Only the module of the requested subcommand is imported, and the analysis modules are imported
+by it on demand, so starting the command is cheap.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+from typing import TYPE_CHECKING
+from typing import Any
+
+if TYPE_CHECKING:
+    from .instrument import Recorder
+
+COMMANDS: dict[str, tuple[str, str]] = {
+    "run": ("wundy.cli", "Solve one input file"),
+    "batch": ("wundy.batch", "Solve many input files in parallel"),
+    "bench": ("wundy.bench", "Benchmark the pipeline stages on synthetic bars"),
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="wundy", description="One dimensional finite elements")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (module, help) in COMMANDS.items():
+        p = subparsers.add_parser(name, help=help, description=help)
+        if argv and argv[0] == name:
+            importlib.import_module(module).make_parser(p)
+    args = parser.parse_args(argv)
+    return importlib.import_module(COMMANDS[args.command][0]).run(args)
+
+
+def make_parser(parser: argparse.ArgumentParser | None = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="wundy run")
+    parser.add_argument("input", help="YAML input file")
+    parser.add_argument(
+        "-o", "--output", help="Output .npz file or --columns directory [<input stem>[.npz]]"
+    )
+    parser.add_argument(
+        "--columns",
+        action="store_true",
+        help="Write one memory-mappable .npy file per field and a summary to a directory",
+    )
+    parser.add_argument(
+        "--store-K", action="store_true", help="Also write the stiffness (with --columns)"
+    )
+    parser.add_argument("--engine", choices=("dense", "sparse"), default="dense")
+    parser.add_argument(
+        "--condense", action="store_true", help="Solve by static condensation of Dirichlet DOFs"
+    )
+    parser.add_argument(
+        "--solver", choices=("direct", "cg"), default="direct", help="Linear solver [direct]"
+    )
+    parser.add_argument(
+        "--rtol", type=float, default=1e-10, help="Relative residual tolerance of cg [1e-10]"
+    )
+    parser.add_argument("--maxiter", type=int, help="Iteration limit of cg [10 ndof]")
+    parser.add_argument(
+        "--preconditioner", choices=("jacobi", "ilu", "none"), default="jacobi", help="[jacobi]"
+    )
+    parser.add_argument(
+        "--reorder",
+        choices=("auto", "rcm", "none"),
+        default="auto",
+        help="Node renumbering before assembly (auto: RCM for sparse systems it helps) [auto]",
+    )
+    parser.add_argument("--fast", action="store_true", help="Use the fast YAML loading path")
+    parser.add_argument(
+        "--timings", action="store_true", help="Print wall/CPU time of each analysis stage"
+    )
+    return parser
+
+
+def run(args: argparse.Namespace) -> int:
+    import numpy as np
+    from schema import SchemaError
+
+    from . import ui
+    from .first import first_fe_code
+    from .instrument import Recorder
+    from .post import postprocess
+
+    recorder = Recorder() if args.timings else None
+    try:
+        with open(args.input) as fh:
+            data = ui.load(fh, fast=args.fast, recorder=recorder)
+        inp = ui.preprocess(data, recorder=recorder)
+        soln = first_fe_code(
+            inp["coords"],
+            inp["connect"],
+            inp["doftags"],
+            inp["dofvals"],
+            inp["dload"],
+            inp["materials"],
+            inp["element blocks"],
+            engine=args.engine,
+            dirichlet="condense" if args.condense else "symmetric",
+            recorder=recorder,
+            solver=args.solver,
+            solver_options={
+                "rtol": args.rtol,
+                "maxiter": args.maxiter,
+                "preconditioner": None if args.preconditioner == "none" else args.preconditioner,
+            },
+            reorder=args.reorder,
+        )
+        post = postprocess(inp, soln, recorder=recorder)
+    except (OSError, ValueError, SchemaError) as e:
+        print(f"wundy: error: {e}", file=sys.stderr)
+        return 1
+    stem = os.path.splitext(os.path.basename(args.input))[0]
+    if args.columns:
+        from .output import write_results
+
+        meta = {"input": args.input, "engine": args.engine, "condense": args.condense}
+        write_results(args.output or stem, soln, post, store_K=args.store_K, meta=meta)
+        return _finish(recorder)
+    output = args.output or stem + ".npz"
+    arrays: dict[str, Any] = {"displ": soln["displ"], "F": soln["F"], "reactions": post["R"]}
+    arrays.update((name, post[name]) for name in ("strain", "stress", "force"))
+    np.savez(output, **arrays)
+    return _finish(recorder)
+
+
+def _finish(recorder: Recorder | None) -> int:
+    if recorder is not None:
+        import logging
+
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        recorder.log()
+    return 0
@@ -0,0 +1,174 @@
+"""Array-backed form of a preprocessed model.
+
+``wundy.ui.preprocess`` returns nested dictionaries keyed by name, with the elements of each
+block and set as lists.  ``CompactModel`` holds the same model in contiguous arrays: the block
+of every element, the area and modulus of every element and node/element sets as index arrays or
+ranges, so that the assembly reads the stiffness factors of all elements without looking up
+blocks and materials::
+
+    model = wundy.ui.preprocess(data, compact=True)
+    soln = wundy.first.analyze(model)
+
+``CompactModel.from_dict`` and ``CompactModel.to_dict`` convert from and to the dictionary form;
+``preprocess`` builds the model with ``CompactModel.from_arrays`` instead.
+
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+IndexSet = NDArray[int] | range
+
+
+def index_set(members: Any) -> IndexSet:
+    """``members`` as a ``range`` when they are consecutive, otherwise as an int array"""
+    if isinstance(members, range):
+        return members
+    members = np.asarray(members, dtype=int).ravel()
+    if len(members) > 1 and np.all(np.diff(members) == 1):
+        return range(int(members[0]), int(members[-1]) + 1)
+    return members
+
+
+@dataclass(slots=True)
+class CompactModel:
+    """A preprocessed model in contiguous arrays.
+
+    Attributes
+    ----------
+    coords, connect, doftags, dofvals, dload : arrays
+        As in the dictionary form, see ``wundy.ui.preprocess``.
+    materials : dict
+        Materials by name, as in the dictionary form.
+    block_names, block_materials, block_types : tuple of str
+        Name, material name and element type of every element block, in input order.
+    block_properties : tuple of dict
+        Element properties of every element block.
+    element_block : (nelem,) int32 array
+        Index of the block of every element.
+    area, modulus : (nelem,) float arrays
+        Cross-section area and Young's modulus of every element.
+    nodesets, elsets : dict
+        Node and element sets by name, as ranges or int arrays.
+
+    """
+
+    coords: NDArray[float]
+    connect: NDArray[int]
+    doftags: NDArray[int]
+    dofvals: NDArray[float]
+    dload: NDArray[float]
+    materials: dict[str, Any]
+    block_names: tuple[str, ...]
+    block_materials: tuple[str, ...]
+    block_types: tuple[str, ...]
+    block_properties: tuple[dict[str, Any], ...]
+    element_block: NDArray[np.int32]
+    area: NDArray[float]
+    modulus: NDArray[float]
+    nodesets: dict[str, IndexSet]
+    elsets: dict[str, IndexSet]
+
+    @property
+    def ea(self) -> NDArray[float]:
+        """Axial rigidity E*A of every element"""
+        return self.modulus * self.area
+
+    @property
+    def ndof(self) -> int:
+        """Number of DOFs"""
+        return self.coords.shape[0] * self.coords.shape[1]
+
+    @classmethod
+    def from_dict(cls, inp: dict[str, Any]) -> CompactModel:
+        """Convert the dictionary form ``inp`` returned by ``wundy.ui.preprocess``.
+
+        Every element must belong to exactly one element block.
+
+        """
+        nelem = len(inp["connect"])
+        blocks = inp["element blocks"]
+        members = [np.asarray(block["elements"], dtype=int).ravel() for block in blocks.values()]
+        elements = np.concatenate(members) if members else np.zeros(0, dtype=int)
+        count = np.bincount(elements, minlength=nelem)
+        if len(twice := np.flatnonzero(count > 1)):
+            s = ", ".join(str(_) for _ in twice)
+            raise ValueError(f"elements {s} are assigned to more than one element block")
+        element_block = np.full(nelem, -1, dtype=np.int32)
+        sizes = [len(m) for m in members]
+        element_block[elements] = np.repeat(np.arange(len(blocks), dtype=np.int32), sizes)
+        if len(unassigned := np.flatnonzero(element_block < 0)):
+            s = ", ".join(str(_) for _ in unassigned)
+            raise ValueError(f"elements {s} are not assigned to an element block")
+        return cls.from_arrays(inp, element_block)
+
+    @classmethod
+    def from_arrays(cls, inp: dict[str, Any], element_block: NDArray[np.int32]) -> CompactModel:
+        """Build from the dictionary form ``inp`` and the block index of every element.
+
+        The ``elements`` of the blocks of ``inp`` are not read; ``element_block`` must assign
+        every element.  ``wundy.ui.preprocess`` uses this to skip the element lists.
+
+        """
+        materials, blocks = inp["materials"], inp["element blocks"]
+        area = np.array([float(b["element_properties"]["area"]) for b in blocks.values()])
+        modulus = np.array(
+            [float(materials[b["material"]]["parameters"]["E"]) for b in blocks.values()]
+        )
+        return cls(
+            coords=inp["coords"],
+            connect=inp["connect"],
+            doftags=inp["doftags"],
+            dofvals=inp["dofvals"],
+            dload=inp["dload"],
+            materials=materials,
+            block_names=tuple(blocks),
+            block_materials=tuple(block["material"] for block in blocks.values()),
+            block_types=tuple(block["element_type"] for block in blocks.values()),
+            block_properties=tuple(block["element_properties"] for block in blocks.values()),
+            element_block=element_block,
+            area=area[element_block],
+            modulus=modulus[element_block],
+            nodesets={name: index_set(s) for name, s in inp["nodesets"].items()},
+            elsets={name: index_set(s) for name, s in inp["element sets"].items()},
+        )
+
+    def block_elements(self) -> list[IndexSet]:
+        """Elements of every block, in ascending order"""
+        order = np.argsort(self.element_block, kind="stable")
+        bounds = np.searchsorted(self.element_block[order], np.arange(len(self.block_names) + 1))
+        return [index_set(order[i:j]) for i, j in zip(bounds[:-1], bounds[1:])]
+
+    def to_dict(self) -> dict[str, Any]:
+        """The dictionary form of ``wundy.ui.preprocess``, with elements as ranges or arrays"""
+        blocks = zip(
+            self.block_names,
+            self.block_materials,
+            self.block_types,
+            self.block_properties,
+            self.block_elements(),
+        )
+        return {
+            "coords": self.coords,
+            "connect": self.connect,
+            "nodesets": dict(self.nodesets),
+            "element sets": dict(self.elsets),
+            "materials": self.materials,
+            "element blocks": {
+                name: {
+                    "element_properties": properties,
+                    "material": material,
+                    "element_type": etype,
+                    "elements": elements,
+                }
+                for name, material, etype, properties, elements in blocks
+            },
+            "doftags": self.doftags,
+            "dofvals": self.dofvals,
+            "dload": self.dload,
+        }
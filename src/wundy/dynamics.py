@@ -0,0 +1,303 @@
+"""Transient dynamics of bars of t1d1 elements.
+
+Two time integrators solve ``M a + f(u) = amplitude(t) F`` from initial displacements and
+velocities, with the loads ``F`` and prescribed displacements of a preprocessed input scaled by
+``amplitude(t)``::
+
+    inp = wundy.ui.preprocess(wundy.ui.load(file))
+    result = explicit(inp, duration=1e-3, output_every=100)
+    result["time"], result["displ"], result["stress"]
+
+``explicit`` is the central difference method with the lumped (diagonal) mass matrix: a step
+evaluates the materials and the internal forces of all elements and updates accelerations,
+velocities and displacements in a few array operations, without a solve.  It is conditionally
+stable and every material model of ``wundy.materials`` can be used.  ``newmark`` is the implicit
+Newmark method for linear elastic materials; its effective stiffness ``M + beta dt^2 K`` is
+factored once, so a step costs a matrix-vector product and a pair of triangular solves.
+
+Both need the ``density`` parameter of every material.  Only every ``output_every``-th step is
+kept, and with a ``wundy.output.ResultWriter`` the kept steps are appended to disk as they are
+computed instead of being held in memory.
+
+"""
+
+import logging
+from typing import Any
+from typing import Callable
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .assembly import assemble
+from .assembly import block_material_models
+from .assembly import distributed_loads
+from .assembly import element_densities
+from .assembly import element_lengths
+from .assembly import global_stiffness
+from .assembly import nodal_loads
+from .assembly import prescribed_dofs
+from .instrument import Recorder
+from .instrument import null_recorder
+from .linalg import factorize
+from .materials import State
+from .output import ResultWriter
+
+logger = logging.getLogger(__name__)
+
+
+def lumped_mass(inp: dict[str, Any]) -> NDArray[float]:
+    """Diagonal of the lumped mass matrix: half of the mass of each element at each of its ends"""
+    coords, connect = inp["coords"], inp["connect"]
+    if connect.shape[1] != 2:
+        raise ValueError("Dynamic analysis supports t1d1 (2-node) elements only")
+    elements, A, _ = block_material_models(inp["materials"], inp["element blocks"])
+    Le = element_lengths(coords, connect, elements)
+    half = element_densities(inp["materials"], inp["element blocks"]) * A * np.abs(Le) / 2
+    dofs = connect[elements] * coords.shape[1]
+    return np.bincount(dofs.ravel(), weights=np.repeat(half, 2), minlength=coords.size)
+
+
+def critical_time_step(inp: dict[str, Any]) -> float:
+    """Stability limit ``min(L / c)``, ``c = sqrt(E / density)``, of the central difference method.
+
+    The modulus is the parameter ``E``; for materials that stiffen under load the limit is lower.
+
+    """
+    coords, connect = inp["coords"], inp["connect"]
+    elements, _, groups = block_material_models(inp["materials"], inp["element blocks"])
+    E = np.empty(len(elements))
+    for model, idx in groups:
+        E[idx] = model.parameters["E"]
+    Le = element_lengths(coords, connect, elements)
+    c = np.sqrt(E / element_densities(inp["materials"], inp["element blocks"]))
+    return float(np.min(np.abs(Le) / c, initial=np.inf))
+
+
+class _History:
+    """Rows of the kept time steps, held in memory or appended to a ``ResultWriter``"""
+
+    def __init__(self, writer: ResultWriter | None) -> None:
+        self.writer = writer
+        self.rows: dict[str, list[NDArray]] = {}
+        self.count = 0
+
+    def add(self, **fields: Any) -> None:
+        for name, value in fields.items():
+            row = np.array(value, dtype=float)[np.newaxis]
+            if self.writer is not None:
+                self.writer.append(name, row)
+            else:
+                self.rows.setdefault(name, []).append(row)
+        self.count += 1
+
+    def result(self) -> dict[str, NDArray[float]]:
+        return {name: np.concatenate(rows) for name, rows in self.rows.items()}
+
+
+class _Bar:
+    """Element arrays, loads and internal forces of a preprocessed input"""
+
+    def __init__(self, inp: dict[str, Any]) -> None:
+        coords, connect = inp["coords"], inp["connect"]
+        if connect.shape[1] != 2:
+            raise ValueError("Dynamic analysis supports t1d1 (2-node) elements only")
+        self.nelem, self.ndof = len(connect), coords.size
+        self.elements, self.A, self.groups = block_material_models(
+            inp["materials"], inp["element blocks"]
+        )
+        self.Le = element_lengths(coords, connect, self.elements)
+        dofs = connect[self.elements] * coords.shape[1]
+        self.first, self.second = dofs[:, 0].copy(), dofs[:, 1].copy()
+        self.F = nodal_loads(inp["doftags"], inp["dofvals"])
+        if len(inp["dload"]) > 0:
+            distributed_loads(self.F, coords, connect, self.elements, inp["dload"], Le=self.Le)
+        self.prescribed, self.ubc = prescribed_dofs(inp["doftags"], inp["dofvals"])
+        self.free = np.flatnonzero(~self.prescribed)
+        self.mass = lumped_mass(inp)
+
+    def initial_state(self) -> list[State]:
+        return [model.initial_state(len(idx)) for model, idx in self.groups]
+
+    def internal_forces(
+        self, u: NDArray[float], states: list[State]
+    ) -> tuple[NDArray[float], NDArray[float], list[State]]:
+        """Internal forces, stresses of the elements in block order and updated states at ``u``"""
+        strain = (u[self.second] - u[self.first]) / self.Le
+        stress = np.empty_like(strain)
+        updated = []
+        for (model, idx), state in zip(self.groups, states):
+            stress[idx], _, new = model.update(strain[idx], state)
+            updated.append(new)
+        N = self.A * stress
+        f = np.bincount(self.second, weights=N, minlength=self.ndof)
+        f -= np.bincount(self.first, weights=N, minlength=self.ndof)
+        return f, stress, updated
+
+    def element_stress(self, stress: NDArray[float]) -> NDArray[float]:
+        """Stresses in block order scattered to (nelem,), NaN for elements in no block"""
+        out = np.full(self.nelem, np.nan)
+        out[self.elements] = stress
+        return out
+
+    def initial(
+        self, u0: NDArray[float] | None, v0: NDArray[float] | None, amp: float
+    ) -> tuple[NDArray[float], NDArray[float]]:
+        u = np.zeros(self.ndof) if u0 is None else np.array(u0, dtype=float).ravel()
+        v = np.zeros(self.ndof) if v0 is None else np.array(v0, dtype=float).ravel()
+        u[self.prescribed] = amp * self.ubc[self.prescribed]
+        return u, v
+
+
+def _steps(duration: float, dt: float) -> tuple[int, float]:
+    """Number of steps covering ``duration`` and the step size, at most ``dt``, ending on it"""
+    if duration <= 0.0 or dt <= 0.0:
+        raise ValueError("duration and dt must be > 0")
+    nsteps = max(1, int(np.ceil(duration / dt * (1 - 1e-12))))
+    return nsteps, duration / nsteps
+
+
+def _constant(t: float) -> float:
+    return 1.0
+
+
+def explicit(
+    inp: dict[str, Any],
+    duration: float,
+    dt: float | None = None,
+    amplitude: Callable[[float], float] | None = None,
+    u0: NDArray[float] | None = None,
+    v0: NDArray[float] | None = None,
+    output_every: int = 1,
+    writer: ResultWriter | None = None,
+    recorder: Recorder | None = None,
+) -> dict[str, Any]:
+    """Integrate ``inp`` over ``duration`` by the central difference method with lumped mass.
+
+    Parameters
+    ----------
+    inp : dict
+        Output of ``wundy.ui.preprocess``; every material needs a ``density``.
+    duration : float
+        End time.
+    dt : float, optional
+        Time step, reduced to end on ``duration``.  Defaults to 0.9 times
+        ``critical_time_step(inp)``; larger steps are unstable and logged as a warning.
+    amplitude : callable, optional
+        Scale of the loads and prescribed displacements at time t, by default 1.
+    u0, v0 : (ndof,) float arrays, optional
+        Initial displacements and velocities, by default zero.
+    output_every : int
+        Keep every ``output_every``-th step; the first and the last step are always kept.
+    writer : ResultWriter, optional
+        Append the kept steps to ``writer`` instead of returning them.
+    recorder : Recorder, optional
+        Records the ``setup`` and ``integrate`` stages.
+
+    Returns
+    -------
+    dict with the step size ``dt``, the number of ``steps`` and of kept ``outputs`` and, unless
+    ``writer`` is given, the kept ``time`` (nout,), ``displ`` and ``velocity`` (nout, ndof) and
+    element ``stress`` (nout, nelem)
+
+    """
+    recorder = recorder or null_recorder
+    amplitude = amplitude or _constant
+    with recorder.stage("setup"):
+        bar = _Bar(inp)
+        critical = critical_time_step(inp)
+        if dt is None:
+            dt = 0.9 * critical
+        elif dt > critical:
+            logger.warning(f"Time step {dt:g} exceeds the stability limit {critical:g}")
+        nsteps, dt = _steps(duration, dt)
+        minv = np.divide(1.0, bar.mass, out=np.zeros(bar.ndof), where=bar.mass > 0)
+        minv[bar.prescribed] = 0.0
+
+    prescribed, ubc, F = bar.prescribed, bar.ubc[bar.prescribed], bar.F
+    history = _History(writer)
+    with recorder.stage("integrate", steps=nsteps, dt=dt):
+        u, v = bar.initial(u0, v0, amplitude(0.0))
+        states = bar.initial_state()
+        f, stress, states = bar.internal_forces(u, states)
+        a = (amplitude(0.0) * F - f) * minv
+        history.add(time=0.0, displ=u, velocity=v, stress=bar.element_stress(stress))
+        for n in range(1, nsteps + 1):
+            t = n * dt
+            v += 0.5 * dt * a
+            previous = u[prescribed]
+            u += dt * v
+            u[prescribed] = amplitude(t) * ubc
+            v[prescribed] = (u[prescribed] - previous) / dt
+            f, stress, states = bar.internal_forces(u, states)
+            a = (amplitude(t) * F - f) * minv
+            v += 0.5 * dt * a
+            if n % output_every == 0 or n == nsteps:
+                history.add(time=t, displ=u, velocity=v, stress=bar.element_stress(stress))
+    return {"dt": dt, "steps": nsteps, "outputs": history.count, **history.result()}
+
+
+def newmark(
+    inp: dict[str, Any],
+    duration: float,
+    dt: float,
+    amplitude: Callable[[float], float] | None = None,
+    u0: NDArray[float] | None = None,
+    v0: NDArray[float] | None = None,
+    beta: float = 0.25,
+    gamma: float = 0.5,
+    output_every: int = 1,
+    writer: ResultWriter | None = None,
+    recorder: Recorder | None = None,
+) -> dict[str, Any]:
+    """Integrate ``inp`` over ``duration`` by the Newmark method with lumped mass.
+
+    The default ``beta = 1/4``, ``gamma = 1/2`` (average acceleration) is unconditionally
+    stable and conserves the energy of free vibration.  All materials must be ``elastic``.
+    Parameters and result are those of ``explicit``, except that ``dt`` is required.
+
+    """
+    import scipy.sparse as sp
+
+    recorder = recorder or null_recorder
+    amplitude = amplitude or _constant
+    with recorder.stage("setup"):
+        bar = _Bar(inp)
+        if any(model.type != "elastic" for model, _ in bar.groups):
+            raise ValueError("Newmark integration supports elastic materials only")
+        nsteps, dt = _steps(duration, dt)
+        coords, connect = inp["coords"], inp["connect"]
+        F = np.zeros(bar.ndof)
+        rows, cols, vals = assemble(
+            coords, connect, None, inp["materials"], inp["element blocks"], F
+        )
+        K = global_stiffness(rows, cols, vals, bar.ndof, engine="sparse")
+        free = bar.free
+        effective = (sp.diags(bar.mass) + beta * dt**2 * K).tocsr()[free][:, free]
+        solve = factorize(effective)
+
+    prescribed, ubc, F = bar.prescribed, bar.ubc[bar.prescribed], bar.F
+    history = _History(writer)
+    with recorder.stage("integrate", steps=nsteps, dt=dt):
+        u, v = bar.initial(u0, v0, amplitude(0.0))
+        states = bar.initial_state()
+        f, stress, _ = bar.internal_forces(u, states)
+        a = np.zeros(bar.ndof)
+        a[free] = (amplitude(0.0) * F - f)[free] / bar.mass[free]
+        history.add(time=0.0, displ=u, velocity=v, stress=bar.element_stress(stress))
+        for n in range(1, nsteps + 1):
+            t = n * dt
+            previous = u[prescribed]
+            # Predictors; the free accelerations then solve (M + beta dt^2 K) a = F - K u*
+            u += dt * v + (0.5 - beta) * dt**2 * a
+            v += (1.0 - gamma) * dt * a
+            u[prescribed] = amplitude(t) * ubc
+            f, _, _ = bar.internal_forces(u, states)
+            a[free] = solve((amplitude(t) * F - f)[free])
+            # a is zero at the prescribed DOFs
+            u += beta * dt**2 * a
+            v += gamma * dt * a
+            v[prescribed] = (u[prescribed] - previous) / dt
+            if n % output_every == 0 or n == nsteps:
+                _, stress, _ = bar.internal_forces(u, states)
+                history.add(time=t, displ=u, velocity=v, stress=bar.element_stress(stress))
+    return {"dt": dt, "steps": nsteps, "outputs": history.count, **history.result()}
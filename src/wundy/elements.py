@@ -0,0 +1,130 @@
+"""Lagrange bar elements of order 1 to 3 (element types ``t1d1``, ``t1d2`` and ``t1d3``).
+
+An element of order ``p`` has ``p + 1`` nodes.  Connectivity lists the two end nodes first and
+then the interior nodes from the first end to the second, so that ``connect[:, :2]`` are the end
+nodes of any element type.  On the parent interval [-1, 1] the nodes are at -1, 1 and the
+equally spaced interior points.  The element matrices are integrated with ``p + 1`` point Gauss
+quadrature, isoparametrically, for all elements of a type in single array operations.
+
+"""
+
+from typing import Callable
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .schemas import ELEMENT_NODES
+
+
+class ElementType:
+    """Shape functions and quadrature of a Lagrange bar element of ``order`` p.
+
+    Parameters
+    ----------
+    name : str
+        Element type name, ``t1d<p>``.
+    order : int
+        Polynomial order p.
+
+    """
+
+    def __init__(self, name: str, order: int) -> None:
+        self.name = name
+        self.order = order
+        self.nodes = order + 1
+        # Parent coordinates of the nodes: ends first, then the interior nodes
+        self.xi = np.concatenate([[-1.0, 1.0], np.linspace(-1.0, 1.0, order + 1)[1:-1]])
+        self.points, self.weights = np.polynomial.legendre.leggauss(order + 1)
+
+    def __repr__(self) -> str:
+        return f"ElementType({self.name!r}, {self.order})"
+
+    def shape(self, xi: NDArray[float]) -> NDArray[float]:
+        """Shape functions N (len(xi), nodes) at parent coordinates ``xi``"""
+        xi = np.atleast_1d(xi)[:, np.newaxis]
+        N = np.ones((len(xi), self.nodes))
+        for a in range(self.nodes):
+            for b in range(self.nodes):
+                if b != a:
+                    N[:, a] *= (xi[:, 0] - self.xi[b]) / (self.xi[a] - self.xi[b])
+        return N
+
+    def dshape(self, xi: NDArray[float]) -> NDArray[float]:
+        """Shape function derivatives dN/dxi (len(xi), nodes) at parent coordinates ``xi``"""
+        xi = np.atleast_1d(xi)
+        dN = np.zeros((len(xi), self.nodes))
+        for a in range(self.nodes):
+            others = [b for b in range(self.nodes) if b != a]
+            denom = np.prod([self.xi[a] - self.xi[b] for b in others])
+            for c in others:
+                term = np.ones(len(xi))
+                for b in others:
+                    if b != c:
+                        term *= xi - self.xi[b]
+                dN[:, a] += term
+            dN[:, a] /= denom
+        return dN
+
+    def jacobian(self, X: NDArray[float], xi: NDArray[float]) -> NDArray[float]:
+        """dx/dxi (nelem, len(xi)) of elements with nodal coordinates ``X`` (nelem, nodes)"""
+        return X @ self.dshape(xi).T
+
+    def stiffness(self, X: NDArray[float], ea: NDArray[float]) -> NDArray[float]:
+        """Element stiffness matrices (nelem, nodes, nodes) for axial rigidities ``ea``"""
+        dN = self.dshape(self.points)
+        J = self.jacobian(X, self.points)
+        # K_ab = sum_q w_q EA dN_a dN_b / J_q
+        c = ea[:, np.newaxis] * self.weights / J
+        return np.einsum("eq,qa,qb->eab", c, dN, dN)
+
+    def mass(self, X: NDArray[float], rho_a: NDArray[float]) -> NDArray[float]:
+        """Consistent element mass matrices (nelem, nodes, nodes) for masses per length ``rho_a``"""
+        N = self.shape(self.points)
+        J = self.jacobian(X, self.points)
+        # M_ab = sum_q w_q rho A N_a N_b |J_q|
+        c = rho_a[:, np.newaxis] * self.weights * np.abs(J)
+        return np.einsum("eq,qa,qb->eab", c, N, N)
+
+    def loads(
+        self, X: NDArray[float], q: NDArray[float] | Callable[[NDArray], NDArray]
+    ) -> NDArray[float]:
+        """Consistent nodal loads (nelem, nodes) of distributed loads ``q``.
+
+        ``q`` is either a (nelem,) array of uniform loads per element or a function of the
+        coordinate x, evaluated on (nelem, npoints) arrays of quadrature point coordinates.
+
+        """
+        N = self.shape(self.points)
+        J = self.jacobian(X, self.points)
+        if callable(q):
+            qp = q(X @ N.T)
+        else:
+            qp = np.asarray(q, dtype=float)[:, np.newaxis]
+        return (qp * J * self.weights) @ N
+
+
+ELEMENT_TYPES = {name: ElementType(name, n - 1) for name, n in ELEMENT_NODES.items()}
+
+
+def element_type(nodes: int) -> ElementType:
+    """The element type with ``nodes`` nodes per element"""
+    for etype in ELEMENT_TYPES.values():
+        if etype.nodes == nodes:
+            return etype
+    raise ValueError(f"No element type with {nodes} nodes per element")
+
+
+def lagrange_bar(x: NDArray[float], order: int) -> tuple[NDArray[float], NDArray[int]]:
+    """Coordinates (nnode, 1) and connectivity of a bar of order ``order`` elements.
+
+    ``x`` are the element end coordinates.  Interior nodes are equally spaced and nodes are
+    numbered along the bar.
+
+    """
+    x = np.asarray(x, dtype=float)
+    nelem = len(x) - 1
+    t = np.linspace(0.0, 1.0, order + 1)[:-1]
+    coords = np.append((x[:-1, np.newaxis] + np.diff(x)[:, np.newaxis] * t).ravel(), x[-1])
+    first = np.arange(nelem) * order
+    connect = np.column_stack([first, first + order] + [first + k for k in range(1, order)])
+    return coords.reshape(-1, 1), connect
@@ -1,9 +1,41 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import Callable
 
 import numpy as np
 from numpy.typing import NDArray
 
-from .schemas import DIRICHLET
+from .assembly import assemble_elements
+from .assembly import block_element_arrays
+from .assembly import constrain_stiffness
+from .assembly import global_stiffness
+from .assembly import nodal_loads
+from .assembly import prescribed_dofs
+from .instrument import Recorder
+from .instrument import null_recorder
+from .linalg import issparse
+from .linalg import solve_cg
+from .linalg import solve_sparse
+from .ordering import REORDER_METHODS
+from .ordering import dof_permutation
+from .ordering import node_ordering
+from .schemas import ELEMENT_NODES
+
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+    from .compact import CompactModel
+
+logger = logging.getLogger(__name__)
+
+# assemble(coords, connect, dload, F) -> (rows, cols, vals), see ``linear_analysis``
+Assembler = Callable[
+    [NDArray[float], NDArray[int], NDArray[float], NDArray[float]],
+    tuple[NDArray[int], NDArray[int], NDArray[float]],
+]
 
 
 def first_fe_code(
@@ -14,89 +46,297 @@ def first_fe_code(
     dload: NDArray[float],
     materials: dict[str, Any],
     blocks: dict[str, Any],
+    engine: str = "dense",
+    dirichlet: str = "symmetric",
+    recorder: Recorder | None = None,
+    solver: str = "direct",
+    solver_options: dict[str, Any] | None = None,
+    reorder: str = "auto",
 ) -> dict[str, Any]:
     """
-    Perform a single 1-D linear finite element analysis (axial bar, small strain).
+    Perform a single linear finite element analysis of a bar or truss (axial, small strain).
 
     Parameters
     ----------
-    coords : (nnode, 1) float array
-        Nodal x-coordinates.
-    connect : (nelem, 2) int array
-        Element connectivity (2-node bars).
-    doftags : (nnode, 1) int array
+    coords : (nnode, ndim) float array
+        Nodal coordinates.  With 2 or 3 components the mesh is a truss: every node has a
+        displacement DOF per component and the elements are rotated bars.
+    connect : (nelem, nodes) int array
+        Element connectivity: end nodes first, then interior nodes (see ``wundy.elements``).
+        2, 3 and 4 nodes per element are the t1d1, t1d2 and t1d3 bar elements; trusses are made
+        of t1d1 elements.
+    doftags : (nnode, ndim) int array
         DOF tags; DIRICHLET denotes prescribed displacement.
-    dofvals : (nnode, 1) float array
+    dofvals : (nnode, ndim) float array
         For DIRICHLET dofs: prescribed displacement value.
         For free dofs: may contain concentrated nodal force (cload) to add to F.
-    dload : (nelem,) float array
-        Uniform distributed load per element (force/length). May be zeros.
+    dload : (nelem, ndim) float array
+        Uniform distributed load components per element (force/length). May be zeros.
     materials : dict
         Materials with parameters (uses E for linear elastic).
     blocks : dict
         Element blocks with {"material": name, "element_properties": {"area": A}, "elements": [...]}
+    engine : {"dense", "sparse"}
+        Storage of the global stiffness.  "dense" assembles a full (ndof, ndof) array and solves
+        with ``np.linalg.solve``.  "sparse" assembles COO triplets into a CSR matrix and solves
+        with a banded (Thomas) solver when the bandwidth is 1, a sparse LU otherwise.
+    dirichlet : {"symmetric", "condense"}
+        How prescribed displacements are applied.  "symmetric" zeros the prescribed rows and
+        columns of K and solves the full system.  "condense" partitions the DOFs into free and
+        prescribed sets, solves only the reduced free system and also returns the reactions.
+    recorder : Recorder, optional
+        Records the ``assemble`` (with matrix size and nnz), ``dirichlet`` and ``solve`` stages.
+    solver : {"direct", "cg"}
+        "direct" factors the system as described for ``engine``.  "cg" solves it by
+        preconditioned conjugate gradients, which avoids the fill-in of a factorization.
+    solver_options : dict, optional
+        Options of ``wundy.linalg.solve_cg`` for solver="cg": ``rtol``, ``maxiter``,
+        ``preconditioner``, ``drop_tol``/``fill_factor`` of "ilu" and ``history``.
+    reorder : {"auto", "rcm", "none"}
+        Renumbering of the nodes before assembly, see ``wundy.ordering.node_ordering``.  "auto"
+        applies a reverse Cuthill-McKee ordering to sparse systems whose bandwidth it reduces.
+        The system is assembled and solved in the new numbering; all results are returned in the
+        numbering of ``coords``.
 
     Returns
     -------
     dict with:
-      "displ" : (nnode,) float array, nodal displacements
-      "K"     : (ndof, ndof) float array, global stiffness
+      "displ" : (ndof,) float array, nodal displacements, node by node
+      "K"     : (ndof, ndof) float array (CSR matrix for engine="sparse"), global stiffness
       "F"     : (ndof,) float array, global load vector (including cload + distributed)
+      "R"     : (ndof,) float array, reactions K u - F at the Dirichlet DOFs, zero elsewhere
+                (dirichlet="condense" only)
+      "solver": dict of iterations, convergence flag and final residual, plus the residual
+                history with the ``history`` option (solver="cg" only)
+      "ordering": dict of the ordering ``method`` applied and the stiffness bandwidth and profile
+                before and after it, see ``wundy.ordering.node_ordering``
+    """
+    elements, ea = block_element_arrays(materials, blocks)
+    return linear_analysis(
+        coords,
+        connect,
+        doftags,
+        dofvals,
+        dload,
+        _element_assembler(elements, ea),
+        engine=engine,
+        dirichlet=dirichlet,
+        recorder=recorder,
+        solver=solver,
+        solver_options=solver_options,
+        reorder=reorder,
+    )
+
+
+def analyze(model: CompactModel, **options: Any) -> dict[str, Any]:
+    """Linear analysis of a ``wundy.compact.CompactModel``.
+
+    The stiffness is assembled from the per-element rigidities of ``model``.  ``options`` and
+    the result are those of ``first_fe_code``.
+
+    """
+    elements = np.arange(len(model.connect))
+    args = (model.coords, model.connect, model.doftags, model.dofvals, model.dload)
+    return linear_analysis(*args, _element_assembler(elements, model.ea), **options)
+
+
+def _element_assembler(elements: NDArray[int], ea: NDArray[float]) -> Assembler:
+    """Assembler of the elements ``elements`` with axial rigidities ``ea``"""
+
+    def assemble(
+        coords: NDArray[float], connect: NDArray[int], dload: NDArray[float], F: NDArray[float]
+    ) -> tuple[NDArray[int], NDArray[int], NDArray[float]]:
+        return assemble_elements(coords, connect, dload, elements, ea, F)
+
+    return assemble
+
+
+def linear_analysis(
+    coords: NDArray[float],
+    connect: NDArray[int],
+    doftags: NDArray[int],
+    dofvals: NDArray[float],
+    dload: NDArray[float],
+    assemble: Assembler,
+    engine: str = "dense",
+    dirichlet: str = "symmetric",
+    recorder: Recorder | None = None,
+    solver: str = "direct",
+    solver_options: dict[str, Any] | None = None,
+    reorder: str = "auto",
+) -> dict[str, Any]:
+    """Linear analysis with the stiffness triplets computed by ``assemble``.
+
+    ``assemble(coords, connect, dload, F)`` returns the COO triplets of the global stiffness
+    and adds the distributed loads to ``F``, like ``wundy.assembly.assemble_elements``.  It is
+    called in the node numbering chosen by ``reorder``.  The other arguments and the result are
+    those of ``first_fe_code``.
+
     """
     nnode, dof_per_node = coords.shape
     nelem, nper = connect.shape
-    assert dof_per_node == 1, "Expect 1 DOF per node (axial u)."
-    assert nper == 2, "Expect 2-node bar elements."
+    if nper not in ELEMENT_NODES.values():
+        raise ValueError(f"No element type with {nper} nodes per element")
+    if dof_per_node > 1 and nper != 2:
+        raise ValueError("2-D and 3-D (truss) meshes support t1d1 (2-node) elements only")
+    if engine not in ("dense", "sparse"):
+        raise ValueError(f"Unknown engine {engine!r}")
+    if dirichlet not in ("symmetric", "condense"):
+        raise ValueError(f"Unknown Dirichlet BC method {dirichlet!r}")
+    if solver not in ("direct", "cg"):
+        raise ValueError(f"Unknown solver {solver!r}")
+    if reorder not in REORDER_METHODS:
+        raise ValueError(f"Unknown reordering method {reorder!r}")
 
+    recorder = recorder or null_recorder
     ndof = nnode * dof_per_node
-    K = np.zeros((ndof, ndof), dtype=float)
-    F = np.zeros(ndof, dtype=float)
-
-    # (A) Concentrated loads from dofvals ONLY on non-Dirichlet DOFs
-    for n, tags in enumerate(doftags):
-        for j, tag in enumerate(tags):
-            if tag != DIRICHLET:
-                I = n * dof_per_node + j
-                F[I] += dofvals[n, j]
-
-    # (B) Assemble element stiffness & consistent distributed load
-    for block in blocks.values():
-        A = float(block["element_properties"]["area"])
-        mat = materials[block["material"]]
-        E = float(mat["parameters"]["E"])
-        for e in block["elements"]:
-            nodes = connect[e]  # [i, j]
-            dofs = [n * dof_per_node + j for n in nodes for j in range(dof_per_node)]
-            xe = coords[nodes, 0]
-            Le = float(xe[1] - xe[0])
-            if np.isclose(Le, 0.0):
-                raise ValueError(f"Zero-length element between nodes {nodes}")
-
-            ke = (A * E / Le) * np.array([[1.0, -1.0], [-1.0, 1.0]])
-            K[np.ix_(dofs, dofs)] += ke
-
-            q = float(dload[e]) if dload is not None and len(dload) > 0 else 0.0
-            qe = (q * Le / 2.0) * np.ones(2)
-            F[dofs] += qe
-
-    # (C) Apply Dirichlet BCs (symmetric)
-    Kbc = K.copy()
-    Fbc = F.copy()
-    for n, tags in enumerate(doftags):
-        for j, tag in enumerate(tags):
-            if tag == DIRICHLET:
-                I = n * dof_per_node + j
-                # Move known displacement to RHS, preserve symmetry
-                Fbc -= Kbc[:, I] * dofvals[n, j]
-                Kbc[I, :] = 0.0
-                Kbc[:, I] = 0.0
-                Kbc[I, I] = 1.0
-    for n, tags in enumerate(doftags):
-        for j, tag in enumerate(tags):
-            if tag == DIRICHLET:
-                I = n * dof_per_node + j
-                Fbc[I] = dofvals[n, j]
+
+    with recorder.stage("reorder"):
+        # Dense storage and solves do not depend on the bandwidth
+        method = "none" if reorder == "auto" and engine == "dense" else reorder
+        perm, ordering = node_ordering(connect, nnode, dof_per_node, method=method)
+        recorder.annotate(**ordering)
+        if perm is not None:
+            iperm = np.empty(nnode, dtype=int)
+            iperm[perm] = np.arange(nnode)
+            coords, connect = coords[perm], iperm[connect]
+            doftags, dofvals = np.asarray(doftags)[perm], np.asarray(dofvals)[perm]
+
+    with recorder.stage("assemble"):
+        # (A) Concentrated loads from dofvals ONLY on non-Dirichlet DOFs
+        F = nodal_loads(doftags, dofvals)
+
+        # (B) Assemble element stiffness & consistent distributed load
+        rows, cols, vals = assemble(coords, connect, dload, F)
+        K = global_stiffness(rows, cols, vals, ndof, engine=engine)
+        recorder.annotate(ndof=ndof, nnz=K.size if isinstance(K, np.ndarray) else K.nnz)
+
+    soln = solve_system(
+        K, F, doftags, dofvals, dirichlet, recorder, solver=solver, solver_options=solver_options
+    )
+    if perm is not None:
+        # Back to the user numbering: internal DOF i is DOF dofs[i] of the input
+        dofs = dof_permutation(perm, dof_per_node)
+        for name in ("displ", "F", "R"):
+            if name in soln:
+                soln[name][dofs] = soln[name].copy()
+        idofs = np.empty(ndof, dtype=int)
+        idofs[dofs] = np.arange(ndof)
+        K = soln["K"]
+        soln["K"] = K[idofs][:, idofs] if issparse(K) else K[np.ix_(idofs, idofs)]
+    soln["ordering"] = ordering
+    return soln
+
+
+def solve_system(
+    K: NDArray[float] | sp.csr_matrix,
+    F: NDArray[float],
+    doftags: NDArray[int],
+    dofvals: NDArray[float],
+    dirichlet: str = "symmetric",
+    recorder: Recorder | None = None,
+    solver: str = "direct",
+    solver_options: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Apply the Dirichlet BCs to the assembled system ``K u = F`` and solve it.
+
+    ``K`` may be dense or sparse; ``dirichlet`` and ``solver`` are as in ``first_fe_code``, whose
+    result dictionary is returned.
+
+    """
+    recorder = recorder or null_recorder
+    info: dict[str, Any] = {}
+
+    def solve(A: Any, b: NDArray[float]) -> NDArray[float]:
+        return linear_solve(A, b, solver, solver_options, info)
+
+    def result(**soln: Any) -> dict[str, Any]:
+        if info:
+            recorder.annotate(iterations=info["iterations"], converged=info["converged"])
+            soln["solver"] = info
+        return soln
+
+    if dirichlet == "condense":
+        with recorder.stage("solve", method="condense", solver=solver):
+            u, R = solve_condensed(K, F, doftags, dofvals, solve=solve)
+            return result(displ=u, K=K, F=F, R=R)
+
+    # (C) Apply Dirichlet BCs (symmetric): move known displacements to RHS, preserve symmetry
+    with recorder.stage("dirichlet"):
+        prescribed, ubc = prescribed_dofs(doftags, dofvals)
+        Fbc = F - K @ ubc
+        Fbc[prescribed] = ubc[prescribed]
+        Kbc = constrain_stiffness(K, prescribed)
 
     # (D) Solve
-    u = np.linalg.solve(Kbc, Fbc)
-    return {"displ": u, "K": K, "F": F}
+    with recorder.stage("solve", method="symmetric", solver=solver):
+        u = solve(Kbc, Fbc)
+        return result(displ=u, K=K, F=F)
+
+
+def linear_solve(
+    A: NDArray[float] | sp.csr_matrix,
+    b: NDArray[float],
+    solver: str = "direct",
+    options: dict[str, Any] | None = None,
+    info: dict[str, Any] | None = None,
+) -> NDArray[float]:
+    """Solve ``A x = b`` directly or by conjugate gradients, see ``first_fe_code``.
+
+    The convergence information of a "cg" solve is stored in ``info``.  A solve that does not
+    converge is logged as a warning and its last iterate returned.
+
+    """
+    if solver == "cg":
+        x, stats = solve_cg(A, b, **(options or {}))
+        if info is not None:
+            info.update(stats)
+        if not stats["converged"]:
+            residual = stats["residual"]
+            logger.warning(
+                f"CG did not converge in {stats['iterations']} iterations "
+                f"(relative residual {residual:.3e})"
+            )
+        return x
+    if solver != "direct":
+        raise ValueError(f"Unknown solver {solver!r}")
+    return np.linalg.solve(A, b) if isinstance(A, np.ndarray) else solve_sparse(A, b)
+
+
+def solve_condensed(
+    K: NDArray[float] | sp.csr_matrix,
+    F: NDArray[float],
+    doftags: NDArray[int],
+    dofvals: NDArray[float],
+    solve: Callable[[Any, NDArray[float]], NDArray[float]] | None = None,
+) -> tuple[NDArray[float], NDArray[float]]:
+    """Solve by static condensation of the Dirichlet DOFs.
+
+    With DOFs partitioned into free (f) and prescribed (p) sets, solve
+
+        K_ff u_f = F_f - K_fp u_p
+
+    and recover the reactions R_p = K_pf u_f + K_pp u_p - F_p.  ``solve(A, b)`` solves the
+    reduced system, by default directly.
+
+    Returns
+    -------
+    u : (ndof,) float array of displacements
+    R : (ndof,) float array of reactions, zero on free DOFs
+
+    """
+    solve = solve or linear_solve
+    prescribed, u = prescribed_dofs(doftags, dofvals)
+    f = np.flatnonzero(~prescribed)
+    p = np.flatnonzero(prescribed)
+    if not isinstance(K, np.ndarray):
+        K = K.tocsr()
+        Kf = K[f]
+        rhs = F[f] - Kf[:, p] @ u[p]
+        u[f] = solve(Kf[:, f], rhs) if len(f) else rhs
+    else:
+        rhs = F[f] - K[np.ix_(f, p)] @ u[p]
+        u[f] = solve(K[np.ix_(f, f)], rhs) if len(f) else rhs
+    R = np.zeros_like(F)
+    R[p] = K[p] @ u - F[p]
+    return u, R
@@ -0,0 +1,107 @@
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any
+from typing import Generator
+
+
+class Recorder:
+    """Records wall time, CPU time and memory of the stages of an analysis.
+
+    Pass a recorder to ``wundy.ui.load``, ``wundy.ui.preprocess`` and
+    ``wundy.first.first_fe_code`` to have each of their stages recorded::
+
+        with Recorder(memory=True) as rec:
+            data = wundy.ui.load(file, recorder=rec)
+            ...
+        rec.log()
+
+    Parameters
+    ----------
+    memory : bool
+        Also record the bytes allocated by each stage (net and peak).  This starts
+        ``tracemalloc``, which slows down allocation heavy Python code.
+
+    """
+
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.records: list[dict[str, Any]] = []
+        self._started_tracing = False
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop ``tracemalloc`` if it was started by this recorder"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, **info: Any) -> Generator[dict[str, Any], None, None]:
+        """Record the block as stage ``name``.  Extra ``info`` is stored with the record"""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        record: dict[str, Any] = {"stage": name, **info}
+        self.records.append(record)
+        if self.memory:
+            tracemalloc.reset_peak()
+            mem0 = tracemalloc.get_traced_memory()[0]
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall"] = time.perf_counter() - wall0
+            record["cpu"] = time.process_time() - cpu0
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record["allocated"] = current - mem0
+                record["peak"] = peak - mem0
+
+    def annotate(self, **info: Any) -> None:
+        """Add ``info`` (e.g. matrix size and nnz) to the most recent record"""
+        if self.records:
+            self.records[-1].update(info)
+
+    def totals(self) -> dict[str, float]:
+        """Wall time summed over stages with the same name"""
+        totals: dict[str, float] = {}
+        for record in self.records:
+            totals[record["stage"]] = totals.get(record["stage"], 0.0) + record["wall"]
+        return totals
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.records, **kwargs)
+
+    def log(self, logger: logging.Logger | None = None, level: int = logging.INFO) -> None:
+        """Emit one line per stage, by default to the ``wundy.ui`` logger"""
+        logger = logger or logging.getLogger("wundy.ui")
+        for record in self.records:
+            info = ", ".join(
+                f"{key}={value}"
+                for key, value in record.items()
+                if key not in ("stage", "wall", "cpu")
+            )
+            msg = f"{record['stage']}: wall={record['wall']:.6f}s cpu={record['cpu']:.6f}s"
+            logger.log(level, f"{msg}, {info}" if info else msg)
+
+
+class NullRecorder(Recorder):
+    """Recorder that records nothing.  Used when instrumentation is disabled"""
+
+    @contextmanager
+    def stage(self, name: str, **info: Any) -> Generator[dict[str, Any], None, None]:
+        yield info
+
+    def annotate(self, **info: Any) -> None:
+        pass
+
+
+null_recorder = NullRecorder()
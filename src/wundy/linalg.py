@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+# scipy is imported on first use so that dense analyses do not pay for importing it
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+
+
+def issparse(A: Any) -> bool:
+    """``scipy.sparse.issparse`` without importing scipy: no sparse matrix exists before it is"""
+    sparse = sys.modules.get("scipy.sparse")
+    return sparse is not None and sparse.issparse(A)
+
+
+def bandwidth(A: sp.sparray | sp.spmatrix) -> int:
+    """Return the half bandwidth max(|i - j|) over the stored nonzeros of ``A``"""
+    import scipy.sparse as sp
+
+    A = sp.coo_matrix(A)
+    A.eliminate_zeros()
+    if A.nnz == 0:
+        return 0
+    return int(np.abs(A.row - A.col).max())
+
+
+def tridiagonal_bands(A: sp.sparray | sp.spmatrix) -> NDArray[float]:
+    """Pack the three central diagonals of ``A`` in LAPACK banded storage"""
+    import scipy.sparse as sp
+
+    A = sp.csr_matrix(A)
+    n = A.shape[0]
+    ab = np.zeros((3, n), dtype=float)
+    ab[0, 1:] = A.diagonal(1)
+    ab[1, :] = A.diagonal(0)
+    ab[2, :-1] = A.diagonal(-1)
+    return ab
+
+
+def solve_tridiagonal(A: sp.sparray | sp.spmatrix, b: NDArray[float]) -> NDArray[float]:
+    """Solve the tridiagonal system ``A x = b`` in O(n) (LAPACK gtsv)"""
+    import scipy.linalg
+
+    ab = tridiagonal_bands(A)
+    return scipy.linalg.solve_banded((1, 1), ab, b, check_finite=False)
+
+
+def solve_tridiagonal_batch(
+    diag: NDArray[float],
+    off: NDArray[float],
+    b: NDArray[float],
+    labels: Sequence[Any] | None = None,
+) -> NDArray[float]:
+    """Solve a stack of symmetric positive definite tridiagonal systems (Thomas algorithm).
+
+    Parameters
+    ----------
+    diag : (n, ...) float array
+        Diagonals; trailing axes index the systems.
+    off : (n - 1, ...) float array
+        Off-diagonals ``A[i, i + 1] = A[i + 1, i]``.
+    b : (n, ...) float array
+        Right-hand sides.
+    labels : sequence, optional
+        Names of the systems along a single trailing axis, used to report singular systems.
+        Defaults to their indices.
+
+    The loop runs over the ``n`` rows; each step is vectorized over all systems, so solving many
+    systems of the same size costs little more than solving one.  No pivoting is done: a zero
+    or non-finite pivot raises ``numpy.linalg.LinAlgError`` naming the singular systems.
+
+    """
+    n = diag.shape[0]
+    w = np.empty(np.broadcast_shapes(diag.shape, b.shape), dtype=float)
+    y = np.empty_like(w)
+    w[0], y[0] = diag[0], b[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(1, n):
+            m = off[i - 1] / w[i - 1]
+            w[i] = diag[i] - m * off[i - 1]
+            y[i] = b[i] - m * y[i - 1]
+    # Pivots at roundoff level of the diagonal are zero
+    tol = n * np.finfo(float).eps * np.abs(diag)
+    singular = (~np.isfinite(w) | (np.abs(w) <= tol)).any(axis=0)
+    if np.any(singular):
+        if singular.ndim == 0:
+            which = "system"
+        elif singular.ndim == 1:
+            bad = np.flatnonzero(singular)
+            names = [labels[i] for i in bad] if labels is not None else bad.tolist()
+            which = "systems " + ", ".join(str(name) for name in names)
+        else:
+            which = "systems " + ", ".join(str(tuple(i)) for i in np.argwhere(singular).tolist())
+        raise np.linalg.LinAlgError(f"Singular tridiagonal {which} (zero or non-finite pivot)")
+    x = y
+    x[n - 1] = y[n - 1] / w[n - 1]
+    for i in range(n - 2, -1, -1):
+        x[i] = (y[i] - off[i] * x[i + 1]) / w[i]
+    return x
+
+
+def solve_sparse(A: sp.sparray | sp.spmatrix, b: NDArray[float]) -> NDArray[float]:
+    """Solve ``A x = b`` for sparse ``A``.
+
+    A banded (Thomas) solve is used when the bandwidth of ``A`` is at most 1, otherwise a sparse
+    LU factorization.
+
+    """
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+
+    A = sp.csr_matrix(A)
+    if bandwidth(A) <= 1:
+        return solve_tridiagonal(A, b)
+    return spla.spsolve(A.tocsc(), b)
+
+
+def factorize(A: NDArray[float] | sp.sparray | sp.spmatrix) -> Callable[[NDArray], NDArray]:
+    """Factor the constrained stiffness ``A`` once and return a function solving ``A x = b``.
+
+    ``b`` may be a vector or an (n, nrhs) array of right-hand sides.  Dense matrices use a
+    Cholesky factorization, sparse matrices a banded Cholesky when the bandwidth is 1 and a sparse
+    LU otherwise.  Cholesky falls back to LU when ``A`` is not positive definite.
+
+    """
+    import scipy.linalg
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+
+    if not sp.issparse(A):
+        A = np.asarray(A, dtype=float)
+        try:
+            c = scipy.linalg.cho_factor(A, check_finite=False)
+            return lambda b: scipy.linalg.cho_solve(c, b, check_finite=False)
+        except np.linalg.LinAlgError:
+            lu = scipy.linalg.lu_factor(A, check_finite=False)
+            return lambda b: scipy.linalg.lu_solve(lu, b, check_finite=False)
+    A = sp.csr_matrix(A)
+    if bandwidth(A) <= 1:
+        ab = tridiagonal_bands(A)[:2]
+        try:
+            cb = scipy.linalg.cholesky_banded(ab, check_finite=False)
+            return lambda b: scipy.linalg.cho_solve_banded((cb, False), b, check_finite=False)
+        except np.linalg.LinAlgError:
+            pass
+    lu = spla.splu(A.tocsc())
+    return lu.solve
+
+
+class PatternSolver:
+    """Factor a sequence of matrices that share one sparsity pattern.
+
+    Parameters
+    ----------
+    rows, cols : (nnz,) int arrays
+        Coordinates of the triplets the matrices are summed from, as returned by
+        ``wundy.assembly.assemble``; their order must not change between matrices.
+    n : int
+        Order of the matrices.
+
+    The pattern is analyzed once: every triplet is mapped to its slot in the storage handed to
+    the factorization and, unless the bandwidth is at most 1, a reverse Cuthill-McKee ordering is
+    computed.  ``factor(vals)`` then only sums the values into their slots (one ``bincount``) and
+    factors: banded Cholesky for bandwidth 1, falling back to banded LU when the matrix is not
+    positive definite, and otherwise SuperLU on the reordered matrix with its own column ordering
+    disabled.  The matrices must be structurally symmetric.
+
+    """
+
+    def __init__(self, rows: NDArray[int], cols: NDArray[int], n: int) -> None:
+        rows = np.asarray(rows, dtype=int)
+        cols = np.asarray(cols, dtype=int)
+        self.n = n
+        self.banded = bool(np.abs(rows - cols).max(initial=0) <= 1)
+        if self.banded:
+            # Upper banded storage ab[1 + i - j, j] flattened; lower triplets go to a spare slot
+            self.slots = np.where(rows <= cols, (1 + rows - cols) * n + cols, 2 * n)
+            self.size = 2 * n + 1
+            return
+
+        import scipy.sparse as sp
+        from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+        keys = np.unique(rows * n + cols)
+        pattern = sp.csr_matrix((np.ones(len(keys)), (keys // n, keys % n)), shape=(n, n))
+        self.perm = reverse_cuthill_mckee(pattern, symmetric_mode=True).astype(int)
+        iperm = np.empty(n, dtype=int)
+        iperm[self.perm] = np.arange(n)
+        # Slots in the CSC storage of the reordered matrix: sorted by column, then row
+        keys = iperm[cols] * n + iperm[rows]
+        unique = np.unique(keys)
+        self.slots = np.searchsorted(unique, keys)
+        self.size = len(unique)
+        self.indices = unique % n
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(unique // n, minlength=n))])
+
+    def factor(self, vals: NDArray[float]) -> Callable[[NDArray], NDArray]:
+        """Factor the matrix with triplet values ``vals``; returns a function solving ``A x = b``"""
+        import scipy.linalg
+
+        data = np.bincount(self.slots, weights=vals, minlength=self.size)
+        if self.banded:
+            ab = data[: 2 * self.n].reshape(2, self.n)
+            try:
+                cb = scipy.linalg.cholesky_banded(ab, check_finite=False)
+                return lambda b: scipy.linalg.cho_solve_banded((cb, False), b, check_finite=False)
+            except np.linalg.LinAlgError:
+                full = np.vstack([ab, np.append(ab[0, 1:], 0.0)])
+                return lambda b: scipy.linalg.solve_banded((1, 1), full, b, check_finite=False)
+
+        import scipy.sparse as sp
+        import scipy.sparse.linalg as spla
+
+        A = sp.csc_matrix((data, self.indices, self.indptr), shape=(self.n, self.n))
+        lu = spla.splu(A, permc_spec="NATURAL")
+        perm = self.perm
+
+        def solve(b: NDArray[float]) -> NDArray[float]:
+            x = np.empty_like(b, dtype=float)
+            x[perm] = lu.solve(np.asarray(b, dtype=float)[perm])
+            return x
+
+        return solve
+
+
+def linear_operator(
+    n: int, matvec: Callable[[NDArray[float]], NDArray[float]]
+) -> spla.LinearOperator:
+    """Square ``(n, n)`` float ``scipy.sparse.linalg.LinearOperator`` applying ``matvec``"""
+    import scipy.sparse.linalg as spla
+
+    class Operator(spla.LinearOperator):
+        def _matvec(self, x: NDArray[float]) -> NDArray[float]:
+            return matvec(x)
+
+    return Operator(float, (n, n))
+
+
+def solve_cg(
+    A: NDArray[float] | sp.sparray | sp.spmatrix,
+    b: NDArray[float],
+    rtol: float = 1e-10,
+    maxiter: int | None = None,
+    preconditioner: str | None = "jacobi",
+    x0: NDArray[float] | None = None,
+    drop_tol: float = 1e-2,
+    fill_factor: float = 10.0,
+    history: bool = False,
+) -> tuple[NDArray[float], dict[str, Any]]:
+    """Solve the symmetric positive definite system ``A x = b`` by preconditioned CG.
+
+    Parameters
+    ----------
+    rtol : float
+        Convergence when ``|b - A x| <= rtol |b|``.
+    maxiter : int, optional
+        Iteration limit, by default ``10 n``.
+    preconditioner : {"jacobi", "ilu", None}
+        "jacobi" scales by the inverse diagonal.  "ilu" applies an incomplete LU factorization
+        in the given order and without pivoting, which keeps it close to an incomplete Cholesky
+        one; scipy has none.  The order matters: ``first_fe_code`` only reduces the bandwidth
+        beforehand with the sparse engine and ``reorder`` "auto" or "rcm".  Its
+        dropping is not exactly symmetric, so CG is not guaranteed to converge with it.  None
+        runs plain CG.
+    drop_tol, fill_factor : float
+        Drop tolerance and fill limit of the "ilu" preconditioner, see
+        ``scipy.sparse.linalg.spilu``.  The default keeps the factors of a 2-D grid Laplacian
+        at about 3 times ``nnz(A)``; smaller tolerances approach a complete factorization.
+    history : bool
+        Record the relative residual norm after each iteration.  This costs an extra product
+        with ``A`` per iteration.
+
+    Returns
+    -------
+    x : (n,) float array
+    info : dict with ``iterations``, ``converged``, ``residual``, the final relative residual
+        norm, and with ``history`` also ``residuals``, the norm after each iteration
+
+    """
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+
+    # CSR products are cheaper than dense ones for the mostly zero stiffness of a dense engine
+    A = sp.csr_matrix(A)
+    n = A.shape[0]
+    M: Any
+    if preconditioner == "jacobi":
+        d = A.diagonal()
+        M = sp.diags(np.divide(1.0, d, out=np.ones_like(d), where=d != 0.0), format="csr")
+    elif preconditioner == "ilu":
+        ilu = spla.spilu(
+            A.tocsc(),
+            drop_tol=drop_tol,
+            fill_factor=fill_factor,
+            diag_pivot_thresh=0.0,
+            permc_spec="NATURAL",
+        )
+        M = linear_operator(n, ilu.solve)
+    elif preconditioner is None:
+        M = None
+    else:
+        raise ValueError(f"Unknown preconditioner {preconditioner!r}")
+
+    norm_b = np.linalg.norm(b) or 1.0
+    iterations = 0
+    residuals: list[float] = []
+
+    def callback(xk: NDArray[float]) -> None:
+        nonlocal iterations
+        iterations += 1
+        if history:
+            residuals.append(float(np.linalg.norm(b - A @ xk) / norm_b))
+
+    x, status = spla.cg(
+        A, b, x0=x0, rtol=rtol, atol=0.0, maxiter=maxiter or 10 * n, M=M, callback=callback
+    )
+    if status < 0:
+        raise ValueError(f"Conjugate gradient breakdown (status {status})")
+    info: dict[str, Any] = {
+        "iterations": iterations,
+        "converged": status == 0,
+        "residual": float(np.linalg.norm(b - A @ x) / norm_b),
+    }
+    if history:
+        info["residuals"] = residuals
+    return x, info
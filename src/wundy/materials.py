@@ -0,0 +1,166 @@
+"""Material models.
+
+A material model is a subclass of ``Material`` registered under its input ``type`` with
+``register_material``.  It validates its parameters and evaluates stress and tangent modulus for
+the strains of all its elements at once::
+
+    @register_material
+    class Linear(Material):
+        type = "linear"
+
+        @classmethod
+        def validate(cls, parameters):
+            ...
+            return parameters
+
+        def update(self, strain, state):
+            E = self.parameters["E"]
+            return E * strain, np.full_like(strain, E), state
+
+The linear solver ``wundy.first.first_fe_code`` uses the modulus ``E`` that every model defines;
+``wundy.nonlinear.newton`` and ``wundy.dynamics.explicit`` use ``update``.  The mass density
+``density``, needed by ``wundy.dynamics`` only, is an optional parameter of every model.
+
+"""
+
+import abc
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+State = dict[str, NDArray[float]]
+
+MATERIALS: dict[str, type["Material"]] = {}
+
+
+def register_material(cls: type["Material"]) -> type["Material"]:
+    """Class decorator adding a material model to ``MATERIALS`` under its ``type``"""
+    MATERIALS[cls.type] = cls
+    return cls
+
+
+class Material(abc.ABC):
+    """Base class of material models.
+
+    Subclasses must implement ``validate`` and ``update``.
+
+    Parameters
+    ----------
+    parameters : dict
+        Validated material parameters.
+
+    """
+
+    type: str = ""
+
+    def __init__(self, parameters: dict[str, Any]) -> None:
+        self.parameters = parameters
+
+    @classmethod
+    @abc.abstractmethod
+    def validate(cls, parameters: dict[str, Any]) -> dict[str, Any]:
+        """Validate ``parameters``, raising ``schema.SchemaError``; returns them with defaults"""
+
+    def initial_state(self, n: int) -> State:
+        """State variables of ``n`` material points before loading"""
+        return {}
+
+    @abc.abstractmethod
+    def update(self, strain: NDArray[float], state: State) -> tuple[NDArray, NDArray, State]:
+        """Stress, tangent modulus and updated state at ``strain`` from the converged ``state``.
+
+        ``state`` must not be modified: the update is evaluated repeatedly from the state of the
+        last converged load step until the step converges.
+
+        """
+
+
+def _elastic_schema(extra: dict[Any, Any] | None = None) -> Any:
+    """Schema of ``E``, ``nu``, the optional ``density`` and the ``extra`` keys of a model"""
+    from schema import And
+    from schema import Optional
+    from schema import Schema
+
+    return Schema(
+        {
+            "E": And(float, lambda x: x > 0.0, error="E must be > 0"),
+            "nu": And(float, lambda x: -1.0 <= x < 0.5, error="nu must be between -1 and .5"),
+            Optional("density"): And(float, lambda x: x > 0.0, error="density must be > 0"),
+            **(extra or {}),
+        }
+    )
+
+
+@register_material
+class Elastic(Material):
+    """Linear elastic: ``stress = E strain``"""
+
+    type = "elastic"
+
+    @classmethod
+    def validate(cls, parameters: dict[str, Any]) -> dict[str, Any]:
+        return _elastic_schema().validate(parameters)
+
+    def update(self, strain: NDArray[float], state: State) -> tuple[NDArray, NDArray, State]:
+        E = self.parameters["E"]
+        return E * strain, np.full_like(strain, E), state
+
+
+@register_material
+class NonlinearElastic(Material):
+    """Nonlinear elastic with cubic stiffening: ``stress = E (strain + b strain**3)``, b >= 0"""
+
+    type = "nonlinear_elastic"
+
+    @classmethod
+    def validate(cls, parameters: dict[str, Any]) -> dict[str, Any]:
+        from schema import And
+        from schema import Optional
+
+        b = And(float, lambda x: x >= 0.0, error="b must be >= 0")
+        return _elastic_schema({Optional("b", default=0.0): b}).validate(parameters)
+
+    def update(self, strain: NDArray[float], state: State) -> tuple[NDArray, NDArray, State]:
+        E, b = self.parameters["E"], self.parameters["b"]
+        return E * (strain + b * strain**3), E * (1.0 + 3.0 * b * strain**2), state
+
+
+@register_material
+class Elastoplastic(Material):
+    """Elastoplastic with yield stress ``Y`` and linear isotropic hardening modulus ``H``.
+
+    State variables are the plastic strain and the accumulated plastic strain ``alpha``; the
+    stress is found by the return mapping algorithm and the tangent is the consistent one,
+    ``E H / (E + H)`` while yielding.
+
+    """
+
+    type = "elastoplastic"
+
+    @classmethod
+    def validate(cls, parameters: dict[str, Any]) -> dict[str, Any]:
+        from schema import And
+        from schema import Optional
+
+        Y = And(float, lambda x: x > 0.0, error="Y must be > 0")
+        H = And(float, lambda x: x >= 0.0, error="H must be >= 0")
+        return _elastic_schema({"Y": Y, Optional("H", default=0.0): H}).validate(parameters)
+
+    def initial_state(self, n: int) -> State:
+        return {"plastic_strain": np.zeros(n), "alpha": np.zeros(n)}
+
+    def update(self, strain: NDArray[float], state: State) -> tuple[NDArray, NDArray, State]:
+        E, Y, H = self.parameters["E"], self.parameters["Y"], self.parameters["H"]
+        trial = E * (strain - state["plastic_strain"])
+        f = np.abs(trial) - (Y + H * state["alpha"])
+        yielding = f > 0.0
+        dgamma = np.where(yielding, f, 0.0) / (E + H)
+        sign = np.sign(trial)
+        stress = trial - E * dgamma * sign
+        tangent = np.where(yielding, E * H / (E + H), E)
+        new_state = {
+            "plastic_strain": state["plastic_strain"] + dgamma * sign,
+            "alpha": state["alpha"] + dgamma,
+        }
+        return stress, tangent, new_state
@@ -0,0 +1,145 @@
+"""Natural frequencies and mode shapes of bar and truss models.
+
+``modes`` assembles the sparse stiffness and mass matrices of a preprocessed input, eliminates
+the Dirichlet DOFs and extracts the requested number of the lowest modes of
+``K phi = omega^2 M phi`` by shift-invert Lanczos (``scipy.sparse.linalg.eigsh``)::
+
+    inp = wundy.ui.preprocess(wundy.ui.load(file))
+    result = modes(inp, nmodes=5)
+    result["frequencies"], result["modes"]
+
+Shift-invert needs solves with ``K - sigma M`` only, factored once by
+``wundy.linalg.factorize`` (a banded Cholesky factorization for meshes numbered along the bar),
+so the cost grows about linearly with the number of DOFs.  Every material needs a ``density``.
+
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .assembly import assemble
+from .assembly import block_material_models
+from .assembly import element_densities
+from .assembly import element_geometry
+from .assembly import global_stiffness
+from .assembly import node_dofs
+from .assembly import prescribed_dofs
+from .elements import element_type
+from .instrument import Recorder
+from .instrument import null_recorder
+from .linalg import factorize
+from .linalg import linear_operator
+
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+
+def mass_matrix(inp: dict[str, Any], lumped: bool = False) -> sp.csr_matrix:
+    """Sparse consistent mass matrix of ``inp``, or the row-sum lumped (diagonal) one"""
+    import scipy.sparse as sp
+
+    coords, connect = inp["coords"], inp["connect"]
+    materials, blocks = inp["materials"], inp["element blocks"]
+    elements, area, _ = block_material_models(materials, blocks)
+    rho_a = element_densities(materials, blocks) * area
+    ndof = coords.size
+    if coords.shape[1] > 1:
+        # Truss: the bar mass acts in every component, me = rho A L / 6 [[2, 1], [1, 2]] x I
+        L, _ = element_geometry(coords, connect, elements)
+        ndim = coords.shape[1]
+        bar = (rho_a * L / 6)[:, None, None] * np.array([[2.0, 1.0], [1.0, 2.0]])
+        me = np.einsum("eIJ,ij->eIiJj", bar, np.eye(ndim)).reshape(len(elements), 2 * ndim, -1)
+        dofs = node_dofs(connect[elements], ndim)
+    else:
+        me = element_type(connect.shape[1]).mass(coords[connect[elements], 0], rho_a)
+        dofs = connect[elements]
+    nodes = dofs.shape[1]
+    if lumped:
+        diagonal = np.bincount(dofs.ravel(), weights=me.sum(axis=2).ravel(), minlength=ndof)
+        return sp.diags(diagonal).tocsr()
+    rows = np.repeat(dofs, nodes, axis=1).ravel()
+    cols = np.tile(dofs, (1, nodes)).ravel()
+    return sp.coo_matrix((me.ravel(), (rows, cols)), shape=(ndof, ndof)).tocsr()
+
+
+def modes(
+    inp: dict[str, Any],
+    nmodes: int = 6,
+    lumped: bool = False,
+    sigma: float | None = None,
+    recorder: Recorder | None = None,
+) -> dict[str, NDArray[float]]:
+    """Lowest ``nmodes`` natural frequencies and mass-normalized mode shapes of ``inp``.
+
+    Parameters
+    ----------
+    inp : dict
+        Output of ``wundy.ui.preprocess``; every material needs a ``density``.
+    nmodes : int
+        Number of modes; all of them when the model has fewer free DOFs.
+    lumped : bool
+        Use the row-sum lumped instead of the consistent mass matrix.
+    sigma : float, optional
+        Shift; the modes with ``omega**2`` nearest to it are found.  Defaults to 0 when DOFs are
+        prescribed and otherwise to a small negative value, as ``K`` is singular.
+    recorder : Recorder, optional
+        Records the ``assemble`` and ``eigensolve`` stages.
+
+    Returns
+    -------
+    dict with:
+      "eigenvalues" : (nmodes,) float array, ``omega**2`` in ascending order
+      "omega" : (nmodes,) float array, circular frequencies
+      "frequencies" : (nmodes,) float array, ``omega / 2 pi``
+      "modes" : (ndof, nmodes) float array, mode shapes with ``phi.T M phi = I``, zero at the
+      Dirichlet DOFs
+
+    """
+    import scipy.linalg
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+
+    recorder = recorder or null_recorder
+    coords, connect = inp["coords"], inp["connect"]
+    ndof = coords.size
+    with recorder.stage("assemble", ndof=ndof):
+        rows, cols, vals = assemble(
+            coords, connect, None, inp["materials"], inp["element blocks"], np.zeros(ndof)
+        )
+        K = sp.csr_matrix(global_stiffness(rows, cols, vals, ndof, engine="sparse"))
+        M = mass_matrix(inp, lumped=lumped)
+        prescribed, _ = prescribed_dofs(inp["doftags"], inp["dofvals"])
+        free = np.flatnonzero(~prescribed)
+        Kff = K[free][:, free]
+        Mff = M[free][:, free]
+
+    n = len(free)
+    with recorder.stage("eigensolve", ndof=n, nmodes=nmodes):
+        if n <= max(nmodes, 1) + 1:
+            # Too few DOFs for Lanczos: solve the small dense problem
+            w, v = scipy.linalg.eigh(Kff.toarray(), Mff.toarray())
+            w, v = w[:nmodes], v[:, :nmodes]
+        else:
+            if sigma is None:
+                scale = np.mean(Kff.diagonal() / Mff.diagonal())
+                sigma = 0.0 if prescribed.any() else -1e-8 * scale
+            solve = factorize((Kff - sigma * Mff).tocsr())
+            OPinv = linear_operator(n, solve)
+            w, v = spla.eigsh(Kff, k=nmodes, M=Mff, sigma=sigma, which="LM", OPinv=OPinv)
+            order = np.argsort(w)
+            w, v = w[order], v[:, order]
+
+    shapes = np.zeros((ndof, len(w)))
+    shapes[free] = v
+    omega = np.sqrt(np.maximum(w, 0.0))
+    return {
+        "eigenvalues": w,
+        "omega": omega,
+        "frequencies": omega / (2 * np.pi),
+        "modes": shapes,
+    }
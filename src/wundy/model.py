@@ -0,0 +1,215 @@
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .assembly import BAR_STIFFNESS
+from .assembly import assemble
+from .assembly import block_element_arrays
+from .assembly import consistent_loads
+from .assembly import constrain_stiffness
+from .assembly import element_lengths
+from .assembly import global_stiffness
+from .assembly import nodal_loads
+from .assembly import prescribed_dofs
+from .linalg import factorize
+
+
+class Model:
+    """Assembled and factored model for solving many load cases on one mesh.
+
+    The stiffness is assembled, constrained by the Dirichlet BCs and factored once on
+    construction.  Each call to ``solve`` then costs only forward/back substitutions, for any
+    number of right-hand sides.
+
+    The model can be updated incrementally: ``update_block``, ``update_material``,
+    ``update_cload`` and ``update_dload`` change only the affected entries of K and F.  A
+    stiffness change of rank up to ``max_rank`` (one rank per changed element) is applied to the
+    existing factorization with the Sherman-Morrison-Woodbury formula; beyond that the
+    constrained stiffness is refactored.
+
+    Parameters
+    ----------
+    inp : dict
+        Output of ``wundy.ui.preprocess``.  Prescribed displacements are taken from its
+        ``doftags``/``dofvals``; its concentrated and distributed loads form the default load case.
+    engine : {"sparse", "dense"}
+        Storage of the stiffness, see ``wundy.first.first_fe_code``.
+    max_rank : int
+        Largest number of changed elements handled by a low-rank update of the factorization.
+
+    """
+
+    def __init__(self, inp: dict[str, Any], engine: str = "sparse", max_rank: int = 32) -> None:
+        if engine not in ("dense", "sparse"):
+            raise ValueError(f"Unknown engine {engine!r}")
+        if inp["connect"].shape[1] != 2:
+            raise ValueError("Model supports t1d1 (2-node) elements only")
+        self.engine = engine
+        self.max_rank = max_rank
+        self.coords: NDArray[float] = inp["coords"]
+        self.connect: NDArray[int] = inp["connect"]
+        self.doftags: NDArray[int] = inp["doftags"]
+        self.dofvals: NDArray[float] = inp["dofvals"]
+        self.materials: dict[str, Any] = inp["materials"]
+        self.blocks: dict[str, Any] = inp["element blocks"]
+
+        nnode, dof_per_node = self.coords.shape
+        self.ndof = nnode * dof_per_node
+        self.prescribed, self.ubc = prescribed_dofs(self.doftags, self.dofvals)
+
+        # Default load case: cload on free DOFs plus the consistent distributed load
+        self.cload = nodal_loads(self.doftags, self.dofvals)
+        self.dload = np.array(inp["dload"], dtype=float).reshape(len(self.connect), -1)
+        self.F = self.cload.copy()
+        rows, cols, vals = assemble(
+            self.coords, self.connect, self.dload, self.materials, self.blocks, self.F
+        )
+        self.K = global_stiffness(rows, cols, vals, self.ndof, engine=engine)
+        self._Kubc = self.K @ self.ubc
+
+        # Kept for assembling the distributed loads of further load cases and for updates
+        self._elements, ea = block_element_arrays(self.materials, self.blocks)
+        self._position = np.full(len(self.connect), -1)
+        self._position[self._elements] = np.arange(len(self._elements))
+        self._Le = element_lengths(self.coords, self.connect, self._elements)
+        self._dofs = self.connect[self._elements] * dof_per_node
+        self._k = ea / self._Le
+
+        # Per block: its slice of the element arrays, area and modulus
+        self.area: dict[str, float] = {}
+        self.modulus: dict[str, float] = {}
+        self._slices: dict[str, slice] = {}
+        start = 0
+        for name, block in self.blocks.items():
+            n = len(block["elements"])
+            self._slices[name] = slice(start, start + n)
+            self.area[name] = float(block["element_properties"]["area"])
+            material = block["material"]
+            self.modulus[material] = float(self.materials[material]["parameters"]["E"])
+            start += n
+        self.factor()
+
+    def factor(self) -> None:
+        """Factor the current constrained stiffness, discarding any low-rank update"""
+        self._solve = factorize(constrain_stiffness(self.K, self.prescribed))
+        self._k0 = self._k.copy()
+        self._changed = np.zeros(0, dtype=int)
+
+    @property
+    def rank(self) -> int:
+        """Number of element stiffness changes applied as a low-rank update"""
+        return len(self._changed)
+
+    def update_block(self, name: str, area: float) -> None:
+        """Change the cross-sectional area of element block ``name``"""
+        self.area[name] = float(area)
+        self._update_stiffness([name])
+
+    def update_material(self, name: str, E: float) -> None:
+        """Change the Young's modulus of material ``name`` (for all blocks using it)"""
+        self.modulus[name] = float(E)
+        blocks = [b for b, block in self.blocks.items() if block["material"] == name]
+        self._update_stiffness(blocks)
+
+    def update_cload(self, nodes: int | NDArray[int], amplitude: float, dof: int = 0) -> None:
+        """Set the concentrated load on ``nodes`` in the default load case.
+
+        Loads on Dirichlet DOFs are ignored, as in ``wundy.first.first_fe_code``.
+
+        """
+        dofs = np.atleast_1d(nodes) * self.coords.shape[1] + dof
+        dofs = dofs[~self.prescribed[dofs]]
+        self.F[dofs] += amplitude - self.cload[dofs]
+        self.cload[dofs] = amplitude
+
+    def update_dload(self, elements: int | NDArray[int], amplitude: float) -> None:
+        """Set the distributed load on ``elements`` in the default load case"""
+        elements = np.atleast_1d(elements)
+        pos = self._position[elements]
+        dq = amplitude - self.dload[elements, :1]
+        self.dload[elements, 0] = amplitude
+        n = len(pos)
+        consistent_loads(self.F, self._dofs[pos], np.arange(n), self._Le[pos], dq)
+
+    def _update_stiffness(self, names: list[str]) -> None:
+        for name in names:
+            sl = self._slices[name]
+            E = self.modulus[self.blocks[name]["material"]]
+            k = self.area[name] * E / self._Le[sl]
+            dk = k - self._k[sl]
+            self._k[sl] = k
+            rows = np.repeat(self._dofs[sl], 2, axis=1).ravel()
+            cols = np.tile(self._dofs[sl], (1, 2)).ravel()
+            vals = (dk[:, np.newaxis] * BAR_STIFFNESS).ravel()
+            if isinstance(self.K, np.ndarray):
+                np.add.at(self.K, (rows, cols), vals)
+            else:
+                self.K = self.K + global_stiffness(rows, cols, vals, self.ndof, engine="sparse")
+        self._Kubc = self.K @ self.ubc
+
+        changed = np.flatnonzero(self._k != self._k0)
+        if len(changed) > self.max_rank:
+            self.factor()
+            return
+        # Low-rank update: the constrained stiffness changed by U diag(dk) U^T, where the column
+        # of U for element e = (i, j) is (e_i - e_j) with prescribed DOFs zeroed
+        self._changed = changed
+        free = ~self.prescribed
+        i, j = self._dofs[changed, 0], self._dofs[changed, 1]
+        self._U = (i, j, free[i].astype(float), free[j].astype(float))
+        m = len(changed)
+        U = np.zeros((self.ndof, m))
+        np.add.at(U, (i, np.arange(m)), self._U[2])
+        np.add.at(U, (j, np.arange(m)), -self._U[3])
+        self._W = np.asarray(self._solve(U)).reshape(self.ndof, m)
+        dk = self._k[changed] - self._k0[changed]
+        self._S = np.diag(1.0 / dk) + self._Ut(self._W)
+
+    def _Ut(self, X: NDArray[float]) -> NDArray[float]:
+        i, j, fi, fj = self._U
+        return fi[:, np.newaxis] * X[i] - fj[:, np.newaxis] * X[j]
+
+    def load_vector(
+        self, cload: NDArray[float] | None = None, dload: NDArray[float] | None = None
+    ) -> NDArray[float]:
+        """Global load vector for one load case.
+
+        Parameters
+        ----------
+        cload : (nnode, dof_per_node) float array, optional
+            Concentrated nodal forces.  Values on Dirichlet DOFs are ignored.
+        dload : (nelem, dof_per_node) float array, optional
+            Uniform distributed load per element.
+
+        """
+        F = np.zeros(self.ndof, dtype=float)
+        if cload is not None:
+            F += np.where(self.prescribed, 0.0, np.asarray(cload, dtype=float).ravel())
+        if dload is not None:
+            consistent_loads(F, self._dofs, self._elements, self._Le, dload)
+        return F
+
+    def solve(self, loads: NDArray[float] | None = None) -> NDArray[float]:
+        """Displacements for one or many load cases.
+
+        Parameters
+        ----------
+        loads : (ndof,) or (nload, ndof) float array, optional
+            Global load vectors, one per row.  Defaults to the load case of the input deck.
+
+        Returns
+        -------
+        (ndof,) or (nload, ndof) float array of nodal displacements, matching ``loads``
+
+        """
+        F = self.F if loads is None else np.asarray(loads, dtype=float)
+        if F.shape[-1] != self.ndof:
+            raise ValueError(f"Expected loads with {self.ndof} columns, got shape {F.shape}")
+        Fbc = np.atleast_2d(F) - self._Kubc
+        Fbc[:, self.prescribed] = self.ubc[self.prescribed]
+        u = np.asarray(self._solve(Fbc.T)).reshape(self.ndof, -1)
+        if self.rank:
+            # Sherman-Morrison-Woodbury: (K0 + U C U^T)^-1 b = x0 - W S^-1 U^T x0
+            u = u - self._W @ np.linalg.solve(self._S, self._Ut(u))
+        return u[:, 0] if F.ndim == 1 else u.T
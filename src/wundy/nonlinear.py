@@ -0,0 +1,195 @@
+"""Nonlinear static analysis of bars of t1d1 elements.
+
+``newton`` applies the loads and prescribed displacements of a preprocessed input in load steps
+and solves the equilibrium equations of each step by Newton-Raphson iteration with a
+backtracking line search.  Stresses and tangent moduli come from the material models of
+``wundy.materials``, so elastoplastic and nonlinear elastic bars are solved the same way::
+
+    inp = wundy.ui.preprocess(wundy.ui.load(file))
+    result = newton(inp, steps=10)
+    result["displ"], result["stress"], result["history"]
+
+The element connectivity does not change between iterations, so neither does the sparsity of
+the tangent stiffness.  The triplet pattern of the free DOFs is analyzed once by
+``wundy.linalg.PatternSolver``; an iteration evaluates the materials, sums the new tangent
+values into the fixed factorization storage and does the numeric factorization and solve only.
+
+A step that does not converge is retried with half the load increment, up to ``max_cutbacks``
+times in a row.
+
+"""
+
+import logging
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .assembly import BAR_STIFFNESS
+from .assembly import block_material_models
+from .assembly import distributed_loads
+from .assembly import element_lengths
+from .assembly import nodal_loads
+from .assembly import prescribed_dofs
+from .instrument import Recorder
+from .instrument import null_recorder
+from .linalg import PatternSolver
+from .materials import State
+
+logger = logging.getLogger(__name__)
+
+
+def newton(
+    inp: dict[str, Any],
+    steps: int = 10,
+    tol: float = 1e-8,
+    max_iter: int = 20,
+    line_search: bool = True,
+    max_cutbacks: int = 4,
+    recorder: Recorder | None = None,
+) -> dict[str, Any]:
+    """Solve ``inp`` for nonlinear materials by load stepping and Newton-Raphson iteration.
+
+    Parameters
+    ----------
+    inp : dict
+        Output of ``wundy.ui.preprocess``.  Concentrated, distributed and prescribed values are
+        scaled by the load factor, which goes from 0 to 1.
+    steps : int
+        Number of equal load steps.
+    tol : float
+        A step has converged when the norm of the out-of-balance force on the free DOFs is below
+        ``tol`` times the norm of the external and internal forces.
+    max_iter : int
+        Largest number of iterations per step.
+    line_search : bool
+        Backtrack along each Newton correction until the residual norm decreases.
+    max_cutbacks : int
+        Largest number of consecutive halvings of the load increment.
+    recorder : Recorder, optional
+        Records the ``analyze`` stage and a ``step`` stage per load step.
+
+    Returns
+    -------
+    dict with:
+      "displ" : (ndof,) float array, displacements at the last converged load factor
+      "F" : (ndof,) float array, external loads at load factor 1
+      "R" : (ndof,) float array, reactions at the Dirichlet DOFs, zero elsewhere
+      "strain", "stress", "force" : (nelem,) float arrays, NaN for elements in no block
+      "state" : dict of (nelem,) float arrays, material state variables, NaN where undefined
+      "load_factor" : float, 1 unless the analysis failed
+      "converged" : bool
+      "history" : list of dicts with ``load_factor``, ``iterations`` and ``residuals`` per step
+
+    """
+    recorder = recorder or null_recorder
+    coords, connect = inp["coords"], inp["connect"]
+    if connect.shape[1] != 2:
+        raise ValueError("Nonlinear analysis supports t1d1 (2-node) elements only")
+    nelem, ndof = len(connect), coords.size
+
+    with recorder.stage("analyze", nelem=nelem, ndof=ndof):
+        elements, A, groups = block_material_models(inp["materials"], inp["element blocks"])
+        Le = element_lengths(coords, connect, elements)
+        dofs = connect[elements] * coords.shape[1]
+
+        F = nodal_loads(inp["doftags"], inp["dofvals"])
+        if len(inp["dload"]) > 0:
+            distributed_loads(F, coords, connect, elements, inp["dload"], Le=Le)
+        prescribed, ubc = prescribed_dofs(inp["doftags"], inp["dofvals"])
+        free = np.flatnonzero(~prescribed)
+        index = np.full(ndof, -1)
+        index[free] = np.arange(len(free))
+
+        rows = np.repeat(dofs, 2, axis=1).ravel()
+        cols = np.tile(dofs, (1, 2)).ravel()
+        keep = (index[rows] >= 0) & (index[cols] >= 0)
+        pattern = PatternSolver(index[rows[keep]], index[cols[keep]], len(free))
+
+    def evaluate(u: NDArray[float], states: list[State]) -> dict[str, Any]:
+        """Strain, stress, tangent, trial states and internal forces at displacements ``u``"""
+        strain = (u[dofs[:, 1]] - u[dofs[:, 0]]) / Le
+        stress, tangent = np.empty_like(strain), np.empty_like(strain)
+        trial = []
+        for (model, idx), state in zip(groups, states):
+            stress[idx], tangent[idx], new = model.update(strain[idx], state)
+            trial.append(new)
+        N = A * stress
+        fint = np.bincount(dofs.ravel(), weights=np.column_stack([-N, N]).ravel(), minlength=ndof)
+        return {"strain": strain, "stress": stress, "tangent": tangent, "states": trial, "f": fint}
+
+    def step(lam: float, u: NDArray[float], states: list[State]) -> tuple[bool, Any, list]:
+        u = u.copy()
+        u[prescribed] = lam * ubc[prescribed]
+        ev = evaluate(u, states)
+        residuals: list[float] = []
+        for _ in range(max_iter + 1):
+            r = (lam * F - ev["f"])[free]
+            norm = float(np.linalg.norm(r))
+            residuals.append(norm)
+            ref = max(float(np.linalg.norm(lam * F)), float(np.linalg.norm(ev["f"])))
+            if norm <= tol * ref or norm == 0.0:
+                return True, (u, ev), residuals
+            if len(residuals) > max_iter or not np.isfinite(norm):
+                break
+            k = A * ev["tangent"] / Le
+            vals = (k[:, np.newaxis] * BAR_STIFFNESS).ravel()[keep]
+            try:
+                du = pattern.factor(vals)(r)
+            except (RuntimeError, np.linalg.LinAlgError):
+                break
+            u, ev = search(lam, u, du, norm, states)
+        return False, None, residuals
+
+    def search(
+        lam: float, u: NDArray[float], du: NDArray[float], norm: float, states: list[State]
+    ) -> tuple[NDArray[float], dict[str, Any]]:
+        """Backtrack from the full correction ``du`` until the residual norm decreases"""
+        alpha = 1.0
+        for _ in range(8 if line_search else 1):
+            trial = u.copy()
+            trial[free] += alpha * du
+            ev = evaluate(trial, states)
+            r = np.linalg.norm((lam * F - ev["f"])[free])
+            if r <= (1.0 - 1e-4 * alpha) * norm:
+                break
+            alpha /= 2.0
+        return trial, ev
+
+    u = np.zeros(ndof)
+    states = [model.initial_state(len(idx)) for model, idx in groups]
+    ev = evaluate(u, states)
+    history: list[dict[str, Any]] = []
+    lam, dlam, cutbacks = 0.0, 1.0 / steps, 0
+    while lam < 1.0 - 1e-12:
+        target = min(lam + dlam, 1.0)
+        with recorder.stage("step", load_factor=target):
+            converged, accepted, residuals = step(target, u, states)
+            recorder.annotate(iterations=len(residuals) - 1, converged=converged)
+        if converged:
+            u, ev = accepted
+            states = ev["states"]
+            lam, cutbacks = target, 0
+            history.append(
+                {"load_factor": lam, "iterations": len(residuals) - 1, "residuals": residuals}
+            )
+        elif cutbacks < max_cutbacks:
+            dlam, cutbacks = dlam / 2.0, cutbacks + 1
+        else:
+            logger.warning(f"Newton iteration did not converge at load factor {target:g}")
+            break
+
+    R = ev["f"] - lam * F
+    R[~prescribed] = 0.0
+    soln: dict[str, Any] = {"displ": u, "F": F, "R": R}
+    for name in ("strain", "stress"):
+        soln[name] = np.full(nelem, np.nan)
+        soln[name][elements] = ev[name]
+    soln["force"] = np.full(nelem, np.nan)
+    soln["force"][elements] = A * ev["stress"]
+    soln["state"] = {}
+    for (_, idx), state in zip(groups, states):
+        for name, values in state.items():
+            soln["state"].setdefault(name, np.full(nelem, np.nan))[elements[idx]] = values
+    soln.update(load_factor=lam, converged=lam >= 1.0 - 1e-12, history=history)
+    return soln
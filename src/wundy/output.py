@@ -0,0 +1,228 @@
+"""Streaming output of analysis results.
+
+Results are written to a directory with one ``.npy`` file per field, so that a reader can
+memory-map a single field without reading the others::
+
+    with ResultWriter("results") as out:
+        out.write("displ", soln["displ"])
+        for chunk, u in wundy.sweep.iter_sweep(inp, E=..., nsamples=10**6):
+            out.append("sweep_displ", u)
+
+    displ = ResultReader("results")["displ"]  # read-only memory map
+
+``write`` stores a whole field as soon as it is produced; ``append`` grows a field chunk by chunk
+along its first axis and only holds one chunk in memory.  The stiffness is stored only on
+request, in compressed sparse row form (``K.indptr``, ``K.indices``, ``K.data``).  Closing the
+writer finalizes the appended fields and writes ``summary.json`` (shape, dtype, min and max of
+every field, and metadata) and the same table as ``summary.csv``.
+
+"""
+
+import csv
+import json
+import os
+from typing import IO
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .linalg import issparse
+
+# .npy header size reserved for appended fields, whose shape is only known when closing.  A
+# multiple of 64 bytes keeps the data aligned; it fits a shape of several 20 digit dimensions.
+HEADER_BYTES = 128
+MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def _header(dtype: np.dtype, shape: tuple[int, ...]) -> bytes:
+    """A .npy version 1.0 header padded to ``HEADER_BYTES``"""
+    d = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape}
+    text = repr(d).encode("latin1")
+    n = HEADER_BYTES - len(MAGIC) - 2
+    if len(text) + 1 > n:
+        raise ValueError(f"Array header {text!r} does not fit in {HEADER_BYTES} bytes")
+    return MAGIC + n.to_bytes(2, "little") + text.ljust(n - 1) + b"\n"
+
+
+class _Column:
+    """A .npy file grown by appending chunks along the first axis"""
+
+    def __init__(self, path: str, chunk: NDArray) -> None:
+        self.dtype = chunk.dtype
+        self.shape = chunk.shape[1:]
+        self.nrows = 0
+        self.stats = _Stats()
+        self.fh: IO[bytes] = open(path, "wb")
+        self.fh.write(_header(self.dtype, (0, *self.shape)))
+
+    def append(self, chunk: NDArray) -> None:
+        if chunk.shape[1:] != self.shape:
+            raise ValueError(f"Expected chunks of shape (n, {self.shape}), got {chunk.shape}")
+        self.fh.write(np.ascontiguousarray(chunk, dtype=self.dtype).tobytes())
+        self.nrows += chunk.shape[0]
+        self.stats.update(chunk)
+
+    def close(self) -> tuple[int, ...]:
+        shape = (self.nrows, *self.shape)
+        self.fh.seek(0)
+        self.fh.write(_header(self.dtype, shape))
+        self.fh.close()
+        return shape
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.min = self.max = None
+
+    def update(self, a: NDArray) -> None:
+        if a.dtype.kind not in "biuf":
+            return
+        finite = a[np.isfinite(a)] if a.dtype.kind == "f" else a
+        if finite.size == 0:
+            return
+        lo, hi = finite.min().item(), finite.max().item()
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+
+class ResultWriter:
+    """Write result fields to ``directory`` as they are produced.
+
+    Parameters
+    ----------
+    directory : str
+        Output directory, created if needed.  Existing fields of the same name are overwritten.
+    meta : dict, optional
+        JSON serializable metadata (input file, solver options, ...) stored in the summary.
+
+    """
+
+    def __init__(self, directory: str, meta: dict[str, Any] | None = None) -> None:
+        self.directory = directory
+        self.meta = dict(meta or {})
+        self.fields: dict[str, dict[str, Any]] = {}
+        self._columns: dict[str, _Column] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def write(self, name: str, array: NDArray) -> None:
+        """Write the whole field ``name``"""
+        if name in self.fields or name in self._columns:
+            raise ValueError(f"Field {name!r} already written")
+        array = np.asarray(array)
+        np.save(self.path(name), array)
+        stats = _Stats()
+        stats.update(array)
+        self._record(name, array.shape, array.dtype, stats)
+
+    def append(self, name: str, chunk: NDArray) -> None:
+        """Append ``chunk`` to field ``name`` along its first axis"""
+        chunk = np.asarray(chunk)
+        if chunk.ndim == 0:
+            raise ValueError(f"Cannot append a scalar to field {name!r}")
+        if name in self.fields:
+            raise ValueError(f"Field {name!r} already written")
+        if name not in self._columns:
+            self._columns[name] = _Column(self.path(name), chunk)
+        self._columns[name].append(chunk)
+
+    def write_stiffness(self, K: Any, name: str = "K") -> None:
+        """Write the dense or sparse stiffness in compressed sparse row form"""
+        if issparse(K):
+            K = K.tocsr()
+            indptr, indices, data = K.indptr, K.indices, K.data
+        else:
+            K = np.asarray(K)
+            rows, indices = np.nonzero(K)
+            data = K[rows, indices]
+            indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=K.shape[0]))])
+        self.write(f"{name}.indptr", indptr)
+        self.write(f"{name}.indices", indices)
+        self.write(f"{name}.data", data)
+        self.meta[f"{name}.shape"] = list(K.shape)
+
+    def close(self) -> None:
+        """Finalize appended fields and write the summary"""
+        for name, column in self._columns.items():
+            shape = column.close()
+            self._record(name, shape, column.dtype, column.stats)
+        self._columns.clear()
+        with open(os.path.join(self.directory, "summary.json"), "w") as fh:
+            json.dump({"fields": self.fields, "meta": self.meta}, fh, indent=2)
+        with open(os.path.join(self.directory, "summary.csv"), "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["field", "shape", "dtype", "min", "max"])
+            for name, f in self.fields.items():
+                shape = "x".join(str(n) for n in f["shape"])
+                writer.writerow([name, shape, f["dtype"], f["min"], f["max"]])
+
+    def _record(self, name: str, shape: tuple[int, ...], dtype: np.dtype, stats: _Stats) -> None:
+        self.fields[name] = {
+            "file": os.path.basename(self.path(name)),
+            "shape": list(shape),
+            "dtype": np.dtype(dtype).str,
+            "min": stats.min,
+            "max": stats.max,
+        }
+
+
+class ResultReader:
+    """Read fields written by ``ResultWriter``; each field is memory-mapped on access"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        with open(os.path.join(directory, "summary.json")) as fh:
+            summary = json.load(fh)
+        self.fields: dict[str, dict[str, Any]] = summary["fields"]
+        self.meta: dict[str, Any] = summary["meta"]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def __getitem__(self, name: str) -> NDArray:
+        if name not in self.fields:
+            raise KeyError(name)
+        return np.load(os.path.join(self.directory, self.fields[name]["file"]), mmap_mode="r")
+
+    def stiffness(self, name: str = "K") -> Any:
+        """The stored stiffness as a CSR matrix"""
+        import scipy.sparse as sp
+
+        if f"{name}.data" not in self.fields:
+            raise KeyError(f"No stiffness {name!r} stored in {self.directory}")
+        arrays = (self[f"{name}.data"], self[f"{name}.indices"], self[f"{name}.indptr"])
+        return sp.csr_matrix(arrays, shape=tuple(self.meta[f"{name}.shape"]))
+
+
+def write_results(
+    directory: str,
+    soln: dict[str, Any],
+    post: dict[str, Any] | None = None,
+    store_K: bool = False,
+    meta: dict[str, Any] | None = None,
+) -> None:
+    """Write the solution of ``wundy.first.first_fe_code`` and its post-processed fields.
+
+    The stiffness is only written with ``store_K=True``.
+
+    """
+    fields = {"displ": soln["displ"], "F": soln["F"]}
+    if "R" in soln:
+        fields["reactions"] = soln["R"]
+    if post is not None:
+        fields["reactions"] = post["R"]
+        fields.update((name, post[name]) for name in ("strain", "stress", "force"))
+    with ResultWriter(directory, meta=meta) as out:
+        for name, value in fields.items():
+            out.write(name, value)
+        if store_K:
+            out.write_stiffness(soln["K"])
@@ -0,0 +1,143 @@
+"""Post-processing of a solved bar model.
+
+Element strains, stresses and axial forces and the nodal reactions are computed for all elements
+at once from the displacements.  The reactions are recovered from the element stiffness
+triplets, so the global stiffness is not needed (and a sparse one is never densified).
+
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .assembly import assemble
+from .assembly import assemble_compact
+from .assembly import element_geometry
+from .assembly import element_lengths
+from .assembly import prescribed_dofs
+from .compact import CompactModel
+from .instrument import Recorder
+from .instrument import null_recorder
+
+
+def element_fields(
+    coords: NDArray[float],
+    connect: NDArray[int],
+    u: NDArray[float],
+    materials: dict[str, Any],
+    blocks: dict[str, Any],
+) -> dict[str, NDArray[float]]:
+    """Strain ``du/dx``, stress ``E*strain`` and axial force ``A*stress`` of every element.
+
+    For elements of order higher than 1 these are the means over the element, computed from the
+    displacements of its end nodes.  For truss elements the strain is the elongation along the
+    element axis over the length.
+
+    Returns
+    -------
+    dict of (nelem,) float arrays ``strain``, ``stress`` and ``force``, indexed by element.
+    Elements in no block get NaN.
+
+    """
+    nelem = len(connect)
+    E = np.full(nelem, np.nan)
+    A = np.full(nelem, np.nan)
+    for block in blocks.values():
+        elements = np.asarray(block["elements"], dtype=int).ravel()
+        E[elements] = float(materials[block["material"]]["parameters"]["E"])
+        A[elements] = float(block["element_properties"]["area"])
+    return _fields(coords, connect, u, E, A)
+
+
+def _fields(
+    coords: NDArray[float],
+    connect: NDArray[int],
+    u: NDArray[float],
+    E: NDArray[float],
+    A: NDArray[float],
+) -> dict[str, NDArray[float]]:
+    """``element_fields`` from the modulus and area of every element, NaN for none"""
+    nelem = len(connect)
+    elements = np.flatnonzero(~np.isnan(E))
+    u = np.asarray(u, dtype=float).ravel()
+    strain = np.full(nelem, np.nan)
+    if coords.shape[1] > 1:
+        L, axes = element_geometry(coords, connect, elements)
+        U = u.reshape(-1, coords.shape[1])
+        du = U[connect[elements, 1]] - U[connect[elements, 0]]
+        strain[elements] = np.einsum("ij,ij->i", du, axes) / L
+    else:
+        dofs = connect[elements]
+        strain[elements] = (u[dofs[:, 1]] - u[dofs[:, 0]]) / element_lengths(
+            coords, connect, elements
+        )
+    stress = E * strain
+    return {"strain": strain, "stress": stress, "force": A * stress}
+
+
+def internal_forces(
+    coords: NDArray[float],
+    connect: NDArray[int],
+    u: NDArray[float],
+    materials: dict[str, Any],
+    blocks: dict[str, Any],
+) -> NDArray[float]:
+    """Global internal force vector ``K u``, summed from the element stiffness triplets"""
+    ndof = coords.shape[0] * coords.shape[1]
+    rows, cols, vals = assemble(coords, connect, None, materials, blocks, np.zeros(ndof))
+    return _product(rows, cols, vals, u, ndof)
+
+
+def _product(
+    rows: NDArray[int], cols: NDArray[int], vals: NDArray[float], u: NDArray[float], ndof: int
+) -> NDArray[float]:
+    """``K u`` summed from the stiffness triplets"""
+    u = np.asarray(u, dtype=float).ravel()
+    return np.bincount(rows, weights=vals * u[cols], minlength=ndof)
+
+
+def postprocess(
+    inp: dict[str, Any] | CompactModel, soln: dict[str, Any], recorder: Recorder | None = None
+) -> dict[str, NDArray[float]]:
+    """Element fields and reactions of the solution ``soln`` of ``wundy.first.first_fe_code``.
+
+    Parameters
+    ----------
+    inp : dict or CompactModel
+        Output of ``wundy.ui.preprocess`` that was solved.
+    soln : dict
+        Result of the solve; only its ``displ`` and ``F`` are used.
+    recorder : Recorder, optional
+        Records the ``postprocess`` stage.
+
+    Returns
+    -------
+    dict with:
+      "strain", "stress", "force" : (nelem,) float arrays, see ``element_fields``
+      "R" : (ndof,) float array, reactions K u - F at the Dirichlet DOFs, zero elsewhere
+
+    """
+    recorder = recorder or null_recorder
+    if isinstance(inp, CompactModel):
+        # Straight from the per-element arrays, without looking up blocks and materials
+        model = inp
+        with recorder.stage("postprocess", nelem=len(model.connect)):
+            u = soln["displ"]
+            fields = _fields(model.coords, model.connect, u, model.modulus, model.area)
+            prescribed, _ = prescribed_dofs(model.doftags, model.dofvals)
+            rows, cols, vals = assemble_compact(model, np.zeros(model.ndof), dload=False)
+            R = _product(rows, cols, vals, u, model.ndof) - soln["F"]
+            R[~prescribed] = 0.0
+        return {**fields, "R": R}
+
+    coords, connect = inp["coords"], inp["connect"]
+    with recorder.stage("postprocess", nelem=len(connect)):
+        args = (coords, connect, soln["displ"], inp["materials"], inp["element blocks"])
+        fields = element_fields(*args)
+        prescribed, _ = prescribed_dofs(inp["doftags"], inp["dofvals"])
+        R = internal_forces(*args) - soln["F"]
+        R[~prescribed] = 0.0
+    return {**fields, "R": R}
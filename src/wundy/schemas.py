@@ -1,176 +1,315 @@
 from typing import Any
 
 import numpy as np
-from schema import And
-from schema import Optional
-from schema import Or
-from schema import Schema
-from schema import Use
+
+from .materials import MATERIALS
 
 NEUMANN = 0
 DIRICHLET = 1
 
+# Nodes per element of the Lagrange bar element types t1d<order>, see ``wundy.elements``
+ELEMENT_NODES = {"t1d1": 2, "t1d2": 3, "t1d3": 4}
+
 
 def validate_material_parameters(material: dict[str, dict[str, Any]]) -> bool:
-    elastic = Schema(
-        {
-            "E": And(float, lambda x: x > 0.0, error="E must be > 0"),
-            "nu": And(
-                float, lambda x: -1.0 <= x < 0.5, error="nu must be between -1 and .5"
-            ),
-        }
-    )
-    if material["type"] == "elastic":
-        elastic.validate(material["parameters"])
-    else:
+    """Validate parameters with the material model registered for the type, see ``MATERIALS``"""
+    if material["type"] not in MATERIALS:
         raise ValueError(f"Unknown material {material['type']!r}")
+    v = MATERIALS[material["type"]].validate(material["parameters"])
+    material["parameters"].update(v)
     return True
 
 
 def validate_element_properties(block: dict[str, dict[str, Any]]) -> bool:
-    t1d1 = Schema({Optional("area", default=1.0): And(float, lambda a: a > 0)})
-    if block["element_type"].lower() == "t1d1":
-        v = t1d1.validate(block["element_properties"])
+    from schema import And
+    from schema import Optional
+    from schema import Schema
+
+    bar = Schema({Optional("area", default=1.0): And(float, lambda a: a > 0)})
+    if block["element_type"].lower() in ELEMENT_NODES:
+        v = bar.validate(block["element_properties"])
         block["element_properties"].update(v)
     else:
         raise ValueError(f"Unknown element type {block['element_type']!r}")
     return True
 
 
-coords_schema = Schema(
-    And(
-        list,
-        lambda f: all(isinstance(n, (float, int)) for n in f),
-        Use(lambda x: np.array([[_] for _ in x], dtype=float)),
-    )
-)
-connect_schema = Schema(
-    And(
-        list,
-        lambda outer: all(isinstance(inner, list) for inner in outer),
-        lambda outer: all(isinstance(n, int) for inner in outer for n in inner),
-        Use(lambda x: np.array(x, dtype=int)),
-    )
-)
+# Vectorized validators used by the fast loading path (``wundy.ui.load(..., fast=True)``).  Each
+# converts a whole list with one NumPy call and checks dtype and shape on the resulting array
+# instead of running a Python predicate per entry.
+def _numeric_array(x: Any, kinds: str, ndim: int, what: str) -> np.ndarray:
+    if not isinstance(x, (list, np.ndarray)):
+        raise ValueError(f"{what} must be a list")
+    try:
+        a = np.asarray(x)
+    except ValueError:
+        raise ValueError(f"{what} must be a rectangular list") from None
+    if a.size == 0:
+        return a.reshape((0,) * ndim)
+    if a.dtype.kind not in kinds:
+        raise ValueError(f"{what} has entries of the wrong type")
+    if a.ndim != ndim:
+        raise ValueError(f"{what} must be {ndim} dimensional")
+    return a
 
-nset_schema = Schema(
-    {
-        "name": And(str, Use(lambda s: s.lower())),
-        "nodes": And(
-            list,
-            lambda f: all(isinstance(n, int) for n in f),
-            Use(lambda x: np.array(x, dtype=int)),
-        ),
-    },
-)
-
-elset_schema = Schema(
-    {
-        "name": And(str, Use(lambda s: s.lower())),
-        "elements": And(
+
+# Arrays read from binary mesh files are only copied if their dtype has to be converted
+def coords_array(x: Any) -> np.ndarray:
+    if isinstance(x, np.ndarray) and x.ndim == 2 or isinstance(x, list) and x and _is_list(x[0]):
+        a = _numeric_array(x, "biuf", 2, "coords")
+        if not 1 <= a.shape[1] <= 3:
+            raise ValueError("coords must have 1, 2 or 3 components")
+        return a.astype(float, copy=False)
+    return _numeric_array(x, "biuf", 1, "coords").astype(float, copy=False).reshape(-1, 1)
+
+
+def _is_list(x: Any) -> bool:
+    return isinstance(x, (list, np.ndarray))
+
+
+def connect_array(x: Any) -> np.ndarray:
+    return _numeric_array(x, "biu", 2, "connect").astype(int, copy=False)
+
+
+def index_array(x: Any) -> np.ndarray:
+    return _numeric_array(x, "biu", 1, "index list").astype(int, copy=False)
+
+
+def validate_mesh_bounds(data: dict[str, dict[str, Any]]) -> bool:
+    """Check that connectivity and set members are valid node/element indices"""
+    from schema import SchemaError
+
+    inp = data["wundy"]
+    num_node, num_elem = len(inp["coords"]), len(inp["connect"])
+    checks = [("connect", inp["connect"], num_node)]
+    checks.extend((f"nset {ns['name']}", ns["nodes"], num_node) for ns in inp.get("nset", []))
+    checks.extend((f"elset {es['name']}", es["elements"], num_elem) for es in inp.get("elset", []))
+    for eb in inp["element block"]:
+        if not isinstance(eb["elements"], str):
+            checks.append((f"element block {eb['name']}", np.asarray(eb["elements"]), num_elem))
+    for what, a, n in checks:
+        if a.size and (a.min() < 0 or a.max() >= n):
+            raise SchemaError(f"{what} has indices outside of [0, {n})")
+    return True
+
+
+# The Schema objects below are built on first access (see ``__getattr__``) so that importing
+# wundy does not import the schema library or construct every schema up front.
+_schemas: dict[str, Any] = {}
+
+
+def __getattr__(name: str) -> Any:
+    if name.endswith("_schema"):
+        if not _schemas:
+            _schemas.update(_build_schemas())
+        if name in _schemas:
+            return _schemas[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _build_schemas() -> dict[str, Any]:
+    from schema import And
+    from schema import Optional
+    from schema import Or
+    from schema import Schema
+    from schema import Use
+
+    # A list of x coordinates, or of [x], [x, y] or [x, y, z] points for a truss
+    coords_schema = Schema(
+        Or(
+            And(
+                list,
+                lambda f: all(isinstance(n, (float, int)) for n in f),
+                Use(lambda x: np.array([[_] for _ in x], dtype=float)),
+            ),
+            And(
+                list,
+                lambda f: all(isinstance(p, list) and len(p) == len(f[0]) for p in f),
+                lambda f: 1 <= len(f[0]) <= 3,
+                lambda f: all(isinstance(n, (float, int)) for p in f for n in p),
+                Use(lambda x: np.array(x, dtype=float)),
+            ),
+        )
+    )
+    connect_schema = Schema(
+        And(
             list,
-            lambda f: all(isinstance(n, int) for n in f),
+            lambda outer: all(isinstance(inner, list) for inner in outer),
+            lambda outer: all(isinstance(n, int) for inner in outer for n in inner),
             Use(lambda x: np.array(x, dtype=int)),
-        ),
-    },
-)
+        )
+    )
 
-boundary_schema = Schema(
-    And(
+    nset_schema = Schema(
         {
-            Optional("amplitude", default=0.0): Use(float),
-            Optional("type", default="dirichlet"): And(
-                str,
-                lambda s: s.lower() in ("dirichlet", "neumann"),
-                Use(lambda s: s.lower()),
-            ),
-            Optional("dof", default=0): And(
-                str,
-                lambda s: s.lower() in "x",  # extension to 2/3D: allow dof to be xyz
-                Use(lambda x: {"x": 0, "y": 1, "z": 2}[x.lower()]),
+            "name": And(str, Use(lambda s: s.lower())),
+            "nodes": And(
+                list,
+                lambda f: all(isinstance(n, int) for n in f),
+                Use(lambda x: np.array(x, dtype=int)),
             ),
-            Or("node", "nset"): object,
         },
-        lambda d: ("node" in d) ^ ("nset" in d),
-        lambda d: not ("node" in d and "nset" in d),
-        lambda d: isinstance(d.get("node"), int) if "node" in d else True,
-        lambda d: isinstance(d.get("nset"), str) if "nset" in d else True,
     )
-)
-cload_schema = Schema(
-    And(
+
+    elset_schema = Schema(
         {
-            Optional("amplitude", default=0.0): Use(float),
-            Optional("dof", default=0): And(
-                str,
-                lambda s: s.lower() in "x",  # extension to 2/3D: allow dof to be xyz
-                Use(lambda x: {"x": 0, "y": 1, "z": 2}[x.lower()]),
+            "name": And(str, Use(lambda s: s.lower())),
+            "elements": And(
+                list,
+                lambda f: all(isinstance(n, int) for n in f),
+                Use(lambda x: np.array(x, dtype=int)),
             ),
-            Or("node", "nset"): object,
         },
-        lambda d: ("node" in d) ^ ("nset" in d),
-        lambda d: not ("node" in d and "nset" in d),
-        lambda d: isinstance(d.get("node"), int) if "node" in d else True,
-        lambda d: isinstance(d.get("nset"), str) if "nset" in d else True,
     )
-)
-dload_schema = Schema(
-    And(
+
+    boundary_schema = Schema(
+        And(
+            {
+                Optional("amplitude", default=0.0): Use(float),
+                Optional("type", default="dirichlet"): And(
+                    str,
+                    lambda s: s.lower() in ("dirichlet", "neumann"),
+                    Use(lambda s: s.lower()),
+                ),
+                Optional("dof", default=0): And(
+                    str,
+                    lambda s: s.lower() in ("x", "y", "z"),
+                    Use(lambda x: {"x": 0, "y": 1, "z": 2}[x.lower()]),
+                ),
+                Or("node", "nset"): object,
+            },
+            lambda d: ("node" in d) ^ ("nset" in d),
+            lambda d: not ("node" in d and "nset" in d),
+            lambda d: isinstance(d.get("node"), int) if "node" in d else True,
+            lambda d: isinstance(d.get("nset"), str) if "nset" in d else True,
+        )
+    )
+    cload_schema = Schema(
+        And(
+            {
+                Optional("amplitude", default=0.0): Use(float),
+                Optional("dof", default=0): And(
+                    str,
+                    lambda s: s.lower() in ("x", "y", "z"),
+                    Use(lambda x: {"x": 0, "y": 1, "z": 2}[x.lower()]),
+                ),
+                Or("node", "nset"): object,
+            },
+            lambda d: ("node" in d) ^ ("nset" in d),
+            lambda d: not ("node" in d and "nset" in d),
+            lambda d: isinstance(d.get("node"), int) if "node" in d else True,
+            lambda d: isinstance(d.get("nset"), str) if "nset" in d else True,
+        )
+    )
+    dload_schema = Schema(
+        And(
+            {
+                Optional("amplitude", default=0.0): Use(float),
+                Optional("dof", default=0): And(
+                    str,
+                    lambda s: s.lower() in ("x", "y", "z"),
+                    Use(lambda x: {"x": 0, "y": 1, "z": 2}[x.lower()]),
+                ),
+                Or("element", "elset"): object,
+            },
+            lambda d: ("element" in d) ^ ("elset" in d),
+            lambda d: not ("element" in d and "elset" in d),
+            lambda d: isinstance(d.get("element"), int) if "element" in d else True,
+            lambda d: isinstance(d.get("elset"), str) if "elset" in d else True,
+        )
+    )
+
+    material_schema = Schema(
+        And(
+            {
+                "type": And(str, Use(lambda s: s.lower())),
+                "name": And(str, Use(lambda s: s.lower())),
+                "parameters": {str: object},
+            },
+            lambda d: validate_material_parameters(d),
+        )
+    )
+    block_schema = Schema(
+        And(
+            {
+                "name": And(str, Use(lambda s: s.lower())),
+                "material": And(str, Use(lambda s: s.lower())),
+                "elements": Or(
+                    And(str, Use(lambda s: s.lower())),
+                    And(list, lambda outer: all(isinstance(_, int) for _ in outer)),
+                ),
+                "element_type": And(
+                    str, lambda s: s.lower() in ELEMENT_NODES, Use(lambda n: n.lower())
+                ),
+                Optional("element_properties", default=lambda: {}): dict,
+            },
+            lambda d: validate_element_properties(d),
+        )
+    )
+    input_schema = Schema(
         {
-            Optional("amplitude", default=0.0): Use(float),
-            Optional("dof", default=0): And(
-                str,
-                lambda s: s.lower() in "x",  # extension to 2/3D: allow dof to be xyz
-                Use(lambda x: {"x": 0, "y": 1, "z": 2}[x.lower()]),
-            ),
-            Or("element", "elset"): object,
-        },
-        lambda d: ("element" in d) ^ ("elset" in d),
-        lambda d: not ("element" in d and "elset" in d),
-        lambda d: isinstance(d.get("element"), int) if "element" in d else True,
-        lambda d: isinstance(d.get("elset"), str) if "elset" in d else True,
+            "wundy": {
+                "coords": coords_schema,
+                "connect": connect_schema,
+                Optional("nset"): [nset_schema],
+                Optional("elset"): [elset_schema],
+                "boundary": [boundary_schema],
+                Optional("cload"): [cload_schema],
+                Optional("dload"): [dload_schema],
+                "material": [material_schema],
+                "element block": [block_schema],
+            }
+        }
     )
-)
 
-material_schema = Schema(
-    And(
+    fast_coords_schema = Schema(Use(coords_array))
+    fast_connect_schema = Schema(Use(connect_array))
+    fast_nset_schema = Schema(
         {
-            "type": And(str, Use(lambda s: s.lower())),
             "name": And(str, Use(lambda s: s.lower())),
-            "parameters": {str: object},
+            "nodes": Use(index_array),
         },
-        lambda d: validate_material_parameters(d),
     )
-)
-block_schema = Schema(
-    And(
+    fast_elset_schema = Schema(
         {
             "name": And(str, Use(lambda s: s.lower())),
-            "material": And(str, Use(lambda s: s.lower())),
-            "elements": Or(
-                And(str, Use(lambda s: s.lower())),
-                And(list, lambda outer: all(isinstance(_, int) for _ in outer)),
-            ),
-            "element_type": And(
-                str, lambda s: s.lower() in ("t1d1",), Use(lambda n: n.lower())
-            ),
-            Optional("element_properties", default=dict()): dict,
+            "elements": Use(index_array),
         },
-        lambda d: validate_element_properties(d),
     )
-)
-input_schema = Schema(
-    {
-        "wundy": {
-            "coords": coords_schema,
-            "connect": connect_schema,
-            Optional("nset"): [nset_schema],
-            Optional("elset"): [elset_schema],
-            "boundary": [boundary_schema],
-            Optional("cload"): [cload_schema],
-            Optional("dload"): [dload_schema],
-            "material": [material_schema],
-            "element block": [block_schema],
-        }
-    }
-)
+    fast_block_schema = Schema(
+        And(
+            {
+                "name": And(str, Use(lambda s: s.lower())),
+                "material": And(str, Use(lambda s: s.lower())),
+                "elements": Or(
+                    And(str, Use(lambda s: s.lower())),
+                    And(list, Use(lambda x: index_array(x).tolist())),
+                ),
+                "element_type": And(
+                    str, lambda s: s.lower() in ELEMENT_NODES, Use(lambda n: n.lower())
+                ),
+                Optional("element_properties", default=lambda: {}): dict,
+            },
+            lambda d: validate_element_properties(d),
+        )
+    )
+    fast_input_schema = Schema(
+        And(
+            {
+                "wundy": {
+                    "coords": fast_coords_schema,
+                    "connect": fast_connect_schema,
+                    Optional("nset"): [fast_nset_schema],
+                    Optional("elset"): [fast_elset_schema],
+                    "boundary": [boundary_schema],
+                    Optional("cload"): [cload_schema],
+                    Optional("dload"): [dload_schema],
+                    "material": [material_schema],
+                    "element block": [fast_block_schema],
+                }
+            },
+            validate_mesh_bounds,
+        )
+    )
+
+    return {name: obj for name, obj in locals().items() if name.endswith("_schema")}
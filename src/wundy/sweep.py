@@ -0,0 +1,310 @@
+"""Parameter sweeps and Monte Carlo analyses over element block areas and material moduli.
+
+The stiffness of a bar element is ``A*E/Le``, linear in the sampled parameters, so all samples
+of a sweep are assembled as an (nelem, nsamples) array of element stiffness factors and their
+systems solved together: the condensed stiffness of a bar whose nodes are numbered along it is
+tridiagonal, and one Thomas sweep over the rows solves all samples at once.  Meshes whose free
+DOFs do not couple tridiagonally fall back to one sparse solve per sample.
+
+Samples are processed in chunks of ``chunk_size`` to bound memory::
+
+    inp = wundy.ui.preprocess(wundy.ui.load(file))
+    soln = sweep(
+        inp,
+        area={"block-1": lambda rng, n: rng.lognormal(0.0, 0.1, n)},
+        E={"mat-1": np.linspace(9.0, 11.0, 1000)},
+        seed=0,
+    )
+    soln["displ"]  # (1000, ndof)
+
+"""
+
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import Protocol
+from typing import Sequence
+from typing import Union
+from typing import runtime_checkable
+
+import numpy as np
+from numpy.typing import ArrayLike
+from numpy.typing import NDArray
+
+from .assembly import consistent_loads
+from .assembly import element_lengths
+from .assembly import nodal_loads
+from .assembly import prescribed_dofs
+from .linalg import solve_sparse
+from .linalg import solve_tridiagonal_batch
+
+
+@runtime_checkable
+class Distribution(Protocol):
+    """A distribution drawing samples like those of ``scipy.stats``"""
+
+    def rvs(self, size: int, random_state: np.random.Generator) -> ArrayLike: ...
+
+
+# A sample specification: a value or explicit samples, a callable ``f(rng, n)`` returning ``n``
+# samples, or a distribution with an ``rvs(size=..., random_state=...)`` method (scipy.stats)
+Samples = Union[ArrayLike, Callable[[np.random.Generator, int], ArrayLike], Distribution]
+
+# Default chunk size keeps the (nelem, chunk) stiffness factors at about 64 MB
+CHUNK_BYTES = 64 * 2**20
+
+
+def draw_samples(
+    spec: dict[str, Samples], nsamples: int, rng: np.random.Generator, what: str
+) -> dict[str, NDArray[float]]:
+    """Evaluate each sample specification in ``spec`` to an array of ``nsamples`` values"""
+    samples: dict[str, NDArray[float]] = {}
+    for name, value in spec.items():
+        if isinstance(value, Distribution):
+            value = value.rvs(size=nsamples, random_state=rng)
+        elif callable(value):
+            value = value(rng, nsamples)
+        value = np.asarray(value, dtype=float)
+        if value.ndim == 0:
+            value = np.full(nsamples, float(value))
+        if value.shape != (nsamples,):
+            raise ValueError(
+                f"Expected {nsamples} samples of {what} {name!r}, got shape {value.shape}"
+            )
+        samples[name] = value
+    return samples
+
+
+def _count_samples(specs: list[dict[str, Samples]]) -> int | None:
+    sizes = {
+        np.shape(value)[0]
+        for spec in specs
+        for value in spec.values()
+        if not callable(value) and not hasattr(value, "rvs") and np.ndim(value) == 1
+    }
+    if len(sizes) > 1:
+        raise ValueError(f"Sample arrays have different lengths {sorted(sizes)}")
+    return sizes.pop() if sizes else None
+
+
+class Sweep:
+    """Element stiffness factors and condensed system layout shared by all samples of a sweep.
+
+    Parameters
+    ----------
+    inp : dict
+        Output of ``wundy.ui.preprocess``.  Its areas and moduli are the nominal values of
+        parameters that are not sampled; its loads and prescribed displacements apply to all
+        samples.
+
+    """
+
+    def __init__(self, inp: dict[str, Any]) -> None:
+        coords, connect = inp["coords"], inp["connect"]
+        if connect.shape[1] != 2:
+            raise ValueError("Sweeps support t1d1 (2-node) elements only")
+        materials, blocks = inp["materials"], inp["element blocks"]
+        self.ndof = coords.shape[0] * coords.shape[1]
+        self.blocks = list(blocks)
+        self.materials = list(materials)
+        self.nominal_area = {b: float(blocks[b]["element_properties"]["area"]) for b in blocks}
+        self.nominal_E = {m: float(materials[m]["parameters"]["E"]) for m in materials}
+
+        # Block and material (as indices into the sampled parameters) of each element
+        elements: list[NDArray[int]] = []
+        block_index: list[NDArray[int]] = []
+        material_index: list[NDArray[int]] = []
+        for i, block in enumerate(blocks.values()):
+            elems = np.asarray(block["elements"], dtype=int).ravel()
+            elements.append(elems)
+            block_index.append(np.full(len(elems), i))
+            material_index.append(np.full(len(elems), self.materials.index(block["material"])))
+        self.elements = np.concatenate(elements) if elements else np.zeros(0, dtype=int)
+        self.block_index = np.concatenate(block_index) if elements else self.elements
+        self.material_index = np.concatenate(material_index) if elements else self.elements
+        self.Le = element_lengths(coords, connect, self.elements)
+        dofs = connect[self.elements] * coords.shape[1]
+
+        # Load vector: the same for all samples
+        self.F = nodal_loads(inp["doftags"], inp["dofvals"])
+        if len(inp["dload"]) > 0:
+            consistent_loads(self.F, dofs, self.elements, self.Le, inp["dload"])
+
+        # Condensed system on the free DOFs; -1 marks a prescribed DOF
+        self.prescribed, self.ubc = prescribed_dofs(inp["doftags"], inp["dofvals"])
+        self.free = np.flatnonzero(~self.prescribed)
+        index = np.full(self.ndof, -1)
+        index[self.free] = np.arange(len(self.free))
+        self.dofs = dofs
+        self.index = index[dofs]
+        coupled = np.all(self.index >= 0, axis=1)
+        self.tridiagonal = bool(np.all(np.abs(np.diff(self.index[coupled], axis=1)) == 1))
+
+    def stiffness_factors(
+        self, area: dict[str, NDArray[float]], E: dict[str, NDArray[float]], n: int
+    ) -> NDArray[float]:
+        """The (nelem, n) factors ``A*E/Le`` of ``n`` samples of block areas and moduli"""
+        A = np.array([area.get(b, np.full(n, self.nominal_area[b])) for b in self.blocks])
+        Em = np.array([E.get(m, np.full(n, self.nominal_E[m])) for m in self.materials])
+        if len(self.elements) == 0:
+            return np.zeros((0, n))
+        return A[self.block_index] * Em[self.material_index] / self.Le[:, np.newaxis]
+
+    def solve(self, k: NDArray[float], samples: Sequence[int] | None = None) -> NDArray[float]:
+        """Displacements (n, ndof) for the (nelem, n) element stiffness factors ``k``.
+
+        ``samples`` numbers the ``n`` samples in the error raised for a singular stiffness.
+
+        """
+        n = k.shape[1]
+        nfree = len(self.free)
+        u = np.tile(self.ubc, (n, 1))
+        if nfree == 0:
+            return u
+
+        # Right-hand side F_f - K_fp u_p: an element with one free end a and one prescribed
+        # end b contributes +k u_b to a
+        rhs = np.tile(self.F[self.free, np.newaxis], (1, n))
+        for a, b in ((0, 1), (1, 0)):
+            mask = (self.index[:, a] >= 0) & (self.index[:, b] < 0)
+            ub = self.ubc[self.dofs[mask, b]]
+            np.add.at(rhs, self.index[mask, a], k[mask] * ub[:, np.newaxis])
+
+        if self.tridiagonal:
+            diag = np.zeros((nfree, n))
+            off = np.zeros((max(nfree - 1, 0), n))
+            for a in (0, 1):
+                mask = self.index[:, a] >= 0
+                np.add.at(diag, self.index[mask, a], k[mask])
+            coupled = np.all(self.index >= 0, axis=1)
+            np.add.at(off, self.index[coupled].min(axis=1), -k[coupled])
+            x = solve_tridiagonal_batch(diag, off, rhs, labels=samples)
+        else:
+            x = self._solve_general(k, rhs)
+        u[:, self.free] = x.T
+        return u
+
+    def _solve_general(self, k: NDArray[float], rhs: NDArray[float]) -> NDArray[float]:
+        import scipy.sparse as sp
+
+        nfree = len(self.free)
+        # Triplets of the condensed element stiffness [[k, -k], [-k, k]] on free DOFs only
+        ij = [(a, b) for a in (0, 1) for b in (0, 1)]
+        masks = [(self.index[:, a] >= 0) & (self.index[:, b] >= 0) for a, b in ij]
+        rows = np.concatenate([self.index[m, a] for (a, _), m in zip(ij, masks)])
+        cols = np.concatenate([self.index[m, b] for (_, b), m in zip(ij, masks)])
+        sign = np.concatenate(
+            [np.full(m.sum(), 1.0 if a == b else -1.0) for (a, b), m in zip(ij, masks)]
+        )
+        x = np.empty_like(rhs)
+        for s in range(k.shape[1]):
+            vals = sign * np.concatenate([k[m, s] for m in masks])
+            K = sp.coo_matrix((vals, (rows, cols)), shape=(nfree, nfree)).tocsr()
+            x[:, s] = solve_sparse(K, rhs[:, s])
+        return x
+
+
+def iter_sweep(
+    inp: dict[str, Any],
+    area: dict[str, Samples] | None = None,
+    E: dict[str, Samples] | None = None,
+    nsamples: int | None = None,
+    chunk_size: int | None = None,
+    seed: int | np.random.Generator | None = None,
+) -> Iterator[tuple[slice, NDArray[float]]]:
+    """Solve a sweep chunk by chunk, yielding ``(samples, displ)`` for each chunk.
+
+    ``samples`` is the slice of sample indices covered by the (len, ndof) displacements
+    ``displ``.  Arguments are as for ``sweep``; only one chunk of results is held at a time.
+
+    """
+    model = Sweep(inp)
+    samples = _draw(model, area or {}, E or {}, nsamples, seed)
+    yield from _solve_chunks(model, *samples, chunk_size)
+
+
+def sweep(
+    inp: dict[str, Any],
+    area: dict[str, Samples] | None = None,
+    E: dict[str, Samples] | None = None,
+    nsamples: int | None = None,
+    chunk_size: int | None = None,
+    seed: int | np.random.Generator | None = None,
+) -> dict[str, Any]:
+    """Solve the model of ``inp`` for many samples of element block areas and material moduli.
+
+    Parameters
+    ----------
+    inp : dict
+        Output of ``wundy.ui.preprocess``.
+    area : dict, optional
+        Samples of the cross-sectional area per element block name.
+    E : dict, optional
+        Samples of the Young's modulus per material name.
+    nsamples : int, optional
+        Number of samples.  Required only when no explicit sample arrays are given.
+    chunk_size : int, optional
+        Samples solved at once.  Defaults to as many as fit the element stiffness factors of a
+        chunk in about 64 MB.
+    seed : int or numpy.random.Generator, optional
+        Seed of the generator passed to sampling callables and distributions.
+
+    Each sample specification is a scalar, an array of ``nsamples`` values, a callable
+    ``f(rng, n)`` returning ``n`` samples or a distribution with an ``rvs`` method such as a
+    frozen ``scipy.stats`` distribution.  Parameters not given keep their values from ``inp``.
+
+    Returns
+    -------
+    dict with the (nsamples, ndof) displacements ``displ`` and the sampled ``area`` and ``E``
+    per block and material name
+
+    """
+    model = Sweep(inp)
+    area_samples, E_samples, n = _draw(model, area or {}, E or {}, nsamples, seed)
+    displ = np.empty((n, model.ndof))
+    for chunk, u in _solve_chunks(model, area_samples, E_samples, n, chunk_size):
+        displ[chunk] = u
+    return {"displ": displ, "area": area_samples, "E": E_samples}
+
+
+def _draw(
+    model: Sweep,
+    area: dict[str, Samples],
+    E: dict[str, Samples],
+    nsamples: int | None,
+    seed: int | np.random.Generator | None,
+) -> tuple[dict[str, NDArray[float]], dict[str, NDArray[float]], int]:
+    for name in area:
+        if name not in model.nominal_area:
+            raise ValueError(f"Unknown element block {name!r}")
+    for name in E:
+        if name not in model.nominal_E:
+            raise ValueError(f"Unknown material {name!r}")
+    if nsamples is None:
+        nsamples = _count_samples([area, E])
+        if nsamples is None:
+            raise ValueError("nsamples is required when no sample arrays are given")
+    rng = np.random.default_rng(seed)
+    area_samples = draw_samples(area, nsamples, rng, "element block")
+    E_samples = draw_samples(E, nsamples, rng, "material")
+    return area_samples, E_samples, nsamples
+
+
+def _solve_chunks(
+    model: Sweep,
+    area: dict[str, NDArray[float]],
+    E: dict[str, NDArray[float]],
+    nsamples: int,
+    chunk_size: int | None,
+) -> Iterator[tuple[slice, NDArray[float]]]:
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_BYTES // (8 * max(len(model.elements), 1)))
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    for start in range(0, nsamples, chunk_size):
+        chunk = slice(start, min(start + chunk_size, nsamples))
+        a = {name: value[chunk] for name, value in area.items()}
+        e = {name: value[chunk] for name, value in E.items()}
+        n = chunk.stop - chunk.start
+        samples = range(chunk.start, chunk.stop)
+        yield chunk, model.solve(model.stiffness_factors(a, e, n), samples)
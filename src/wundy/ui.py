@@ -1,28 +1,145 @@
+from __future__ import annotations
+
 import logging
+import os
 from typing import IO
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import Literal
+from typing import overload
 
 import numpy as np
-import yaml
+from numpy.typing import NDArray
 
+from . import schemas
+from .instrument import Recorder
+from .instrument import null_recorder
 from .schemas import DIRICHLET
+from .schemas import ELEMENT_NODES
 from .schemas import NEUMANN
-from .schemas import input_schema
+
+if TYPE_CHECKING:
+    from .compact import CompactModel
 
 logger = logging.getLogger(__name__)
 
 
-def load(file: IO[Any]) -> dict[str, dict[str, Any]]:
-    data = yaml.safe_load(file)
-    return input_schema.validate(data)
+def load(
+    file: IO[Any], fast: bool = False, recorder: Recorder | None = None
+) -> dict[str, dict[str, Any]]:
+    """Load and validate user input.
+
+    With ``fast=True`` the file is parsed with the libyaml C loader (when available) and the
+    mesh arrays (``coords``, ``connect``, set members) are converted and validated with
+    vectorized NumPy checks, including index bounds, instead of per-entry Python predicates.
+    The validated structure is the same.  Mesh arrays may also be read from binary files, see
+    ``load_mesh_files``; these are always validated with the vectorized checks.
+
+    The ``parse`` and ``validate`` stages are recorded by ``recorder``, if given.
+
+    """
+    import yaml
+
+    recorder = recorder or null_recorder
+    with recorder.stage("parse"):
+        if fast:
+            # libyaml's C loader when PyYAML was built against it
+            data = yaml.load(file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        else:
+            data = yaml.safe_load(file)
+        name = getattr(file, "name", None)
+        basedir = os.path.dirname(name) if isinstance(name, str) else os.getcwd()
+        if load_mesh_files(data, basedir):
+            # Arrays read from binary files can only be validated by the vectorized schemas
+            fast = True
+    with recorder.stage("validate"):
+        schema = schemas.fast_input_schema if fast else schemas.input_schema
+        return schema.validate(data)
+
+
+def load_mesh_files(data: Any, basedir: str) -> bool:
+    """Replace references to binary mesh files in ``data`` with the arrays they contain.
+
+    ``coords``, ``connect``, ``nset`` nodes and ``elset`` elements may be given as
+    ``{file: path}`` instead of a list.  ``.npy`` files are memory-mapped read-only, so large
+    meshes are not read until used and their pages are shared between processes.  ``.npz``
+    archives are read eagerly; the array is taken from ``key``, which defaults to the name of
+    the field.  Relative paths are relative to ``basedir``.
+
+    Returns True if any array was read from a file.
+
+    """
+    inp = data.get("wundy") if isinstance(data, dict) else None
+    if not isinstance(inp, dict):
+        return False
+    refs: list[tuple[dict[str, Any], str]] = [(inp, "coords"), (inp, "connect")]
+    for group, field in (("nset", "nodes"), ("elset", "elements")):
+        if isinstance(inp.get(group), list):
+            refs.extend((item, field) for item in inp[group] if isinstance(item, dict))
+    found = False
+    for parent, field in refs:
+        if isinstance(parent.get(field), dict):
+            parent[field] = read_mesh_array(parent[field], field, basedir)
+            found = True
+    return found
+
+
+def read_mesh_array(ref: dict[str, Any], field: str, basedir: str) -> NDArray:
+    from schema import SchemaError
+
+    if "file" not in ref or not set(ref).issubset({"file", "key"}):
+        raise SchemaError(f"{field}: expected a list or {{file: path, key: name}}")
+    path = os.path.join(basedir, os.path.expanduser(ref["file"]))
+    if path.endswith(".npz"):
+        key = ref.get("key", field)
+        with np.load(path) as archive:
+            if key not in archive:
+                raise SchemaError(f"{field}: array {key!r} not found in {ref['file']}")
+            return archive[key]
+    return np.load(path, mmap_mode="r")
+
+
+@overload
+def preprocess(
+    data: dict[str, dict[str, Any]],
+    recorder: Recorder | None = None,
+    compact: Literal[False] = False,
+) -> dict[str, Any]: ...
+
+
+@overload
+def preprocess(
+    data: dict[str, dict[str, Any]], recorder: Recorder | None = None, *, compact: Literal[True]
+) -> CompactModel: ...
+
+
+@overload
+def preprocess(
+    data: dict[str, dict[str, Any]], recorder: Recorder | None = None, compact: bool = False
+) -> dict[str, Any] | CompactModel: ...
 
 
-def preprocess(data: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+def preprocess(
+    data: dict[str, dict[str, Any]], recorder: Recorder | None = None, compact: bool = False
+) -> dict[str, Any] | CompactModel:
     """Preprocess and transform user input.
 
     Assumptions: User input was loaded and validated by ``load``
 
+    With ``compact`` the model is returned as a ``wundy.compact.CompactModel`` instead of a
+    dictionary; every element must then belong to exactly one element block.  The same checks
+    are made, but the block, area and modulus of every element are written straight into arrays
+    and node and element sets are kept as ranges or int arrays, without building the element
+    lists of the dictionary form.
+
     """
+    with (recorder or null_recorder).stage("preprocess"):
+        return _preprocess(data, compact=compact)
+
+
+def _preprocess(
+    data: dict[str, dict[str, Any]], compact: bool = False
+) -> dict[str, Any] | CompactModel:
     errors: int = 0
 
     inp = data["wundy"]
@@ -34,25 +151,31 @@ def preprocess(data: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
     num_node, dof_per_node = coords.shape
     num_elem, node_per_elem = connect.shape
 
+    # Sets are ranges or int arrays in the compact form, lists or arrays in the dictionary form
+    if compact:
+        from .compact import index_set
+    else:
+        index_set = _identity
+
     # Put node sets in dictionary for easier look up
     nodesets = preprocessed.setdefault("nodesets", {})
-    nodesets["all"] = list(range(num_node))
+    nodesets["all"] = range(num_node) if compact else list(range(num_node))
     for ns in inp.get("nset", []):
         if ns["name"] in nodesets:
             errors += 1
             logger.error(f"Duplicate node set {ns['name']}")
         else:
-            nodesets[ns["name"]] = ns["nodes"]
+            nodesets[ns["name"]] = index_set(ns["nodes"])
 
     # Put element sets in dictionary for easier look up
     elsets = preprocessed.setdefault("element sets", {})
-    elsets["all"] = list(range(num_elem))
+    elsets["all"] = range(num_elem) if compact else list(range(num_elem))
     for es in inp.get("elset", []):
         if es["name"] in elsets:
             errors += 1
             logger.error(f"Duplicate element set {es['name']}")
         else:
-            elsets[es["name"]] = es["elements"]
+            elsets[es["name"]] = index_set(es["elements"])
 
     # Put materials in dictionary for easier look up
     materials = preprocessed.setdefault("materials", {})
@@ -83,75 +206,106 @@ def preprocess(data: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
         block["element_properties"] = eb["element_properties"]
         block["material"] = eb["material"]
         block["element_type"] = eb["element_type"]
+        if ELEMENT_NODES[eb["element_type"]] != node_per_elem:
+            errors += 1
+            logger.error(
+                f"element block {eb['name']} of type {eb['element_type']} requires "
+                f"{ELEMENT_NODES[eb['element_type']]} nodes per element, connect has "
+                f"{node_per_elem}"
+            )
+        elif dof_per_node > 1 and node_per_elem != 2:
+            errors += 1
+            logger.error(
+                f"element block {eb['name']} of type {eb['element_type']} requires 1-D coords, "
+                "truss meshes support t1d1 elements only"
+            )
         if isinstance(eb["elements"], str):
             # elements given as set name
             if eb["elements"] not in elsets:
                 errors += 1
                 logger.error(
                     f"element set {eb['elements']!r} "
-                    f"required by element eb {block['name']} not defined"
+                    f"required by element block {eb['name']} not defined"
                 )
                 continue
             block["elements"] = elsets[eb["elements"]]
         else:
             block["elements"] = eb["elements"]
 
+    # Every node has a displacement DOF per coordinate component
+    def check_dof(item: dict[str, Any], kind: str) -> bool:
+        if item["dof"] < dof_per_node:
+            return True
+        logger.error(f"{kind} dof {'xyz'[item['dof']]} is not defined for {dof_per_node}-D coords")
+        return False
+
     # Convert boundary conditions to tags/vals that can be used by the assembler
     doftags = preprocessed["doftags"] = np.zeros((num_node, dof_per_node), dtype=int)
     dofvals = preprocessed["dofvals"] = np.zeros((num_node, dof_per_node), dtype=float)
     for boundary in inp["boundary"]:
-        nodes: list[int] = []
+        if not check_dof(boundary, "boundary"):
+            errors += 1
+            continue
         if "node" in boundary:
-            nodes.append(boundary["node"])
+            nodes = boundary["node"]
         elif boundary["nset"] in nodesets:
-            nodes.extend(nodesets[boundary["nset"]])
+            nodes = nodesets[boundary["nset"]]
         else:
             errors += 1
             logger.error(f"nodeset {boundary['nset']} not defined")
             continue
         tag = DIRICHLET if boundary["type"] == "dirichlet" else NEUMANN
         dof = boundary["dof"]
-        for node in nodes:
-            doftags[node, dof] = tag
-            dofvals[node, dof] = boundary["amplitude"]
+        doftags[nodes, dof] = tag
+        dofvals[nodes, dof] = boundary["amplitude"]
 
     # Convert concentrated loads to tags/vals that can be used by the assembler
     for load in inp.get("cload", []):
-        nodes: list[int] = []
+        if not check_dof(load, "cload"):
+            errors += 1
+            continue
         if "node" in load:
-            nodes.append(load["node"])
+            nodes = load["node"]
         elif load["nset"] in nodesets:
-            nodes.extend(nodesets[load["nset"]])
+            nodes = nodesets[load["nset"]]
         else:
             errors += 1
             logger.error(f"nodeset {load['nset']} is not defined")
             continue
-        dof = load["dof"]
-        for node in nodes:
-            # cload is a boundary condition of type 'neumann' with tag=0
-            dofvals[node, dof] = load["amplitude"]
+        # cload is a boundary condition of type 'neumann' with tag=0
+        dofvals[nodes, load["dof"]] = load["amplitude"]
 
     # Process distributed load
     dload = preprocessed["dload"] = np.zeros((num_elem, dof_per_node), dtype=float)
     for load in inp.get("dload", []):
-        elements: list[int] = []
+        if not check_dof(load, "dload"):
+            errors += 1
+            continue
         if "element" in load:
-            elements.append(load["element"])
-        elif load["elsset"] in elsets:
-            elements.extend(elsets[load["elset"]])
+            elements = load["element"]
+        elif load["elset"] in elsets:
+            elements = elsets[load["elset"]]
         else:
             errors += 1
             logger.error(f"element set {load['elset']} is not defined")
             continue
-        dof = load["dof"]
-        for element in elements:
-            dload[element, dof] = load["amplitude"]
-
-    # Check if all elements are assigned to an element block
-    assigned: set[int] = set()
-    for block in blocks.values():
-        assigned.update(block["elements"])
-    if unassigned := set(range(num_elem)).difference(assigned):
+        dload[elements, load["dof"]] = load["amplitude"]
+
+    # Check if all elements are assigned to an element block, recording the block of each
+    element_block = np.full(num_elem, -1, dtype=np.int32)
+    for i, (name, block) in enumerate(blocks.items()):
+        elements = np.asarray(block.get("elements", []), dtype=int)
+        if np.any(invalid := (elements < 0) | (elements >= num_elem)):
+            errors += 1
+            s = ", ".join(str(_) for _ in elements[invalid])
+            logger.error(f"element block {name} references undefined elements {s}")
+            elements = elements[~invalid]
+        if compact and len(twice := np.unique(elements[element_block[elements] >= 0])):
+            errors += 1
+            s = ", ".join(str(_) for _ in twice)
+            logger.error(f"elements {s} are assigned to more than one element block")
+        element_block[elements] = i
+    if len(unassigned := np.flatnonzero(element_block < 0)):
         errors += 1
         s = ", ".join(str(_) for _ in unassigned)
         logger.error(f"elements {s} are not assigned to an element block")
@@ -159,4 +313,12 @@ def preprocess(data: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
     if errors:
         raise ValueError("stopping due to previous errors")
 
+    if compact:
+        from .compact import CompactModel
+
+        return CompactModel.from_arrays(preprocessed, element_block)
     return preprocessed
+
+
+def _identity(x: Any) -> Any:
+    return x
@@ -0,0 +1,103 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.adapt
+import wundy.post
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  elset:
+    - name: loaded
+      elements: [1]
+  boundary:
+    - node: 0
+  cload:
+    - node: 4
+      amplitude: 2.0
+  dload:
+    - elset: loaded
+      amplitude: 3.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+    - type: elastic
+      name: mat-2
+      parameters: {E: 20.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: [0, 1]
+      element_type: t1d1
+    - material: mat-2
+      name: block-2
+      elements: [2, 3]
+      element_type: t1d1
+"""
+
+
+def _preprocess():
+    return wundy.ui.preprocess(wundy.ui.load(io.StringIO(yaml_text)))
+
+
+def test_refine():
+    inp = _preprocess()
+    refined = wundy.adapt.refine(inp, [1, 3])
+    assert np.allclose(refined["coords"].ravel(), [0, 1, 2, 3, 4, 1.5, 3.5])
+    assert refined["connect"].tolist() == [[0, 1], [1, 5], [2, 3], [3, 6], [5, 2], [6, 4]]
+    blocks = refined["element blocks"]
+    assert blocks["block-1"]["elements"].tolist() == [0, 1, 4]
+    assert blocks["block-2"]["elements"].tolist() == [2, 3, 5]
+    assert refined["element sets"]["loaded"].tolist() == [1, 4]
+    assert refined["element sets"]["all"] == list(range(6))
+    assert refined["nodesets"]["all"] == list(range(7))
+    assert np.allclose(refined["dload"].ravel(), [0, 3, 0, 0, 3, 0])
+    assert refined["doftags"].shape == refined["dofvals"].shape == (7, 1)
+    # The input is not modified
+    assert len(inp["coords"]) == 5 and inp["element blocks"]["block-1"]["elements"] == [0, 1]
+
+
+def test_error_indicator():
+    # No distributed load: the piecewise linear solution is exact
+    inp = _preprocess()
+    inp["dload"][:] = 0.0
+    soln = wundy.adapt.adapt(inp)["soln"]
+    eta, energy = wundy.adapt.error_indicator(inp, soln)
+    assert np.all(eta == 0.0)
+    assert np.isclose(energy, 4 / 10 + 4 / 10 + 4 / 20 + 4 / 20)
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_adapt(engine):
+    inp = _preprocess()
+    result = wundy.adapt.adapt(inp, tol=1e-2, engine=engine)
+    assert result["converged"]
+    errors = [h["error"] for h in result["history"]]
+    assert errors[-1] <= 1e-2 and all(np.diff(errors) < 0)
+    # Only the loaded element and its descendants are refined
+    refined = result["inp"]
+    assert len(refined["element sets"]["loaded"]) == len(refined["connect"]) - 3
+
+    # Exact at the nodes: force 5 before and 2 beyond the load q = 3 on [1, 2], EA = 20 on [2, 4]
+    x = refined["coords"].ravel()
+    u = result["soln"]["displ"]
+    expected = np.where(x <= 1, 0.5 * x, 0.5 + (5 * (x - 1) - 1.5 * (x - 1) ** 2) / 10)
+    expected = np.where(x >= 2, 0.85 + (x - 2) * 0.1, expected)
+    assert np.allclose(u, expected, rtol=1e-12, atol=1e-12)
+    post = wundy.post.postprocess(refined, result["soln"])
+    assert np.isclose(post["R"][0], -5.0)
+
+    budget = wundy.adapt.adapt(inp, tol=1e-6, max_dof=9, engine=engine)
+    assert not budget["converged"]
+    assert budget["inp"]["coords"].size <= 9
+
+    # A mesh already over the budget is not refined at all
+    over = wundy.adapt.adapt(inp, tol=1e-6, max_dof=3, engine=engine)
+    assert not over["converged"] and over["inp"] is inp
+    assert [h["refined"] for h in over["history"]] == [0]
+    assert wundy.adapt.mark(np.ones(4), budget=-2).size == 0
@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+
+import wundy.batch
+
+deck = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - {boundary}
+  cload:
+    - node: 4
+      amplitude: {load}
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {{E: 10.0, nu: 0.3}}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+
+
+def test_batch(tmp_path):
+    decks = tmp_path / "decks"
+    decks.mkdir()
+    (decks / "a.yaml").write_text(deck.format(boundary="node: 0", load=2.0))
+    (decks / "b.yaml").write_text(deck.format(boundary="node: 0", load=4.0))
+    (decks / "bad.yaml").write_text(deck.format(boundary="nset: missing", load=1.0))
+    output = tmp_path / "out"
+
+    results = wundy.batch.run_batch(str(decks), str(output), processes=2)
+    status = {r["input"].rsplit("/", 1)[-1]: r["status"] for r in results}
+    assert status == {"a.yaml": "ok", "b.yaml": "ok", "bad.yaml": "error"}
+
+    a = np.load(output / "a.npz")
+    assert np.allclose(a["displ"], [0.0, 0.2, 0.4, 0.6, 0.8])
+    assert np.allclose(a["reactions"], [-2.0, 0.0, 0.0, 0.0, 0.0])
+    b = np.load(output / "b.npz")
+    assert np.allclose(b["displ"], [0.0, 0.4, 0.8, 1.2, 1.6])
+
+    bad = [r for r in results if r["status"] == "error"][0]
+    assert bad["error"] == "ValueError: stopping due to previous errors"
+    assert bad["messages"] == ["nodeset missing not defined"]
+    assert "nodeset missing not defined" in (output / "bad.error.txt").read_text()
+
+    lines = (output / "summary.jsonl").read_text().splitlines()
+    assert sorted(json.loads(line)["input"] for line in lines) == sorted(
+        r["input"] for r in results
+    )
+
+
+def test_batch_cli(tmp_path):
+    (tmp_path / "a.yaml").write_text(deck.format(boundary="node: 0", load=2.0))
+    output = tmp_path / "out"
+    pattern = str(tmp_path / "*.yaml")
+    assert wundy.batch.main([pattern, "-o", str(output), "-j", "1"]) == 0
+    assert (output / "a.npz").exists()
+
+
+def test_output_stems(tmp_path):
+    files = [str(tmp_path / name) for name in ("a/deck.yaml", "b/deck.yaml", "c/x.yaml")]
+    files += [str(tmp_path / "b" / name) for name in ("y.yaml", "y.yml")]
+    stems = wundy.batch.output_stems(files)
+    assert [stems[f] for f in files] == ["a-deck", "b-deck", "x", "b-y.yaml", "b-y.yml"]
+
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "deck.yaml").write_text(deck.format(boundary="node: 0", load=2.0))
+    output = tmp_path / "out"
+    results = wundy.batch.run_batch(str(tmp_path / "*" / "deck.yaml"), str(output), processes=1)
+    assert sorted(r["output"] for r in results) == [
+        str(output / "a-deck.npz"),
+        str(output / "b-deck.npz"),
+    ]
+
+
+_run_file = wundy.batch.run_file
+
+
+def _crash(file, *args):
+    """Kill the worker process on inputs named crash.yaml"""
+    if file.endswith("crash.yaml"):
+        os._exit(1)
+    return _run_file(file, *args)
+
+
+def test_worker_crash(tmp_path, monkeypatch):
+    for name in ("a", "b", "c", "crash"):
+        (tmp_path / f"{name}.yaml").write_text(deck.format(boundary="node: 0", load=2.0))
+    monkeypatch.setattr(wundy.batch, "run_file", _crash)
+    results = wundy.batch.run_batch(str(tmp_path), str(tmp_path / "out"), processes=2)
+    status = {os.path.basename(r["input"]): r["status"] for r in results}
+    assert status == {"a.yaml": "ok", "b.yaml": "ok", "c.yaml": "ok", "crash.yaml": "error"}
+    crashed = [r for r in results if r["status"] == "error"][0]
+    assert crashed["error"].startswith("BrokenProcessPool")
@@ -0,0 +1,45 @@
+import io
+import json
+
+import numpy as np
+
+import wundy
+import wundy.bench
+
+
+def test_synthetic_bar():
+    text = wundy.bench.synthetic_bar(11, nblock=3)
+    inp = wundy.ui.preprocess(wundy.ui.load(io.StringIO(text)))
+    assert inp["coords"].shape == (11, 1)
+    assert list(inp["element blocks"]) == ["block-1", "block-2", "block-3"]
+    elements = np.concatenate([b["elements"] for b in inp["element blocks"].values()])
+    assert np.array_equal(np.sort(elements), np.arange(10))
+
+
+def test_benchmark(tmp_path):
+    output = tmp_path / "bench.json"
+    args = ["--sizes", "10", "100", "--repeat", "1", "--engine", "dense", "-o", str(output)]
+    assert wundy.bench.main(args) == 0
+    bench = json.loads(output.read_text())
+    assert [r["nnode"] for r in bench["results"]] == [10, 100]
+    for r in bench["results"]:
+        for stage in wundy.bench.STAGES:
+            assert r["stages"][stage]["wall"] > 0.0
+            assert r["stages"][stage]["peak_bytes"] >= 0
+    assert set(bench["exponents"]) == set(wundy.bench.STAGES)
+
+
+def test_run_pipeline(monkeypatch):
+    solutions = []
+    first_fe_code = wundy.bench.first_fe_code
+
+    def solve(*args, **kwargs):
+        solutions.append(first_fe_code(*args, **kwargs))
+        return solutions[-1]
+
+    monkeypatch.setattr(wundy.bench, "first_fe_code", solve)
+    text = wundy.bench.synthetic_bar(20)
+    record = wundy.bench.run_pipeline(text, "sparse", fast=True)
+    assert len(solutions) == 1 and solutions[0]["displ"].shape == (20,)
+    assert set(record) == set(wundy.bench.STAGES)
+    assert set(wundy.bench.STAGE_OF.values()) == set(wundy.bench.STAGES)
@@ -0,0 +1,163 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.assembly
+import wundy.cache
+import wundy.first
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  elset:
+    - name: left
+      elements: [0, 1]
+    - name: right
+      elements: [2, 3]
+  boundary:
+    - node: 0
+  cload:
+    - node: 4
+      amplitude: {load}
+  dload:
+    - elset: right
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {{E: 10.0, nu: 0.3}}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: left
+      element_type: t1d1
+    - material: mat-1
+      name: block-2
+      elements: right
+      element_type: t1d1
+      element_properties: {{area: {area}}}
+"""
+
+
+def _load(load=2.0, area=1.0):
+    return wundy.ui.load(io.StringIO(yaml_text.format(load=load, area=area)))
+
+
+def _first(data, **kwargs):
+    inp = wundy.ui.preprocess(data)
+    return wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        inp["materials"],
+        inp["element blocks"],
+        **kwargs,
+    )
+
+
+def test_content_hash():
+    assert wundy.cache.content_hash(_load()) == wundy.cache.content_hash(_load())
+    assert wundy.cache.content_hash(_load()) != wundy.cache.content_hash(_load(load=3.0))
+    assert wundy.cache.content_hash([1, 2]) != wundy.cache.content_hash([1.0, 2])
+    assert wundy.cache.content_hash(np.arange(3)) != wundy.cache.content_hash(np.arange(3.0))
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_result_cache(tmp_path, engine, monkeypatch):
+    cache = wundy.cache.ResultCache(str(tmp_path))
+    expected = _first(_load(), engine=engine, dirichlet="condense")
+    soln = wundy.cache.cached_analysis(_load(), cache, engine=engine, dirichlet="condense")
+    assert len(cache.entries()) == 1
+
+    # A hit must not preprocess, assemble or solve
+    monkeypatch.setattr(wundy.cache.ui, "preprocess", None)
+    hit = wundy.cache.cached_analysis(_load(), cache, engine=engine, dirichlet="condense")
+    for soln in (soln, hit):
+        for name in ("displ", "F", "R"):
+            assert np.array_equal(soln[name], expected[name])
+        K = soln["K"].toarray() if engine == "sparse" else soln["K"]
+        K_exp = expected["K"].toarray() if engine == "sparse" else expected["K"]
+        assert np.array_equal(K, K_exp)
+
+
+def test_result_cache_eviction(tmp_path):
+    cache = wundy.cache.ResultCache(str(tmp_path))
+    for load in (1.0, 2.0, 3.0):
+        wundy.cache.cached_analysis(_load(load=load), cache)
+    sizes = [e.stat().st_size for e in cache.entries()]
+    assert len(sizes) == 3
+
+    cache.max_bytes = sum(sizes) - 1
+    options = dict(
+        engine="dense", dirichlet="symmetric", solver="direct", solver_options=None, reorder="auto"
+    )
+    key1 = cache.key(_load(load=1.0), **options)
+    key2 = cache.key(_load(load=2.0), **options)
+    # Use the oldest entry so that the second oldest is evicted instead
+    assert cache.get(key1) is not None
+    newest = cache.entries()[-1].stat().st_mtime_ns
+    os.utime(cache.path(key1), ns=(newest + 1, newest + 1))
+    cache.evict()
+    assert cache.get(key1) is not None
+    assert cache.get(key2) is None
+
+
+def test_result_cache_options(tmp_path, monkeypatch):
+    cache = wundy.cache.ResultCache(str(tmp_path))
+    options = dict(engine="sparse", solver="cg", solver_options={"rtol": 1e-12}, reorder="rcm")
+    expected = _first(_load(), **options)
+    soln = wundy.cache.cached_analysis(_load(), cache, **options)
+    hit = wundy.cache.cached_analysis(_load(), cache, **options)
+    assert len(cache.entries()) == 1
+    for soln in (soln, hit):
+        assert soln["ordering"] == expected["ordering"] and soln["ordering"]["method"] == "rcm"
+        assert soln["solver"]["converged"] and soln["solver"].keys() == expected["solver"].keys()
+        assert np.allclose(soln["displ"], expected["displ"])
+    wundy.cache.cached_analysis(_load(), cache, **{**options, "reorder": "none"})
+    assert len(cache.entries()) == 2
+
+    # An entry evicted by another process after it was read is a miss, not an error
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(wundy.cache.os, "utime", evicted)
+    key = cache.entries()[0].name[: -len(".npz")]
+    assert cache.get(key) is None
+
+
+def test_stiffness_memo():
+    memo = wundy.cache.StiffnessMemo()
+    for load in (1.0, 2.0):
+        soln = wundy.cache.cached_analysis(_load(load=load), memo=memo)
+        expected = _first(_load(load=load))
+        assert np.array_equal(soln["K"], expected["K"])
+        assert np.array_equal(soln["F"], expected["F"])
+        assert np.allclose(soln["displ"], expected["displ"], rtol=1e-12, atol=1e-12)
+    assert (memo.hits, memo.misses) == (2, 2)
+
+    soln = wundy.cache.cached_analysis(_load(area=2.0), memo=memo)
+    assert np.array_equal(soln["K"], _first(_load(area=2.0))["K"])
+    assert (memo.hits, memo.misses) == (3, 3)
+
+    # Reordered analyses are memoized in the new numbering
+    for load in (1.0, 2.0):
+        soln = wundy.cache.cached_analysis(_load(load=load), memo=memo, reorder="rcm")
+        expected = _first(_load(load=load), reorder="rcm")
+        assert np.allclose(soln["K"], expected["K"]) and np.allclose(soln["F"], expected["F"])
+        assert soln["ordering"] == expected["ordering"]
+
+    # A mesh hashed once is reused
+    inp = wundy.ui.preprocess(_load())
+    mesh = memo.mesh_key(inp["coords"], inp["connect"])
+    hits = memo.hits
+    args = (inp["coords"], inp["connect"], inp["dload"], inp["materials"], inp["element blocks"])
+    triplets = memo.assemble(*args, np.zeros(5), mesh=mesh)
+    assert memo.hits == hits + 2
+    ref = wundy.assembly.assemble(*args, np.zeros(5))
+    assert all(np.array_equal(a, b) for a, b in zip(triplets, ref))
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+import numpy as np
+
+import wundy.cli
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - node: {node}
+  cload:
+    - node: 4
+      amplitude: 2.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {{E: 10.0, nu: 0.3}}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+
+
+def test_cli_run(tmp_path):
+    file = tmp_path / "input.yaml"
+    file.write_text(yaml_text.format(node=0))
+    output = tmp_path / "out.npz"
+    assert wundy.cli.main(["run", str(file), "-o", str(output), "--condense"]) == 0
+    soln = np.load(output)
+    assert np.allclose(soln["displ"], [0.0, 0.2, 0.4, 0.6, 0.8])
+    assert np.allclose(soln["reactions"], [-2.0, 0.0, 0.0, 0.0, 0.0])
+    assert np.allclose(soln["force"], 2.0)
+
+    argv = ["run", str(file), "-o", str(output), "--solver", "cg", "--preconditioner", "none"]
+    assert wundy.cli.main(argv) == 0
+    assert np.allclose(np.load(output)["displ"], [0.0, 0.2, 0.4, 0.6, 0.8])
+
+    file.write_text(yaml_text.format(node="zero"))
+    assert wundy.cli.main(["run", str(file), "-o", str(output)]) == 1
+
+
+def test_cli_subcommands(tmp_path):
+    output = tmp_path / "bench.json"
+    argv = ["bench", "--sizes", "10", "--repeat", "1", "--no-memory", "-o", str(output)]
+    assert wundy.cli.main(argv) == 0
+    assert output.exists()
+
+
+def test_lazy_import():
+    code = (
+        "import sys, wundy; print(sorted({'numpy', 'scipy', 'yaml', 'schema'} & set(sys.modules)))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+    code = "import sys, wundy.first, wundy.ui; print('scipy' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,127 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.assembly
+import wundy.compact
+import wundy.first
+import wundy.post
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4, 5]
+  connect: [[0, 1], [1, 2], [2, 3], [3, 4], [4, 5]]
+  nset:
+    - {name: left, nodes: [0]}
+  elset:
+    - {name: odd, elements: [1, 3]}
+    - {name: even, elements: [0, 2, 4]}
+  boundary:
+    - {nset: left}
+  cload:
+    - {node: 5, amplitude: 2.0}
+  dload:
+    - {elset: odd, amplitude: 0.5}
+  material:
+    - {type: elastic, name: soft, parameters: {E: 10.0, nu: 0.3}}
+    - {type: elastic, name: stiff, parameters: {E: 40.0, nu: 0.3}}
+  element block:
+    - {material: stiff, name: block-1, elements: odd, element_type: t1d1,
+       element_properties: {area: 2.0}}
+    - {material: soft, name: block-2, elements: even, element_type: t1d1}
+"""
+
+
+def _data(text=yaml_text):
+    return wundy.ui.load(io.StringIO(text))
+
+
+def test_index_set():
+    assert wundy.compact.index_set([3, 4, 5]) == range(3, 6)
+    assert wundy.compact.index_set(range(4)) == range(4)
+    assert wundy.compact.index_set([0, 2]).tolist() == [0, 2]
+    assert wundy.compact.index_set([7]).tolist() == [7]
+
+
+def test_from_dict(monkeypatch):
+    # The compact form is built from arrays, not converted from the dictionary form
+    monkeypatch.setattr(wundy.compact.CompactModel, "from_dict", None)
+    model = wundy.ui.preprocess(_data(), compact=True)
+    monkeypatch.undo()
+    assert isinstance(model, wundy.compact.CompactModel)
+    assert not hasattr(model, "__dict__")
+    assert model.block_names == ("block-1", "block-2")
+    assert model.block_materials == ("stiff", "soft")
+    assert model.element_block.tolist() == [1, 0, 1, 0, 1]
+    assert np.allclose(model.ea, [10.0, 80.0, 10.0, 80.0, 10.0])
+    assert model.nodesets["all"] == range(6) and model.elsets["all"] == range(5)
+    assert model.nodesets["left"].tolist() == [0]
+    # The dictionary form keeps its lists
+    assert wundy.ui.preprocess(_data())["nodesets"]["all"] == list(range(6))
+    assert model.ndof == 6
+
+    inp = model.to_dict()
+    assert inp["element blocks"]["block-1"]["elements"].tolist() == [1, 3]
+    assert inp["element blocks"]["block-2"]["elements"].tolist() == [0, 2, 4]
+    assert inp["element blocks"]["block-1"]["element_properties"] == {"area": 2.0}
+    again = wundy.compact.CompactModel.from_dict(inp)
+    assert np.array_equal(again.element_block, model.element_block)
+    assert np.array_equal(again.ea, model.ea)
+
+
+def test_assemble_compact():
+    inp = wundy.ui.preprocess(_data())
+    model = wundy.compact.CompactModel.from_dict(inp)
+    args = (inp["coords"], inp["connect"], inp["dload"], inp["materials"], inp["element blocks"])
+    F = np.zeros(6)
+    K = wundy.assembly.global_stiffness(*wundy.assembly.assemble(*args, F), 6)
+    Fc = np.zeros(6)
+    Kc = wundy.assembly.global_stiffness(*wundy.assembly.assemble_compact(model, Fc), 6)
+    assert np.allclose(Kc, K) and np.allclose(Fc, F) and F.any()
+    unloaded = np.zeros(6)
+    wundy.assembly.assemble_compact(model, unloaded, dload=False)
+    assert not unloaded.any()
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+@pytest.mark.parametrize("dirichlet", ["symmetric", "condense"])
+def test_analyze(engine, dirichlet, monkeypatch):
+    inp = wundy.ui.preprocess(_data())
+    args = ("coords", "connect", "doftags", "dofvals", "dload", "materials", "element blocks")
+    ref = wundy.first.first_fe_code(*(inp[name] for name in args), engine, dirichlet)
+    model = wundy.ui.preprocess(_data(), compact=True)
+    soln = wundy.first.analyze(model, engine=engine, dirichlet=dirichlet)
+    for name in ("displ", "F", "R"):
+        if name in ref:
+            assert np.allclose(soln[name], ref[name])
+    K = soln["K"].toarray() if engine == "sparse" else soln["K"]
+    assert np.allclose(K, ref["K"].toarray() if engine == "sparse" else ref["K"])
+
+    # Post-processing works on the arrays of the compact model, not on its dictionary form
+    monkeypatch.setattr(wundy.compact.CompactModel, "to_dict", None)
+    post = wundy.post.postprocess(model, soln)
+    expected = wundy.post.postprocess(inp, ref)
+    for name in ("strain", "stress", "force", "R"):
+        assert np.allclose(post[name], expected[name])
+
+
+def test_errors():
+    inp = wundy.ui.preprocess(_data())
+    inp["element blocks"]["block-2"]["elements"] = [0, 1, 2, 4]
+    with pytest.raises(ValueError, match="elements 1 are assigned to more than one"):
+        wundy.compact.CompactModel.from_dict(inp)
+    inp["element blocks"]["block-2"]["elements"] = [0, 2]
+    with pytest.raises(ValueError, match="elements 4 are not assigned"):
+        wundy.compact.CompactModel.from_dict(inp)
+
+
+def test_preprocess_errors(caplog):
+    # Elements in two blocks are allowed by the dictionary form only
+    text = yaml_text.replace("elements: even,", "elements: [0, 1, 2, 4],")
+    inp = wundy.ui.preprocess(_data(text))
+    assert inp["element blocks"]["block-2"]["elements"] == [0, 1, 2, 4]
+    with pytest.raises(ValueError, match="stopping due to previous errors"):
+        wundy.ui.preprocess(_data(text), compact=True)
+    assert "elements 1 are assigned to more than one element block" in caplog.text
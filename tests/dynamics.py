@@ -0,0 +1,109 @@
+import io
+
+import numpy as np
+import pytest
+import schema
+
+import wundy
+import wundy.dynamics
+import wundy.output
+
+N = 50
+
+yaml_text = f"""
+wundy:
+  coords: {list(range(N + 1))}
+  connect: {[[i, i + 1] for i in range(N)]}
+  boundary:
+    - node: 0
+  cload:
+    - node: {N}
+      amplitude: {{load}}
+  material:
+    - type: {{type}}
+      name: mat-1
+      parameters: {{parameters}}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+
+
+def _preprocess(load=2.0, type="elastic", parameters="{E: 100.0, nu: 0.3, density: 1.0}"):
+    text = yaml_text.format(load=load, type=type, parameters=parameters)
+    return wundy.ui.preprocess(wundy.ui.load(io.StringIO(text)))
+
+
+def test_mass():
+    inp = _preprocess()
+    m = wundy.dynamics.lumped_mass(inp)
+    assert np.isclose(m.sum(), 50.0)
+    assert np.allclose(m[[0, N]], 0.5)
+    # c = sqrt(E / density) = 10
+    assert np.isclose(wundy.dynamics.critical_time_step(inp), 0.1)
+
+
+@pytest.mark.parametrize("method", ["explicit", "newmark"])
+def test_step_load(method):
+    """A suddenly applied tip load P: the tip oscillates between 0 and 2 P L / EA = 2"""
+    inp = _preprocess()
+    if method == "explicit":
+        result = wundy.dynamics.explicit(inp, duration=20.0)
+        assert np.isclose(result["dt"], 20.0 / 223)
+    else:
+        result = wundy.dynamics.newmark(inp, duration=20.0, dt=0.1)
+        assert result["steps"] == 200
+    tip = result["displ"][:, N]
+    assert result["displ"].shape == (result["steps"] + 1, N + 1)
+    assert abs(tip.max() - 2.0) < 0.04
+    assert abs(tip.mean() - 1.0) < 0.01
+    assert np.all(result["displ"][:, 0] == 0.0)
+
+
+def test_energy():
+    """Free vibration from an initial velocity: Newmark conserves kinetic plus strain energy"""
+    inp = _preprocess(load=0.0)
+    v0 = np.sin(np.pi * np.arange(N + 1) / (2 * N))
+    result = wundy.dynamics.newmark(inp, duration=30.0, dt=0.5, v0=v0)
+    m = wundy.dynamics.lumped_mass(inp)
+    kinetic = 0.5 * np.sum(m * result["velocity"] ** 2, axis=1)
+    strain = 0.5 * np.sum(result["stress"] ** 2 / 100.0, axis=1)
+    energy = kinetic + strain
+    assert np.allclose(energy, energy[0], rtol=1e-10)
+    assert strain.max() > 0.9 * energy[0]
+
+
+def test_elastoplastic():
+    """Perfect plasticity: the stress wave is capped at the yield stress"""
+    inp = _preprocess(type="elastoplastic", parameters="{E: 100.0, nu: 0.3, density: 1.0, Y: 1.0}")
+    result = wundy.dynamics.explicit(inp, duration=20.0, output_every=5)
+    assert np.abs(result["stress"]).max() <= 1.0 + 1e-12
+    assert result["displ"][:, N].max() > 2.0
+    with pytest.raises(ValueError, match="elastic materials only"):
+        wundy.dynamics.newmark(inp, duration=1.0, dt=0.1)
+
+
+def test_output(tmp_path):
+    inp = _preprocess()
+    result = wundy.dynamics.explicit(inp, duration=20.0, output_every=10)
+    # Step 0, every 10th of the 223 steps and the last
+    assert result["outputs"] == 1 + 223 // 10 + 1
+    assert np.isclose(result["time"][-1], 20.0)
+    assert np.allclose(np.diff(result["time"][:-1]), 10 * result["dt"])
+
+    with wundy.output.ResultWriter(str(tmp_path / "run")) as writer:
+        streamed = wundy.dynamics.explicit(inp, duration=20.0, output_every=10, writer=writer)
+    assert "displ" not in streamed
+    reader = wundy.output.ResultReader(str(tmp_path / "run"))
+    for name in ("time", "displ", "velocity", "stress"):
+        assert np.array_equal(reader[name], result[name])
+
+
+def test_density():
+    inp = _preprocess(parameters="{E: 100.0, nu: 0.3}")
+    with pytest.raises(ValueError, match="needs a density"):
+        wundy.dynamics.explicit(inp, duration=1.0)
+    with pytest.raises(schema.SchemaError, match="density must be > 0"):
+        _preprocess(parameters="{E: 100.0, nu: 0.3, density: -1.0}")
@@ -0,0 +1,88 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.bench
+import wundy.elements
+import wundy.first
+import wundy.post
+
+
+@pytest.mark.parametrize("name", ["t1d1", "t1d2", "t1d3"])
+def test_shape_functions(name):
+    etype = wundy.elements.ELEMENT_TYPES[name]
+    assert np.allclose(etype.shape(etype.xi), np.eye(etype.nodes))
+    xi = np.linspace(-1.0, 1.0, 9)
+    assert np.allclose(etype.shape(xi).sum(axis=1), 1.0)
+    assert np.allclose(etype.dshape(xi) @ etype.xi, 1.0)
+
+    # A straight element of length 2 with EA = 3: rigid body mode, total load q L
+    X = np.array([[1.0, 3.0, *np.linspace(1.0, 3.0, etype.nodes)[1:-1]]])
+    K = etype.stiffness(X, np.array([3.0]))[0]
+    assert np.allclose(K, K.T)
+    assert np.allclose(K @ np.ones(etype.nodes), 0.0)
+    assert np.isclose(etype.loads(X, np.array([0.5])).sum(), 1.0)
+
+
+def test_quadratic_stiffness():
+    etype = wundy.elements.ELEMENT_TYPES["t1d2"]
+    K = etype.stiffness(np.array([[0.0, 2.0, 1.0]]), np.array([3.0]))[0]
+    expected = 3.0 / (3 * 2.0) * np.array([[7, 1, -8], [1, 7, -8], [-8, -8, 16]])
+    assert np.allclose(K, expected, rtol=1e-12, atol=1e-12)
+
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0, 2, 1], [2, 4, 3]]
+  boundary:
+    - node: 0
+  dload:
+    - elset: all
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d2
+"""
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_quadratic_bar(engine):
+    """Uniform load q on a fixed-free bar: u = q/EA (L x - x^2/2) is represented exactly"""
+    inp = wundy.ui.preprocess(wundy.ui.load(io.StringIO(yaml_text)))
+    soln = wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        inp["materials"],
+        inp["element blocks"],
+        engine=engine,
+    )
+    x = np.arange(5.0)
+    assert np.allclose(soln["displ"], (4.0 * x - x**2 / 2) / 10.0, rtol=1e-12, atol=1e-12)
+    post = wundy.post.postprocess(inp, soln)
+    assert np.allclose(post["R"], [-4.0, 0, 0, 0, 0], rtol=1e-12, atol=1e-12)
+    assert np.allclose(post["force"], [3.0, 1.0], rtol=1e-12, atol=1e-12)
+
+    with pytest.raises(ValueError):
+        wundy.ui.preprocess(wundy.ui.load(io.StringIO(yaml_text.replace("t1d2", "t1d3"))))
+
+
+def test_convergence():
+    conv = wundy.bench.convergence(nelems=(4, 8), target=1e-4)
+    for name, order in (("t1d1", 1), ("t1d2", 2), ("t1d3", 3)):
+        coarse, fine = conv["element_types"][name]["results"]
+        rate = np.log2(coarse["displ_error"] / fine["displ_error"])
+        assert abs(rate - (order + 1)) < 0.1
+    assert conv["element_types"]["t1d1"]["ndof_to_target"] is None
+    assert conv["element_types"]["t1d3"]["ndof_to_target"] == 13
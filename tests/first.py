@@ -1,10 +1,17 @@
 import io
+
 import numpy as np
+import pytest
+
 import wundy
+import wundy.assembly
 import wundy.first
+import wundy.linalg
+import wundy.post
+import wundy.schemas
 
 
-def _run(yaml_text: str):
+def _run(yaml_text: str, **kwargs):
     f = io.StringIO(yaml_text)
     data = wundy.ui.load(f)
     inp = wundy.ui.preprocess(data)
@@ -16,6 +23,7 @@ def _run(yaml_text: str):
         inp["dload"],
         inp["materials"],
         inp["element blocks"],
+        **kwargs,
     )
 
 
@@ -121,3 +129,323 @@ wundy:
 
     assert np.allclose(F, F_exp, rtol=1e-12, atol=1e-12)
     assert np.allclose(u, u_exp, rtol=1e-3, atol=1e-6)
+
+
+def test_first_sparse():
+    """
+    Same bar as test_first_1 solved with the sparse engine (tridiagonal path), and a bar whose
+    nodes are numbered out of order so that the bandwidth is 2 (sparse LU path).
+    """
+    yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - node: 0
+  cload:
+    - node: 4
+      amplitude: 2.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+    dense = _run(yaml_text)
+    soln = _run(yaml_text, engine="sparse")
+    assert wundy.linalg.bandwidth(soln["K"]) == 1
+    assert np.allclose(soln["K"].toarray(), dense["K"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(soln["F"], dense["F"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(soln["displ"], dense["displ"], rtol=1e-12, atol=1e-12)
+
+    yaml_text = """
+wundy:
+  coords: [0, 3, 1, 2]
+  connect: [[0,2],[2,3],[3,1]]
+  boundary:
+    - node: 0
+    - node: 1
+      amplitude: 0.3
+  cload:
+    - node: 2
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+    dense = _run(yaml_text)
+    soln = _run(yaml_text, engine="sparse")
+    assert wundy.linalg.bandwidth(soln["K"]) == 2
+    assert np.allclose(soln["K"].toarray(), dense["K"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(soln["displ"], dense["displ"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(soln["displ"], [0.0, 0.3, 1.0 / 6.0, 7.0 / 30.0], rtol=1e-12, atol=1e-12)
+
+
+def _reference_assembly(inp):
+    """Element-by-element assembly that the batched kernel must reproduce exactly"""
+    coords, connect, dload = inp["coords"], inp["connect"], inp["dload"]
+    ndof = coords.shape[0]
+    K = np.zeros((ndof, ndof))
+    F = np.zeros(ndof)
+    for n, tags in enumerate(inp["doftags"]):
+        if tags[0] != wundy.schemas.DIRICHLET:
+            F[n] += inp["dofvals"][n, 0]
+    for block in inp["element blocks"].values():
+        A = float(block["element_properties"]["area"])
+        E = float(inp["materials"][block["material"]]["parameters"]["E"])
+        for e in block["elements"]:
+            nodes = connect[e]
+            Le = float(coords[nodes[1], 0] - coords[nodes[0], 0])
+            K[np.ix_(nodes, nodes)] += (A * E / Le) * np.array([[1.0, -1.0], [-1.0, 1.0]])
+            F[nodes] += (float(dload[e, 0]) * Le / 2.0) * np.ones(2)
+    return K, F
+
+
+def test_first_batched_assembly():
+    yaml_text = """
+wundy:
+  coords: [0, 0.3, 1.1, 1.7, 2.0, 3.3]
+  connect: [[0,1],[1,2],[2,3],[3,4],[4,5]]
+  elset:
+    - name: left
+      elements: [0, 1]
+    - name: right
+      elements: [2, 3, 4]
+  boundary:
+    - node: 0
+  cload:
+    - node: 5
+      amplitude: 0.7
+  dload:
+    - element: 1
+      amplitude: 1.3
+    - element: 3
+      amplitude: -0.4
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+    - type: elastic
+      name: mat-2
+      parameters: {E: 3.7, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: left
+      element_type: t1d1
+      element_properties: {area: 0.3}
+    - material: mat-2
+      name: block-2
+      elements: right
+      element_type: t1d1
+"""
+    data = wundy.ui.load(io.StringIO(yaml_text))
+    inp = wundy.ui.preprocess(data)
+    K_ref, F_ref = _reference_assembly(inp)
+    soln = _run(yaml_text)
+    assert np.array_equal(soln["K"], K_ref)
+    assert np.array_equal(soln["F"], F_ref)
+
+
+def test_first_zero_length_elements():
+    yaml_text = """
+wundy:
+  coords: [0, 1, 1, 2, 2]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - node: 0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+    with pytest.raises(ValueError, match=r"Zero-length element\(s\) \[1, 3\]"):
+        _run(yaml_text)
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_first_condensed(engine):
+    """
+    Bar fixed at both ends (u0=0, u4=0.4) with a distributed load q=1 on every element and a
+    point load P=2 at node 2.  Reactions balance the applied loads: R0 + R4 + 4*q + P = 0.
+    """
+    yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  nset:
+    - name: ends
+      nodes: [0, 4]
+  boundary:
+    - node: 0
+    - node: 4
+      amplitude: 0.4
+  cload:
+    - node: 2
+      amplitude: 2.0
+  dload:
+    - elset: all
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+    full = _run(yaml_text, engine=engine)
+    soln = _run(yaml_text, engine=engine, dirichlet="condense")
+    assert np.allclose(soln["displ"], full["displ"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(soln["F"], full["F"], rtol=1e-12, atol=1e-12)
+
+    K = np.asarray(soln["K"].toarray() if engine == "sparse" else soln["K"])
+    R_exp = K @ soln["displ"] - soln["F"]
+    R_exp[1:4] = 0.0
+    assert np.allclose(soln["R"], R_exp, rtol=1e-12, atol=1e-12)
+    assert np.isclose(soln["R"].sum() + 4.0 + 2.0, 0.0, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+@pytest.mark.parametrize("dirichlet", ["symmetric", "condense"])
+@pytest.mark.parametrize("preconditioner", ["jacobi", "ilu", None])
+def test_first_cg(engine, dirichlet, preconditioner, caplog):
+    """Conjugate gradients reproduce the direct solve of a bar with 50 graded elements"""
+    x = (np.linspace(0.0, 1.0, 51) ** 2).tolist()
+    connect = ", ".join(f"[{i}, {i + 1}]" for i in range(50))
+    yaml_text = f"""
+wundy:
+  coords: [{", ".join(repr(xi) for xi in x)}]
+  connect: [{connect}]
+  boundary:
+    - node: 0
+    - node: 50
+      amplitude: 0.1
+  cload:
+    - node: 25
+      amplitude: 2.0
+  dload:
+    - elset: all
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {{E: 10.0, nu: 0.3}}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+    direct = _run(yaml_text, engine=engine, dirichlet=dirichlet)
+    options = {"rtol": 1e-12, "preconditioner": preconditioner}
+    soln = _run(yaml_text, engine=engine, dirichlet=dirichlet, solver="cg", solver_options=options)
+    assert soln["solver"]["converged"]
+    assert soln["solver"]["residual"] <= 1e-12
+    assert "residuals" not in soln["solver"]
+    assert np.allclose(soln["displ"], direct["displ"], rtol=1e-9, atol=1e-12)
+
+    options["history"] = True
+    soln = _run(yaml_text, engine=engine, dirichlet=dirichlet, solver="cg", solver_options=options)
+    assert soln["solver"]["iterations"] == len(soln["solver"]["residuals"])
+    assert soln["solver"]["residuals"][-1] <= 1e-12
+    assert np.allclose(soln["displ"], direct["displ"], rtol=1e-9, atol=1e-12)
+
+    # Not converged: warned about, and the last iterate is returned
+    options = {"maxiter": 2, "preconditioner": "jacobi"}
+    soln = _run(yaml_text, engine=engine, dirichlet=dirichlet, solver="cg", solver_options=options)
+    assert not soln["solver"]["converged"]
+    assert soln["solver"]["iterations"] == 2
+    assert "did not converge" in caplog.text
+
+    with pytest.raises(ValueError):
+        _run(yaml_text, solver="gmres")
+
+
+truss_2d = """
+wundy:
+  coords: [[-1, 0], [1, 0], [0, -1]]
+  connect: [[0, 2], [1, 2]]
+  nset:
+    - name: supports
+      nodes: [0, 1]
+  boundary:
+    - {nset: supports, dof: x}
+    - {nset: supports, dof: y}
+  cload:
+    - {node: 2, dof: y, amplitude: -1.0}
+  material:
+    - {type: elastic, name: mat-1, parameters: {E: 1.0, nu: 0.3}}
+  element block:
+    - {material: mat-1, name: block-1, elements: all, element_type: t1d1}
+"""
+
+truss_3d = """
+wundy:
+  coords: {coords}
+  connect: [[0, 3], [1, 3], [2, 3]]
+  nset:
+    - name: base
+      nodes: [0, 1, 2]
+  boundary:
+    - {{nset: base, dof: x}}
+    - {{nset: base, dof: y}}
+    - {{nset: base, dof: z}}
+  cload:
+    - {{node: 3, dof: z, amplitude: -1.0}}
+  dload:
+    - {{elset: all, dof: x, amplitude: 0.0}}
+  material:
+    - {{type: elastic, name: mat-1, parameters: {{E: 2.0, nu: 0.3}}}}
+  element block:
+    - {{material: mat-1, name: block-1, elements: all, element_type: t1d1}}
+"""
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_first_truss(engine):
+    """Two bars at 45 degrees carrying a hanging load P = 1: N = P / sqrt(2), v = -sqrt(2) P / EA"""
+    soln = _run(truss_2d, engine=engine, dirichlet="condense")
+    assert np.allclose(soln["displ"], [0, 0, 0, 0, 0, -np.sqrt(2)])
+    assert np.allclose(soln["R"], [-0.5, 0.5, 0.5, 0.5, 0, 0])
+    inp = wundy.ui.preprocess(wundy.ui.load(io.StringIO(truss_2d)))
+    post = wundy.post.postprocess(inp, soln)
+    assert np.allclose(post["force"], 1 / np.sqrt(2))
+
+    # A tripod of legs of length sqrt(2): 3 N / sqrt(2) = -P and w = 2 N / EA
+    angles = 2 * np.pi * np.arange(3) / 3
+    coords = np.column_stack([np.cos(angles), np.sin(angles), np.zeros(3)]).tolist()
+    coords.append([0.0, 0.0, 1.0])
+    soln = _run(truss_3d.format(coords=coords), engine=engine)
+    N = -np.sqrt(2) / 3
+    assert np.allclose(soln["displ"][:9], 0.0)
+    assert np.allclose(soln["displ"][9:], [0, 0, N], atol=1e-12)
+
+
+def test_first_truss_dload():
+    """Uniform load q along y on a horizontal bar pinned at both ends: qL/2 at each support"""
+    text = truss_2d.replace("[[-1, 0], [1, 0], [0, -1]]", "[[0, 0], [2, 0], [1, 0]]")
+    text = text.replace("[[0, 2], [1, 2]]", "[[0, 2], [2, 1]]")
+    text = text.replace("{node: 2, dof: y, amplitude: -1.0}", "{node: 2, dof: x, amplitude: 0.0}")
+    text += "  dload:\n    - {elset: all, dof: y, amplitude: 3.0}\n"
+    inp = wundy.ui.preprocess(wundy.ui.load(io.StringIO(text)))
+    F = np.zeros(6)
+    wundy.assembly.distributed_loads(F, inp["coords"], inp["connect"], np.arange(2), inp["dload"])
+    assert np.allclose(F, [0, 1.5, 0, 1.5, 0, 3.0])
@@ -0,0 +1,75 @@
+import io
+import json
+import logging
+
+import wundy
+import wundy.first
+import wundy.instrument
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - node: 0
+  cload:
+    - node: 4
+      amplitude: 2.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+
+
+def test_recorder(caplog):
+    with wundy.instrument.Recorder(memory=True) as rec:
+        data = wundy.ui.load(io.StringIO(yaml_text), recorder=rec)
+        inp = wundy.ui.preprocess(data, recorder=rec)
+        wundy.first.first_fe_code(
+            inp["coords"],
+            inp["connect"],
+            inp["doftags"],
+            inp["dofvals"],
+            inp["dload"],
+            inp["materials"],
+            inp["element blocks"],
+            engine="sparse",
+            recorder=rec,
+        )
+    stages = [r["stage"] for r in rec.records]
+    assert stages == [
+        "parse",
+        "validate",
+        "preprocess",
+        "reorder",
+        "assemble",
+        "dirichlet",
+        "solve",
+    ]
+    for record in rec.records:
+        assert record["wall"] >= 0.0 and record["cpu"] >= 0.0
+        assert "allocated" in record and record["peak"] >= 0
+    reorder, assemble = rec.records[3:5]
+    assert reorder["method"] == "none" and reorder["bandwidth_before"] == 1
+    assert assemble["ndof"] == 5 and assemble["nnz"] == 13
+    assert json.loads(rec.to_json()) == rec.records
+    assert set(rec.totals()) == set(stages)
+
+    with caplog.at_level(logging.INFO, logger="wundy.ui"):
+        rec.log()
+    assert len(caplog.records) == len(stages)
+    assert caplog.records[4].getMessage().startswith("assemble: wall=")
+    assert "nnz=13" in caplog.records[4].getMessage()
+
+
+def test_recorder_disabled():
+    data = wundy.ui.load(io.StringIO(yaml_text))
+    wundy.ui.preprocess(data)
+    assert wundy.instrument.null_recorder.records == []
+    assert isinstance(wundy.instrument.null_recorder, wundy.instrument.Recorder)
@@ -0,0 +1,108 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.assembly
+import wundy.dynamics
+import wundy.elements
+import wundy.modal
+
+yaml_text = """
+wundy:
+  coords: {coords}
+  connect: {connect}
+  boundary:
+{boundary}
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {{E: 100.0, nu: 0.3, density: {density}}}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d{order}
+"""
+
+
+def _preprocess(nelem=50, order=1, fixed=True, density=1.0):
+    coords, connect = wundy.elements.lagrange_bar(np.linspace(0.0, 50.0, nelem + 1), order)
+    text = yaml_text.format(
+        coords=coords.ravel().tolist(),
+        connect=connect.tolist(),
+        boundary="    - node: 0" if fixed else "    []",
+        density=density,
+        order=order,
+    )
+    return wundy.ui.preprocess(wundy.ui.load(io.StringIO(text)))
+
+
+def test_mass_matrix():
+    inp = _preprocess(nelem=2)
+    M = wundy.modal.mass_matrix(inp).toarray()
+    assert np.allclose(M, 25.0 / 6 * np.array([[2, 1, 0], [1, 4, 1], [0, 1, 2]]))
+    lumped = wundy.modal.mass_matrix(inp, lumped=True).toarray()
+    assert np.allclose(lumped, np.diag([12.5, 25.0, 12.5]))
+    for order in (2, 3):
+        M = wundy.modal.mass_matrix(_preprocess(nelem=2, order=order))
+        assert np.isclose(M.sum(), 50.0)
+
+
+@pytest.mark.parametrize("order", [1, 2])
+def test_fixed_free(order):
+    """omega_k = (2k - 1) pi c / 2L with c = 10, L = 50"""
+    inp = _preprocess(order=order)
+    exact = (2 * np.arange(1, 5) - 1) * np.pi * 10.0 / 100.0
+    consistent = wundy.modal.modes(inp, nmodes=4)
+    lumped = wundy.modal.modes(inp, nmodes=4, lumped=True)
+    # Consistent mass bounds the frequencies from above, lumped mass from below
+    assert np.all(consistent["omega"] > exact) and np.all(lumped["omega"] < exact)
+    assert np.allclose(consistent["omega"], exact, rtol=3e-3 if order == 1 else 1e-5)
+    assert np.allclose(consistent["frequencies"], consistent["omega"] / (2 * np.pi))
+
+    phi = consistent["modes"]
+    assert np.allclose(phi[0], 0.0)
+    args = (inp["coords"], inp["connect"], None, inp["materials"], inp["element blocks"], None)
+    K = wundy.assembly.global_stiffness(*wundy.assembly.assemble(*args), len(phi), "sparse")
+    M = wundy.modal.mass_matrix(inp)
+    assert np.allclose(phi.T @ M @ phi, np.eye(4), atol=1e-10)
+    assert np.allclose((K @ phi)[1:], (M @ phi * consistent["eigenvalues"])[1:], atol=1e-8)
+
+
+def test_free_free():
+    inp = _preprocess(fixed=False)
+    result = wundy.modal.modes(inp, nmodes=3)
+    assert abs(result["omega"][0]) < 1e-6
+    assert np.allclose(result["omega"][1:], [np.pi * 10 / 50, 2 * np.pi * 10 / 50], rtol=1e-3)
+
+    # Small models are solved densely and return at most all their modes
+    small = wundy.modal.modes(_preprocess(nelem=2, fixed=False), nmodes=6)
+    assert len(small["omega"]) == 3
+    assert abs(small["omega"][0]) < 1e-6
+
+
+def test_density():
+    inp = _preprocess(nelem=2)
+    del inp["materials"]["mat-1"]["parameters"]["density"]
+    with pytest.raises(ValueError, match="needs a density"):
+        wundy.modal.modes(inp)
+
+
+def test_truss():
+    """Two perpendicular bars of unit length"""
+    inp = _preprocess(nelem=2)
+    inp["coords"] = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0]])
+    inp["connect"] = np.array([[0, 1], [1, 2]])
+    inp["doftags"] = np.zeros((3, 2), dtype=int)
+    inp["dofvals"] = np.zeros((3, 2))
+    inp["dload"] = np.zeros((2, 2))
+    M = wundy.modal.mass_matrix(inp)
+    # Two bars of unit length and density: unit mass each, in both components
+    assert np.isclose(M.sum(), 4.0)
+    assert np.allclose(M.toarray(), M.toarray().T)
+    lumped = wundy.modal.mass_matrix(inp, lumped=True).diagonal()
+    assert np.allclose(lumped, [0.5, 0.5, 1.0, 1.0, 0.5, 0.5])
+    with pytest.raises(ValueError, match="1-D meshes"):
+        wundy.dynamics.lumped_mass(inp)
@@ -0,0 +1,178 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.first
+import wundy.model
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - node: 0
+      amplitude: 0.1
+  cload:
+    - node: 4
+      amplitude: 2.0
+  dload:
+    - element: 2
+      amplitude: 0.5
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+
+
+def _preprocess(text: str):
+    data = wundy.ui.load(io.StringIO(text))
+    return wundy.ui.preprocess(data)
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_model_default_load_case(engine):
+    inp = _preprocess(yaml_text)
+    model = wundy.model.Model(inp, engine=engine)
+    soln = wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        inp["materials"],
+        inp["element blocks"],
+    )
+    assert np.allclose(model.F, soln["F"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(model.solve(), soln["displ"], rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_model_batched_load_cases(engine):
+    inp = _preprocess(yaml_text)
+    model = wundy.model.Model(inp, engine=engine)
+
+    rng = np.random.default_rng(7)
+    cloads = rng.normal(size=(6, 5, 1))
+    dloads = rng.normal(size=(6, 4, 1))
+    loads = np.array([model.load_vector(c, d) for c, d in zip(cloads, dloads)])
+    u = model.solve(loads)
+    assert u.shape == (6, 5)
+
+    for i in range(6):
+        inp["dofvals"][1:] = cloads[i, 1:]
+        soln = wundy.first.first_fe_code(
+            inp["coords"],
+            inp["connect"],
+            inp["doftags"],
+            inp["dofvals"],
+            dloads[i],
+            inp["materials"],
+            inp["element blocks"],
+        )
+        assert np.allclose(loads[i], soln["F"], rtol=1e-12, atol=1e-12)
+        assert np.allclose(u[i], soln["displ"], rtol=1e-10, atol=1e-12)
+
+    with pytest.raises(ValueError):
+        model.solve(np.zeros((2, 3)))
+
+
+blocks_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4, 5, 6]
+  connect: [[0,1],[1,2],[2,3],[3,4],[4,5],[5,6]]
+  elset:
+    - name: left
+      elements: [0, 1, 2]
+    - name: middle
+      elements: [3]
+    - name: right
+      elements: [4, 5]
+  boundary:
+    - node: 0
+    - node: 6
+      amplitude: 0.2
+  cload:
+    - node: 3
+      amplitude: 2.0
+  dload:
+    - elset: left
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+    - type: elastic
+      name: mat-2
+      parameters: {E: 20.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: left
+      element_type: t1d1
+    - material: mat-2
+      name: block-2
+      elements: middle
+      element_type: t1d1
+    - material: mat-1
+      name: block-3
+      elements: right
+      element_type: t1d1
+"""
+
+
+def _full_solve(inp):
+    return wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        inp["materials"],
+        inp["element blocks"],
+    )
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+@pytest.mark.parametrize("max_rank", [0, 32])
+def test_model_incremental(engine, max_rank):
+    model = wundy.model.Model(_preprocess(blocks_text), engine=engine, max_rank=max_rank)
+    inp = _preprocess(blocks_text)
+
+    model.update_block("block-2", area=3.0)
+    inp["element blocks"]["block-2"]["element_properties"]["area"] = 3.0
+    assert model.rank == (1 if max_rank else 0)
+    soln = _full_solve(inp)
+    K = model.K.toarray() if engine == "sparse" else model.K
+    assert np.allclose(K, soln["K"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(model.solve(), soln["displ"], rtol=1e-10, atol=1e-12)
+
+    model.update_material("mat-1", E=4.0)
+    inp["materials"]["mat-1"]["parameters"]["E"] = 4.0
+    assert model.rank == (6 if max_rank else 0)
+    soln = _full_solve(inp)
+    assert np.allclose(model.solve(), soln["displ"], rtol=1e-10, atol=1e-12)
+
+    model.update_cload(3, 5.0)
+    model.update_cload([0, 5], 1.0)  # ignored on the Dirichlet node 0
+    model.update_dload([1, 4], -2.0)
+    inp["dofvals"][[3, 5], 0] = [5.0, 1.0]
+    inp["dload"][[1, 4], 0] = -2.0
+    soln = _full_solve(inp)
+    assert np.allclose(model.F, soln["F"], rtol=1e-12, atol=1e-12)
+    assert np.allclose(model.solve(), soln["displ"], rtol=1e-10, atol=1e-12)
+
+    # Reverting a change removes it from the low-rank update
+    model.update_block("block-2", area=1.0)
+    assert model.rank == (5 if max_rank else 0)
+    model.factor()
+    assert model.rank == 0
+    inp["element blocks"]["block-2"]["element_properties"]["area"] = 1.0
+    assert np.allclose(model.solve(), _full_solve(inp)["displ"], rtol=1e-10, atol=1e-12)
@@ -0,0 +1,144 @@
+import io
+
+import numpy as np
+import pytest
+import schema
+
+import wundy
+import wundy.first
+import wundy.linalg
+import wundy.materials
+import wundy.nonlinear
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - node: 0
+  cload:
+    - node: 4
+      amplitude: {load}
+  dload:
+    - elset: all
+      amplitude: {dload}
+  material:
+    - type: {type}
+      name: mat-1
+      parameters: {parameters}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+
+
+def _preprocess(load=2.0, dload=0.0, type="elastic", parameters="{E: 10.0, nu: 0.3}"):
+    text = yaml_text.format(load=load, dload=dload, type=type, parameters=parameters)
+    return wundy.ui.preprocess(wundy.ui.load(io.StringIO(text)))
+
+
+def test_elastic():
+    inp = _preprocess(dload=1.5)
+    soln = wundy.nonlinear.newton(inp, steps=2)
+    linear = wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        inp["materials"],
+        inp["element blocks"],
+    )
+    assert soln["converged"]
+    assert np.allclose(soln["displ"], linear["displ"], rtol=1e-10, atol=1e-12)
+    assert np.allclose(soln["R"], [-8.0, 0, 0, 0, 0])
+    assert [h["iterations"] for h in soln["history"]] == [1, 1]
+
+
+def test_nonlinear_elastic():
+    """Tip load P on a fixed-free bar: every element carries E (e + b e^3) = P"""
+    inp = _preprocess(type="nonlinear_elastic", parameters="{E: 10.0, nu: 0.3, b: 100.0}")
+    roots = np.roots([1000.0, 0.0, 10.0, -2.0])
+    strain = roots[np.isreal(roots)].real[0]
+    for steps in (1, 5):
+        soln = wundy.nonlinear.newton(inp, steps=steps, tol=1e-12)
+        assert soln["converged"]
+        assert np.allclose(soln["strain"], strain, rtol=1e-10)
+        assert np.allclose(soln["displ"], strain * np.arange(5.0), rtol=1e-10)
+        assert np.allclose(soln["force"], 2.0)
+        assert all(h["iterations"] <= 8 for h in soln["history"])
+
+
+def test_elastoplastic():
+    parameters = "{E: 10.0, nu: 0.3, Y: 1.0, H: 2.0}"
+    inp = _preprocess(load=1.5, type="elastoplastic", parameters=parameters)
+    soln = wundy.nonlinear.newton(inp, steps=4)
+    assert soln["converged"]
+    # strain = stress / E + (stress - Y) / H
+    assert np.allclose(soln["strain"], 0.15 + 0.25)
+    assert np.allclose(soln["state"]["plastic_strain"], 0.25)
+    assert np.allclose(soln["displ"], 0.4 * np.arange(5.0))
+
+    # Perfect plasticity under a prescribed tip displacement: the force is limited to Y A
+    inp = _preprocess(load=0.0, type="elastoplastic", parameters="{E: 10.0, nu: 0.3, Y: 1.0}")
+    inp["doftags"][4, 0] = wundy.schemas.DIRICHLET
+    inp["dofvals"][4, 0] = 2.0
+    soln = wundy.nonlinear.newton(inp, steps=4)
+    assert soln["converged"]
+    assert np.allclose(soln["stress"], 1.0)
+    assert np.allclose(soln["R"], [-1.0, 0, 0, 0, 1.0])
+
+
+def test_materials(monkeypatch):
+    with pytest.raises(schema.SchemaError, match="Y must be > 0"):
+        _preprocess(type="elastoplastic", parameters="{E: 10.0, nu: 0.3, Y: -1.0}")
+    with pytest.raises(schema.SchemaError):
+        _preprocess(type="unknown")
+
+    class Tension(wundy.materials.Material):
+        """Carries no compression"""
+
+        type = "tension"
+
+        @classmethod
+        def validate(cls, parameters):
+            return parameters
+
+        def update(self, strain, state):
+            E = self.parameters["E"]
+            return np.maximum(E * strain, 0.0), np.where(strain >= 0, E, 0.0), state
+
+    monkeypatch.setitem(wundy.materials.MATERIALS, "tension", Tension)
+    soln = wundy.nonlinear.newton(_preprocess(type="tension"))
+    assert np.allclose(soln["displ"], 0.2 * np.arange(5.0))
+
+    class Incomplete(wundy.materials.Material):
+        type = "incomplete"
+
+        @classmethod
+        def validate(cls, parameters):
+            return parameters
+
+    with pytest.raises(TypeError, match="abstract method.*update"):
+        Incomplete({"E": 10.0})
+
+
+def test_pattern_solver():
+    import scipy.sparse as sp
+
+    rng = np.random.default_rng(0)
+    n = 40
+    for offsets in ([0, 1], [0, 1, 7]):
+        M = sp.diags([rng.random(n - k) for k in offsets], offsets)
+        M = (M + M.T + 10 * sp.eye(n)).tocoo()
+        # Duplicate triplets are summed
+        rows, cols = np.tile(M.row, 2), np.tile(M.col, 2)
+        solver = wundy.linalg.PatternSolver(rows, cols, n)
+        assert solver.banded == (len(offsets) == 2)
+        for scale in (1.0, -3.0):
+            vals = scale * np.tile(M.data, 2) / 2
+            b = rng.random(n)
+            x = solver.factor(vals)(b)
+            assert np.allclose(scale * (M @ x), b, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,102 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.first
+import wundy.ordering
+
+yaml_text = """
+wundy:
+  coords: {coords}
+  connect: {connect}
+  boundary:
+{boundary}
+  cload:
+    - {{node: {tip}, dof: {dof}, amplitude: 2.0}}
+  dload:
+    - {{elset: all, dof: {dof}, amplitude: 0.5}}
+  material:
+    - {{type: elastic, name: mat-1, parameters: {{E: 100.0, nu: 0.3}}}}
+  element block:
+    - {{material: mat-1, name: block-1, elements: all, element_type: t1d1}}
+"""
+
+
+def _scrambled(coords, connect, fixed, tip, seed=1):
+    """Input of the mesh with its nodes numbered randomly; ``fixed`` nodes are pinned"""
+    coords = np.asarray(coords, dtype=float)
+    new = np.random.default_rng(seed).permutation(len(coords))
+    old = np.argsort(new)
+    ndim = coords.shape[1]
+    text = yaml_text.format(
+        coords=coords[old].ravel().tolist() if ndim == 1 else coords[old].tolist(),
+        connect=new[np.asarray(connect)].tolist(),
+        boundary="\n".join(
+            f"    - {{node: {new[n]}, dof: {dof}}}" for n in fixed for dof in "xyz"[:ndim]
+        ),
+        tip=new[tip],
+        dof="xyz"[ndim - 1],
+    )
+    return wundy.ui.preprocess(wundy.ui.load(io.StringIO(text)))
+
+
+def _solve(inp, **kwargs):
+    args = ("coords", "connect", "doftags", "dofvals", "dload", "materials", "element blocks")
+    return wundy.first.first_fe_code(*(inp[name] for name in args), **kwargs)
+
+
+def test_envelope():
+    connect = np.array([[0, 1], [1, 2], [2, 3]])
+    assert wundy.ordering.envelope(connect, 4) == (1, 3)
+    assert wundy.ordering.envelope(connect, 4, dof_per_node=2) == (3, 16)
+    assert wundy.ordering.envelope(connect[:, ::-1], 4) == (1, 3)
+    # Node 4 is not connected: the diagonal only
+    assert wundy.ordering.envelope(np.array([[0, 3]]), 5) == (3, 3)
+
+
+def test_bar():
+    n = 40
+    inp = _scrambled(np.arange(n + 1.0)[:, None], [[i, i + 1] for i in range(n)], [0], n)
+    perm, info = wundy.ordering.node_ordering(inp["connect"], n + 1)
+    assert info["method"] == "rcm" and info["bandwidth_before"] > 10
+    assert info["bandwidth_after"] == 1 and info["profile_after"] == n
+    assert info["profile_after"] < info["profile_before"]
+    assert sorted(perm) == list(range(n + 1))
+
+    for dirichlet in ("symmetric", "condense"):
+        ref = _solve(inp, engine="sparse", dirichlet=dirichlet, reorder="none")
+        soln = _solve(inp, engine="sparse", dirichlet=dirichlet)
+        assert ref["ordering"]["method"] == "none" and soln["ordering"] == info
+        for name in ("displ", "F", "R"):
+            if name in ref:
+                assert np.allclose(soln[name], ref[name])
+        assert abs(soln["K"] - ref["K"]).max() < 1e-12
+    # u = P x / EA + q x (2 L - x) / 2 EA at the tip x = L
+    tip = inp["connect"][-1, 1]
+    assert np.isclose(soln["displ"][tip], 2.0 * n / 100 + 0.5 * n**2 / 200)
+
+    # Dense solves are left alone unless asked for, and sequential numberings are kept
+    assert _solve(inp)["ordering"]["method"] == "none"
+    assert _solve(inp, reorder="rcm")["ordering"]["method"] == "rcm"
+    connect = np.column_stack([np.arange(n), np.arange(1, n + 1)])
+    assert wundy.ordering.node_ordering(connect, n + 1, method="auto")[0] is None
+    with pytest.raises(ValueError, match="Unknown reordering method"):
+        _solve(inp, reorder="amd")
+
+
+def test_truss():
+    """A Warren truss cantilevered from the left, with its nodes numbered randomly"""
+    n = 10
+    coords = [[i, 0.0] for i in range(n + 1)] + [[i + 0.5, 1.0] for i in range(n)]
+    chords = [[i, i + 1] for i in range(n)] + [[n + 1 + i, n + 2 + i] for i in range(n - 1)]
+    webs = [[i, n + 1 + i] for i in range(n)] + [[i + 1, n + 1 + i] for i in range(n)]
+    inp = _scrambled(coords, chords + webs, [0, n + 1], n)
+    ref = _solve(inp, engine="sparse", dirichlet="condense", reorder="none")
+    soln = _solve(inp, engine="sparse", dirichlet="condense")
+    assert soln["ordering"]["method"] == "rcm"
+    assert soln["ordering"]["bandwidth_after"] < soln["ordering"]["bandwidth_before"]
+    assert np.allclose(soln["displ"], ref["displ"])
+    assert np.allclose(soln["R"], ref["R"])
+    assert abs(soln["K"] - ref["K"]).max() < 1e-12
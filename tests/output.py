@@ -0,0 +1,101 @@
+import csv
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.cli
+import wundy.first
+import wundy.output
+import wundy.post
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0,1],[1,2],[2,3],[3,4]]
+  boundary:
+    - node: 0
+  cload:
+    - node: 4
+      amplitude: 2.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: all
+      element_type: t1d1
+"""
+
+
+def test_append_and_mmap(tmp_path):
+    rng = np.random.default_rng(0)
+    chunks = [rng.normal(size=(n, 3)) for n in (4, 1, 5)]
+    with wundy.output.ResultWriter(str(tmp_path), meta={"case": "a"}) as out:
+        for chunk in chunks:
+            out.append("samples", chunk)
+        out.write("ids", np.arange(7))
+        with pytest.raises(ValueError):
+            out.append("samples", np.zeros((2, 4)))
+        with pytest.raises(ValueError):
+            out.write("ids", np.arange(2))
+
+    reader = wundy.output.ResultReader(str(tmp_path))
+    samples = reader["samples"]
+    assert isinstance(samples, np.memmap)
+    assert np.array_equal(samples, np.concatenate(chunks))
+    assert np.array_equal(np.load(tmp_path / "samples.npy"), samples)
+    assert reader.fields["samples"]["shape"] == [10, 3]
+    assert reader.fields["samples"]["max"] == np.concatenate(chunks).max()
+    assert reader.fields["ids"]["min"] == 0
+    assert reader.meta == {"case": "a"}
+
+    with open(tmp_path / "summary.csv") as fh:
+        rows = list(csv.DictReader(fh))
+    assert [r["field"] for r in rows] == ["ids", "samples"]
+    assert rows[1]["shape"] == "10x3"
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+@pytest.mark.parametrize("store_K", [False, True])
+def test_write_results(tmp_path, engine, store_K):
+    inp = wundy.ui.preprocess(wundy.ui.load(io.StringIO(yaml_text)))
+    soln = wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        inp["materials"],
+        inp["element blocks"],
+        engine=engine,
+    )
+    post = wundy.post.postprocess(inp, soln)
+    wundy.output.write_results(str(tmp_path), soln, post, store_K=store_K)
+
+    reader = wundy.output.ResultReader(str(tmp_path))
+    assert np.allclose(reader["displ"], [0.0, 0.2, 0.4, 0.6, 0.8])
+    assert np.allclose(reader["reactions"], [-2.0, 0.0, 0.0, 0.0, 0.0])
+    assert np.allclose(reader["force"], 2.0)
+    assert ("K.data" in reader) == store_K
+    if store_K:
+        K = soln["K"].toarray() if engine == "sparse" else soln["K"]
+        assert np.array_equal(reader.stiffness().toarray(), K)
+    else:
+        with pytest.raises(KeyError):
+            reader.stiffness()
+
+
+def test_cli_columns(tmp_path):
+    file = tmp_path / "input.yaml"
+    file.write_text(yaml_text)
+    output = tmp_path / "results"
+    argv = ["run", str(file), "-o", str(output), "--columns", "--store-K", "--engine", "sparse"]
+    assert wundy.cli.main(argv) == 0
+    reader = wundy.output.ResultReader(str(output))
+    assert np.allclose(reader["stress"], 2.0)
+    assert reader.stiffness().shape == (5, 5)
+    assert reader.meta["engine"] == "sparse"
@@ -0,0 +1,74 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.first
+import wundy.post
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4, 5, 6]
+  connect: [[0,1],[1,2],[2,3],[3,4],[4,5],[5,6]]
+  elset:
+    - name: left
+      elements: [0, 1, 2]
+    - name: right
+      elements: [3, 4, 5]
+  boundary:
+    - node: 0
+    - node: 6
+      amplitude: 0.3
+  cload:
+    - node: 3
+      amplitude: 2.0
+  dload:
+    - elset: left
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+    - type: elastic
+      name: mat-2
+      parameters: {E: 20.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: left
+      element_type: t1d1
+      element_properties: {area: 2.0}
+    - material: mat-2
+      name: block-2
+      elements: right
+      element_type: t1d1
+"""
+
+
+@pytest.mark.parametrize("engine", ["dense", "sparse"])
+def test_postprocess(engine):
+    inp = wundy.ui.preprocess(wundy.ui.load(io.StringIO(yaml_text)))
+    soln = wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        inp["materials"],
+        inp["element blocks"],
+        engine=engine,
+        dirichlet="condense",
+    )
+    post = wundy.post.postprocess(inp, soln)
+
+    u = soln["displ"]
+    E = np.array([10.0] * 3 + [20.0] * 3)
+    A = np.array([2.0] * 3 + [1.0] * 3)
+    strain = np.diff(u)
+    assert np.allclose(post["strain"], strain, rtol=1e-12, atol=1e-14)
+    assert np.allclose(post["stress"], E * strain, rtol=1e-12, atol=1e-14)
+    assert np.allclose(post["force"], A * E * strain, rtol=1e-12, atol=1e-14)
+    assert np.allclose(post["R"], soln["R"], rtol=1e-12, atol=1e-12)
+    # Equilibrium: reactions balance the applied loads
+    assert np.isclose(post["R"].sum() + soln["F"].sum(), 0.0, atol=1e-12)
@@ -0,0 +1,147 @@
+import io
+
+import numpy as np
+import pytest
+
+import wundy
+import wundy.first
+import wundy.linalg
+import wundy.sweep
+
+yaml_text = """
+wundy:
+  coords: [0, 1, 2, 3, 4, 5, 6]
+  connect: [[0,1],[1,2],[2,3],[3,4],[4,5],[5,6]]
+  elset:
+    - name: left
+      elements: [0, 1, 2]
+    - name: right
+      elements: [3, 4, 5]
+  boundary:
+    - node: 0
+      amplitude: 0.1
+    - node: 6
+      amplitude: 0.3
+  cload:
+    - node: 3
+      amplitude: 2.0
+  dload:
+    - elset: left
+      amplitude: 1.0
+  material:
+    - type: elastic
+      name: mat-1
+      parameters: {E: 10.0, nu: 0.3}
+    - type: elastic
+      name: mat-2
+      parameters: {E: 20.0, nu: 0.3}
+  element block:
+    - material: mat-1
+      name: block-1
+      elements: left
+      element_type: t1d1
+    - material: mat-2
+      name: block-2
+      elements: right
+      element_type: t1d1
+"""
+
+
+def _preprocess(text: str):
+    return wundy.ui.preprocess(wundy.ui.load(io.StringIO(text)))
+
+
+def _displ(inp, area, E):
+    blocks, materials = inp["element blocks"], inp["materials"]
+    for name, value in area.items():
+        blocks[name]["element_properties"]["area"] = value
+    for name, value in E.items():
+        materials[name]["parameters"]["E"] = value
+    return wundy.first.first_fe_code(
+        inp["coords"],
+        inp["connect"],
+        inp["doftags"],
+        inp["dofvals"],
+        inp["dload"],
+        materials,
+        blocks,
+    )["displ"]
+
+
+def test_solve_tridiagonal_batch():
+    rng = np.random.default_rng(1)
+    n, m = 8, 5
+    off = -rng.uniform(0.5, 1.0, size=(n - 1, m))
+    diag = rng.uniform(3.0, 4.0, size=(n, m))
+    b = rng.normal(size=(n, m))
+    x = wundy.linalg.solve_tridiagonal_batch(diag, off, b)
+    for s in range(m):
+        A = np.diag(diag[:, s]) + np.diag(off[:, s], 1) + np.diag(off[:, s], -1)
+        assert np.allclose(A @ x[:, s], b[:, s], rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 3])
+def test_sweep_explicit_samples(chunk_size):
+    inp = _preprocess(yaml_text)
+    area = np.array([1.0, 2.0, 0.5, 1.5])
+    E = np.array([10.0, 5.0, 40.0, 12.0])
+    soln = wundy.sweep.sweep(inp, area={"block-2": area}, E={"mat-1": E}, chunk_size=chunk_size)
+    assert soln["displ"].shape == (4, 7)
+    for i in range(4):
+        expected = _displ(_preprocess(yaml_text), {"block-2": area[i]}, {"mat-1": E[i]})
+        assert np.allclose(soln["displ"][i], expected, rtol=1e-10, atol=1e-12)
+
+    chunks = list(wundy.sweep.iter_sweep(inp, area={"block-2": area}, chunk_size=3))
+    assert [c.stop - c.start for c, _ in chunks] == [3, 1]
+
+
+def test_sweep_distributions():
+    inp = _preprocess(yaml_text)
+    spec = {"block-1": lambda rng, n: rng.uniform(0.5, 2.0, n), "block-2": 3.0}
+    a = wundy.sweep.sweep(inp, area=spec, nsamples=50, seed=4, chunk_size=7)
+    b = wundy.sweep.sweep(inp, area=spec, nsamples=50, seed=4)
+    assert np.array_equal(a["area"]["block-1"], b["area"]["block-1"])
+    assert np.array_equal(a["displ"], b["displ"])
+    assert np.all(a["area"]["block-2"] == 3.0)
+    i = 17
+    expected = _displ(
+        _preprocess(yaml_text), {"block-1": a["area"]["block-1"][i], "block-2": 3.0}, {}
+    )
+    assert np.allclose(a["displ"][i], expected, rtol=1e-10, atol=1e-12)
+
+    with pytest.raises(ValueError):
+        wundy.sweep.sweep(inp, area=spec)
+    with pytest.raises(ValueError):
+        wundy.sweep.sweep(inp, E={"mat-3": [1.0, 2.0]})
+    with pytest.raises(ValueError):
+        wundy.sweep.sweep(inp, area={"block-1": [1.0, 2.0]}, E={"mat-1": [1.0, 2.0, 3.0]})
+
+
+def test_sweep_unordered_nodes():
+    # Nodes not numbered along the bar: the condensed stiffness is not tridiagonal
+    text = yaml_text.replace("coords: [0, 1, 2, 3, 4, 5, 6]", "coords: [0, 1, 3, 2, 4, 5, 6]")
+    text = text.replace("[[0,1],[1,2],[2,3],[3,4]", "[[0,1],[1,3],[3,2],[2,4]")
+    inp = _preprocess(text)
+    soln = wundy.sweep.sweep(inp, E={"mat-2": [1.0, 7.0]})
+    for i, E in enumerate([1.0, 7.0]):
+        expected = _displ(_preprocess(text), {}, {"mat-2": E})
+        assert np.allclose(soln["displ"][i], expected, rtol=1e-10, atol=1e-12)
+
+
+def test_solve_tridiagonal_batch_singular():
+    # The stiffness of a free-free bar and a bar with a zero modulus are singular
+    diag = np.array([[1.0, 2.0, 1.0], [2.0, 2.0, 1.0], [2.0, 2.0, 0.0]]).T
+    off = np.array([[-1.0, -1.0], [-1.0, -1.0], [-1.0, 0.0]]).T
+    with pytest.raises(np.linalg.LinAlgError, match="systems 0, 2 "):
+        wundy.linalg.solve_tridiagonal_batch(diag, off, np.ones((3, 3)))
+    with pytest.raises(np.linalg.LinAlgError, match="systems 7, 9 "):
+        wundy.linalg.solve_tridiagonal_batch(diag, off, np.ones((3, 3)), labels=[7, 8, 9])
+    with pytest.raises(np.linalg.LinAlgError, match="Singular tridiagonal system "):
+        wundy.linalg.solve_tridiagonal_batch(diag[:, 0], off[:, 0], np.ones(3))
+
+
+def test_sweep_singular():
+    inp = _preprocess(yaml_text)
+    # Samples are numbered across chunks
+    with pytest.raises(np.linalg.LinAlgError, match="systems 3 "):
+        wundy.sweep.sweep(inp, E={"mat-2": [1.0, 7.0, 3.0, 0.0]}, chunk_size=3)
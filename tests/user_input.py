@@ -1,6 +1,8 @@
 import io
 
 import numpy as np
+import pytest
+import schema
 
 import wundy
 
@@ -98,3 +100,256 @@ wundy:
         }
     }
     assert np.allclose(d["dload"], np.zeros((2, 1)))
+
+
+def test_load_input_fast():
+    text = """\
+wundy:
+  coords: [0, 1, 2.5, 3]
+  connect: [[0, 1], [1, 2], [2, 3]]
+  nset:
+  - name: NSET-1
+    nodes: [1, 3]
+  elset:
+  - name: elset-1
+    elements: [0, 2]
+  boundary:
+  - node: 0
+  - nset: nset-1
+    amplitude: 1.0
+  dload:
+  - elset: elset-1
+    amplitude: 2.0
+  material:
+  - type: elastic
+    name: mat-1
+    parameters: {E: 10.0, nu: 0.3}
+  element block:
+  - material: mat-1
+    name: block-1
+    elements: elset-1
+    element_type: t1d1
+  - material: mat-1
+    name: block-2
+    elements: [1]
+    element_type: t1d1
+"""
+    slow = wundy.ui.load(io.StringIO(text))["wundy"]
+    fast = wundy.ui.load(io.StringIO(text), fast=True)["wundy"]
+
+    assert fast.keys() == slow.keys()
+    for key in ("coords", "connect"):
+        assert fast[key].dtype == slow[key].dtype
+        assert np.array_equal(fast[key], slow[key])
+    for key, field in (("nset", "nodes"), ("elset", "elements")):
+        for f, s in zip(fast[key], slow[key]):
+            assert f["name"] == s["name"]
+            assert f[field].dtype == s[field].dtype
+            assert np.array_equal(f[field], s[field])
+    for key in ("boundary", "dload", "material", "element block"):
+        assert fast[key] == slow[key]
+
+
+def test_load_input_fast_errors():
+    template = """\
+wundy:
+  coords: {coords}
+  connect: {connect}
+  boundary:
+  - node: 0
+  material:
+  - type: elastic
+    name: mat-1
+    parameters: {{E: 10.0, nu: 0.3}}
+  element block:
+  - material: mat-1
+    name: block-1
+    elements: all
+    element_type: t1d1
+"""
+    bad = [
+        ("[0, a, 2]", "[[0, 1], [1, 2]]"),
+        ("[0, 1, 2]", "[[0, 1.5], [1, 2]]"),
+        ("[0, 1, 2]", "[[0, 1], [1]]"),
+        ("[0, 1, 2]", "[[0, 1], [1, 3]]"),
+        ("[0, 1, 2]", "[0, 1, 2]"),
+    ]
+    for coords, connect in bad:
+        text = template.format(coords=coords, connect=connect)
+        with pytest.raises(schema.SchemaError):
+            wundy.ui.load(io.StringIO(text), fast=True)
+
+
+def test_load_binary_mesh(tmp_path):
+    coords = np.linspace(0.0, 4.0, 5)
+    connect = np.array([[0, 1], [1, 2], [2, 3], [3, 4]])
+    np.save(tmp_path / "coords.npy", coords)
+    np.savez(tmp_path / "mesh.npz", connect=connect, ends=np.array([0, 4]))
+    yaml_file = tmp_path / "input.yaml"
+    yaml_file.write_text(
+        """\
+wundy:
+  coords: {file: coords.npy}
+  connect: {file: mesh.npz}
+  nset:
+  - name: ends
+    nodes: {file: mesh.npz, key: ends}
+  boundary:
+  - nset: ends
+  cload:
+  - node: 2
+    amplitude: 2.0
+  material:
+  - type: elastic
+    name: mat-1
+    parameters: {E: 10.0, nu: 0.3}
+  element block:
+  - material: mat-1
+    name: block-1
+    elements: all
+    element_type: t1d1
+"""
+    )
+    with open(yaml_file) as fh:
+        data = wundy.ui.load(fh)
+    inp = data["wundy"]
+    assert inp["coords"].shape == (5, 1)
+    assert np.array_equal(inp["coords"][:, 0], coords)
+    # Memory-mapped read-only, not copied
+    assert not inp["coords"].flags.writeable
+    assert np.array_equal(inp["connect"], connect)
+    assert np.array_equal(inp["nset"][0]["nodes"], [0, 4])
+
+    d = wundy.ui.preprocess(data)
+    assert np.allclose(d["doftags"], [[1], [0], [0], [0], [1]])
+
+    yaml_file.write_text(yaml_file.read_text().replace("key: ends", "key: missing"))
+    with open(yaml_file) as fh:
+        with pytest.raises(schema.SchemaError, match="'missing' not found"):
+            wundy.ui.load(fh)
+
+
+def test_preprocess_sets():
+    file = io.StringIO(
+        """\
+wundy:
+  coords: [0, 1, 2, 3, 4]
+  connect: [[0, 1], [1, 2], [2, 3], [3, 4]]
+  nset:
+  - name: ends
+    nodes: [0, 4]
+  - name: middle
+    nodes: [1, 2, 3]
+  elset:
+  - name: inner
+    elements: [1, 2]
+  boundary:
+  - nset: ends
+    amplitude: 0.5
+  - node: 4
+  cload:
+  - nset: middle
+    amplitude: 2.0
+  - node: 3
+    amplitude: 3.0
+  dload:
+  - elset: all
+    amplitude: 1.0
+  - elset: inner
+    amplitude: -1.0
+  material:
+  - type: elastic
+    name: mat-1
+    parameters: {E: 10.0, nu: 0.3}
+  element block:
+  - material: mat-1
+    name: block-1
+    elements: [0, 1]
+    element_type: t1d1
+  - material: mat-1
+    name: block-2
+    elements: [2, 3]
+    element_type: t1d1
+"""
+    )
+    d = wundy.ui.preprocess(wundy.ui.load(file))
+    assert np.array_equal(d["doftags"], [[1], [0], [0], [0], [1]])
+    assert np.allclose(d["dofvals"], [[0.5], [2.0], [2.0], [3.0], [0.0]])
+    assert np.allclose(d["dload"], [[1.0], [-1.0], [-1.0], [1.0]])
+
+
+def test_load_truss():
+    template = """\
+wundy:
+  coords: {coords}
+  connect: [[0, 1], [1, 2]]
+  boundary:
+  - {{node: 0, dof: {dof}}}
+  material:
+  - type: elastic
+    name: mat-1
+    parameters: {{E: 10.0, nu: 0.3}}
+  element block:
+  - material: mat-1
+    name: block-1
+    elements: all
+    element_type: t1d1
+"""
+    for fast in (False, True):
+        text = template.format(coords="[[0, 0], [1, 0], [1, 1.5]]", dof="y")
+        inp = wundy.ui.preprocess(wundy.ui.load(io.StringIO(text), fast=fast))
+        assert inp["coords"].shape == (3, 2)
+        assert inp["doftags"].tolist() == [[0, 1], [0, 0], [0, 0]]
+        assert inp["dload"].shape == (2, 2)
+        for coords in ("[[0, 0], [1], [2, 0]]", "[[0, 0, 0, 0], [1, 0, 0, 0], [2, 0, 0, 0]]"):
+            with pytest.raises((schema.SchemaError, ValueError)):
+                wundy.ui.load(io.StringIO(template.format(coords=coords, dof="x")), fast=fast)
+
+
+def test_preprocess_errors(caplog):
+    file = io.StringIO(
+        """\
+wundy:
+  coords: [0, 1, 2, 3]
+  connect: [[0, 1], [1, 2], [2, 3]]
+  boundary:
+  - nset: missing
+  cload:
+  - nset: also-missing
+  material:
+  - type: elastic
+    name: mat-1
+    parameters: {E: 10.0, nu: 0.3}
+  element block:
+  - material: mat-1
+    name: block-1
+    elements: [0, 5]
+    element_type: t1d1
+"""
+    )
+    data = wundy.ui.load(file)
+    with pytest.raises(ValueError, match="stopping due to previous errors"):
+        wundy.ui.preprocess(data)
+    messages = [r.getMessage() for r in caplog.records]
+    assert "nodeset missing not defined" in messages
+    assert "nodeset also-missing is not defined" in messages
+    assert "element block block-1 references undefined elements 5" in messages
+    assert "elements 1, 2 are not assigned to an element block" in messages
+
+    caplog.clear()
+    file = io.StringIO(
+        """\
+wundy:
+  coords: [0, 1]
+  connect: [[0, 1]]
+  boundary:
+  - {node: 0, dof: y}
+  material:
+  - {type: elastic, name: mat-1, parameters: {E: 10.0, nu: 0.3}}
+  element block:
+  - {material: mat-1, name: block-1, elements: all, element_type: t1d1}
+"""
+    )
+    with pytest.raises(ValueError, match="stopping due to previous errors"):
+        wundy.ui.preprocess(wundy.ui.load(file))
+    assert "boundary dof y is not defined for 1-D coords" in caplog.messages